@@ -6,11 +6,17 @@ Browser Use AI代理基类
 
 import asyncio
 import logging
+import time
 from typing import Any, Dict, Optional, Callable
-from browser_use import Agent
+from browser_use import Agent, Controller
 from langchain_openai import ChatOpenAI
 
+from app.agents import budgets
+from app.agents.budgets import BudgetExceeded
+from app.agents.llm_callbacks import LLMBudgetCallback, LLMMetricsCallback, LLMTracingCallback
+from app.core import tracing
 from app.core.config import settings
+from app.core.metrics import AGENT_ATTEMPTS, AGENT_BUDGET_EXCEEDED, AGENT_RETRIES, BROWSER_LAUNCH_DURATION
 
 
 logger = logging.getLogger(__name__)
@@ -23,7 +29,8 @@ class BaseAgent:
         self, 
         task_description: str = "执行浏览器自动化任务",
         temperature: float = 0.1,
-        max_retries: int = 3
+        max_retries: int = 3,
+        persistent_browser: bool = False
     ):
         """
         初始化基础代理
@@ -32,21 +39,26 @@ class BaseAgent:
             task_description: 任务描述
             temperature: LLM温度参数
             max_retries: 最大重试次数
+            persistent_browser: 是否在多次任务间复用同一浏览器（保留登录状态）
         """
         self.task_description = task_description
         self.temperature = temperature
         self.max_retries = max_retries
         self.llm = self._create_llm()
         self.agent = None
+        # 注入的Controller持有浏览器，Agent执行结束后不会关闭它
+        self.controller = Controller(headless=True) if persistent_browser else None
         
     def _create_llm(self) -> ChatOpenAI:
         """创建DeepSeek LLM实例"""
+        model = "deepseek-chat"  # 使用deepseek-chat而不是deepseek-reasoner，因为reasoner不支持工具调用
         return ChatOpenAI(
-            model="deepseek-chat",  # 使用deepseek-chat而不是deepseek-reasoner，因为reasoner不支持工具调用
+            model=model,
             api_key=settings.deepseek_api_key,
             base_url=settings.deepseek_base_url,
             temperature=self.temperature,
-            max_tokens=8192  # 增加最大token数以避免截断
+            max_tokens=8192,  # 增加最大token数以避免截断
+            callbacks=[LLMMetricsCallback(model), LLMTracingCallback(model), LLMBudgetCallback()]
         )
     
     def _create_agent(self, task_prompt: str) -> Agent:
@@ -57,15 +69,98 @@ class BaseAgent:
         os.environ['PLAYWRIGHT_HEADLESS'] = 'true'
         os.environ['DISPLAY'] = ':99'
         
-        return Agent(
+        controller = self.controller or Controller()
+        self._register_actions(controller)
+        agent = Agent(
             task=task_prompt,
-            llm=self.llm
+            llm=self.llm,
+            controller=controller
         )
+        if not self.controller:
+            # 临时Controller的浏览器仍由Agent在运行结束后关闭
+            agent.controller_injected = False
+        return agent
+    
+    def _register_actions(self, controller: Controller):
+        """在Controller上注册自定义动作，子类按需覆盖"""
+    
+    @staticmethod
+    def _trace_steps(agent: Agent):
+        """为Agent的每一步创建追踪span"""
+        original_step = agent.step
+        
+        async def traced_step(*args, **kwargs):
+            step_number = len(agent.history.history) + 1
+            with tracing.span("agent.step", **{"agent.step": step_number}) as step_span:
+                result = await original_step(*args, **kwargs)
+                try:
+                    last = agent.history.history[-1]
+                    if last.model_output:
+                        step_span.set_attribute("agent.actions", [
+                            name
+                            for action in last.model_output.action
+                            for name in action.model_dump(exclude_unset=True)
+                        ])
+                    errors = [r.error for r in last.result if r.error]
+                    if errors:
+                        step_span.status = "ERROR"
+                        step_span.set_attribute("error.message", errors[-1][:500])
+                except (IndexError, AttributeError):
+                    pass
+                return result
+        
+        agent.step = traced_step
+    
+    @staticmethod
+    def _enforce_token_budget(agent: Agent, usage: budgets.BudgetUsage, budget: budgets.AgentBudget):
+        """每一步结束后检查token用量，超出预算时中止运行"""
+        original_step = agent.step
+        
+        async def budgeted_step(*args, **kwargs):
+            result = await original_step(*args, **kwargs)
+            usage.steps = len(agent.history.history)
+            if budget.max_tokens and usage.tokens >= budget.max_tokens:
+                raise BudgetExceeded(budgets.BUDGET_TOKENS)
+            return result
+        
+        agent.step = budgeted_step
+    
+    async def _run_with_budget(
+        self,
+        agent: Agent,
+        budget: budgets.AgentBudget,
+        usage: budgets.BudgetUsage
+    ):
+        """
+        在预算内运行代理
+        
+        Raises:
+            BudgetExceeded: 超出步数、token或运行时间预算
+        """
+        self._enforce_token_budget(agent, usage, budget)
+        token = budgets.activate(usage)
+        try:
+            run = agent.run(max_steps=budget.max_steps)
+            if budget.max_seconds:
+                try:
+                    history = await asyncio.wait_for(run, budget.max_seconds)
+                except asyncio.TimeoutError:
+                    raise BudgetExceeded(budgets.BUDGET_TIME)
+            else:
+                history = await run
+        finally:
+            budgets.deactivate(token)
+        
+        usage.steps = len(history.history)
+        if not history.is_done() and usage.steps >= budget.max_steps:
+            raise BudgetExceeded(budgets.BUDGET_STEPS)
+        return history
     
     async def execute_task(
         self, 
         task_prompt: str,
-        progress_callback: Optional[Callable[[str], None]] = None
+        progress_callback: Optional[Callable[[str], None]] = None,
+        task_type: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         执行浏览器自动化任务
@@ -73,11 +168,15 @@ class BaseAgent:
         Args:
             task_prompt: 任务提示词
             progress_callback: 进度回调函数
+            task_type: 任务类型，决定步数、token和运行时间预算
             
         Returns:
-            任务执行结果
+            任务执行结果；超出预算时不再重试，返回 partial=True 和已完成的部分历史
         """
+        budget = budgets.budget_for(task_type)
         for attempt in range(self.max_retries):
+            agent = None
+            usage = budgets.BudgetUsage()
             try:
                 logger.info(f"开始执行任务 (尝试 {attempt + 1}/{self.max_retries})")
                 
@@ -95,21 +194,33 @@ class BaseAgent:
                     import asyncio
                     
                     # 启动xvfb进程
-                    xvfb_process = subprocess.Popen(
-                        ['Xvfb', ':99', '-screen', '0', '1024x768x24', '-ac'],
-                        stdout=subprocess.DEVNULL,
-                        stderr=subprocess.DEVNULL
-                    )
-                    
-                    # 等待xvfb启动
-                    await asyncio.sleep(2)
+                    launch_started = time.perf_counter()
+                    with tracing.span("browser.xvfb_start"):
+                        xvfb_process = subprocess.Popen(
+                            ['Xvfb', ':99', '-screen', '0', '1024x768x24', '-ac'],
+                            stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL
+                        )
+                        
+                        # 等待xvfb启动
+                        await asyncio.sleep(2)
+                    BROWSER_LAUNCH_DURATION.labels("xvfb").observe(time.perf_counter() - launch_started)
                     
                     try:
                         # 为当前任务创建专门的Agent
-                        agent = self._create_agent(task_prompt)
+                        agent_started = time.perf_counter()
+                        with tracing.span("agent.init"):
+                            agent = self._create_agent(task_prompt)
+                        BROWSER_LAUNCH_DURATION.labels("agent_init").observe(time.perf_counter() - agent_started)
+                        self._trace_steps(agent)
                         
-                        # 执行任务 - Browser Use的Agent.run()不接受参数
-                        result = await agent.run()
+                        # 在任务类型的预算内执行
+                        with tracing.span("agent.run", **{"agent.attempt": attempt + 1}) as run_span:
+                            try:
+                                result = await self._run_with_budget(agent, budget, usage)
+                            finally:
+                                run_span.set_attribute("agent.steps", usage.steps)
+                                run_span.set_attribute("agent.tokens", usage.tokens)
                     finally:
                         # 清理xvfb进程
                         try:
@@ -125,14 +236,32 @@ class BaseAgent:
                     builtins.input = original_input
                 
                 logger.info("任务执行成功")
+                AGENT_ATTEMPTS.labels("success").inc()
                 return {
                     "success": True,
                     "result": result,
-                    "attempt": attempt + 1
+                    "attempt": attempt + 1,
+                    "usage": usage.to_dict()
+                }
+                
+            except BudgetExceeded as e:
+                # 重试只会重复消耗预算，直接返回已完成的部分
+                logger.warning(f"任务超出预算 ({task_type}): {str(e)}，已执行 {usage.steps} 步、{usage.tokens} token")
+                AGENT_ATTEMPTS.labels("budget_exceeded").inc()
+                AGENT_BUDGET_EXCEEDED.labels(task_type or "default", e.budget).inc()
+                return {
+                    "success": False,
+                    "partial": True,
+                    "budget_exceeded": e.budget,
+                    "result": agent.history if agent else None,
+                    "error": f"任务{str(e)}，已中止",
+                    "attempt": attempt + 1,
+                    "usage": usage.to_dict()
                 }
                 
             except Exception as e:
                 logger.error(f"任务执行失败 (尝试 {attempt + 1}): {str(e)}")
+                AGENT_ATTEMPTS.labels("failure").inc()
                 
                 if attempt == self.max_retries - 1:
                     # 最后一次尝试失败
@@ -143,6 +272,7 @@ class BaseAgent:
                     }
                 
                 # 等待后重试
+                AGENT_RETRIES.inc()
                 await asyncio.sleep(2 ** attempt)  # 指数退避
         
         return {
@@ -151,6 +281,58 @@ class BaseAgent:
             "attempt": self.max_retries
         }
     
+    async def browser_context(self):
+        """持久浏览器的Playwright上下文（按需启动浏览器），未启用持久浏览器时返回None"""
+        if not self.controller:
+            return None
+        session = await self.controller.browser.get_session()
+        return session.context
+    
+    async def current_page(self):
+        """持久浏览器当前的Playwright页面，未启用持久浏览器时返回None"""
+        if not self.controller:
+            return None
+        return await self.controller.browser.get_current_page()
+    
+    async def preload_page(self, url: str) -> bool:
+        """
+        启动持久浏览器并在当前页面打开指定网址（worker预热时使用）
+        
+        Args:
+            url: 要预先加载的网址
+            
+        Returns:
+            是否已打开页面，未启用持久浏览器时返回False
+        """
+        page = await self.current_page()
+        if page is None:
+            return False
+        await page.goto(url, wait_until="domcontentloaded")
+        return True
+    
+    async def export_storage_state(self) -> Optional[Dict[str, Any]]:
+        """导出浏览器的cookie和本地存储，用于在其他worker上恢复会话"""
+        context = await self.browser_context()
+        if context is None:
+            return None
+        return await context.storage_state()
+    
+    async def import_storage_state(self, state: Dict[str, Any]) -> bool:
+        """
+        把导出的cookie写入浏览器
+        
+        Args:
+            state: export_storage_state 的结果
+            
+        Returns:
+            是否写入了cookie
+        """
+        context = await self.browser_context()
+        if context is None or not state.get("cookies"):
+            return False
+        await context.add_cookies(state["cookies"])
+        return True
+    
     async def close(self):
         """关闭代理资源"""
         if self.agent:
@@ -160,4 +342,12 @@ class BaseAgent:
             except Exception as e:
                 logger.warning(f"关闭代理时出现警告: {str(e)}")
             finally:
-                self.agent = None 
\ No newline at end of file
+                self.agent = None
+        
+        if self.controller and self.controller.browser.session is not None:
+            try:
+                await self.controller.browser.close(force=True)
+            except Exception as e:
+                logger.warning(f"关闭浏览器时出现警告: {str(e)}")
+            finally:
+                self.controller.browser.session = None 
\ No newline at end of file
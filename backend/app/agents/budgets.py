@@ -0,0 +1,103 @@
+"""
+浏览器代理预算
+
+按任务类型（登录、获取列表、分析、删除）限制代理的步数、token数和运行时间。
+token用量由LLM回调记入当前运行的计数器（上下文变量，多个代理并发运行时互不影响）
+"""
+
+import contextvars
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+
+# 任务类型
+TASK_LOGIN = "login"
+TASK_FETCH = "fetch"
+TASK_ANALYZE = "analyze"
+TASK_DELETE = "delete"
+
+# 预算类别
+BUDGET_STEPS = "steps"
+BUDGET_TOKENS = "tokens"
+BUDGET_TIME = "time"
+
+BUDGET_LABELS = {BUDGET_STEPS: "步数", BUDGET_TOKENS: "token", BUDGET_TIME: "运行时间"}
+
+# 未指定任务类型时的步数上限（browser_use默认值）
+DEFAULT_MAX_STEPS = 100
+
+
+class AgentBudget:
+    """单次代理运行的预算，0表示不限制"""
+
+    def __init__(self, max_steps: int, max_tokens: int = 0, max_seconds: float = 0):
+        self.max_steps = max_steps or DEFAULT_MAX_STEPS
+        self.max_tokens = max_tokens
+        self.max_seconds = max_seconds
+
+
+def budget_for(task_type: Optional[str]) -> AgentBudget:
+    """
+    读取任务类型的预算配置
+
+    Args:
+        task_type: 任务类型，None表示不限制token和运行时间
+
+    Returns:
+        代理预算
+    """
+    if task_type is None:
+        return AgentBudget(DEFAULT_MAX_STEPS)
+    return AgentBudget(
+        getattr(settings, f"agent_{task_type}_max_steps"),
+        getattr(settings, f"agent_{task_type}_max_tokens"),
+        getattr(settings, f"agent_{task_type}_max_seconds")
+    )
+
+
+class BudgetExceeded(Exception):
+    """代理运行超出预算"""
+
+    def __init__(self, budget: str):
+        super().__init__(f"超出{BUDGET_LABELS[budget]}预算")
+        self.budget = budget
+
+
+class BudgetUsage:
+    """单次代理运行的用量"""
+
+    def __init__(self):
+        self.steps = 0
+        self.tokens = 0
+        self.started_at = time.perf_counter()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "steps": self.steps,
+            "tokens": self.tokens,
+            "seconds": round(time.perf_counter() - self.started_at, 2)
+        }
+
+
+_current_usage: contextvars.ContextVar[Optional[BudgetUsage]] = contextvars.ContextVar(
+    "agent_budget_usage", default=None
+)
+
+
+def activate(usage: BudgetUsage) -> contextvars.Token:
+    """把用量计数器设为当前运行的计数器"""
+    return _current_usage.set(usage)
+
+
+def deactivate(token: contextvars.Token):
+    """恢复之前的计数器"""
+    _current_usage.reset(token)
+
+
+def record_tokens(count: int):
+    """记入当前运行消耗的token（不在代理运行中时忽略）"""
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.tokens += count
@@ -0,0 +1,264 @@
+"""
+并行删除执行器
+
+在同一个已登录会话上开多个标签页（独立的浏览器上下文，共享登录cookie；http策略下
+为直接调用删除接口的并发请求），各标签页从共享队列中取微博ID删除，所有标签页共用账号的
+删除额度和节奏控制器，额度充足时多个标签页可以同时用掉额度。结果中附带每个标签页和整体的吞吐量
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from app.agents.http_deleter import HttpDeleter
+from app.core.config import settings
+from app.core.metrics import DELETIONS
+from app.core.pacing import AdaptivePacer, classify_outcome
+from app.core.rate_limiter import RateLimiter
+
+
+logger = logging.getLogger(__name__)
+
+# 删除策略
+STRATEGY_BROWSER = "browser"
+STRATEGY_HTTP = "http"
+
+
+class TabStats:
+    """单个标签页的删除统计"""
+
+    def __init__(self, tab: int):
+        self.tab = tab
+        self.attempted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+
+    def to_dict(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            "tab": self.tab,
+            "attempted": self.attempted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "deletions_per_minute": _per_minute(self.succeeded, elapsed)
+        }
+
+
+def _per_minute(count: int, seconds: float) -> float:
+    return round(count * 60 / seconds, 2) if seconds > 0 else 0.0
+
+
+class DeletionExecutor:
+    """多标签页并行删除执行器"""
+
+    def __init__(
+        self,
+        tabs: List[Any],
+        rate_limiter: Optional[RateLimiter] = None,
+        pacer: Optional[AdaptivePacer] = None,
+        progress_callback: Optional[Callable[[str, int, int], None]] = None,
+        result_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
+        """
+        初始化执行器
+
+        Args:
+            tabs: 每个标签页使用的代理（需提供 delete_post），第一个为会话本身的代理
+            rate_limiter: 账号的删除额度，所有标签页共用
+            pacer: 账号的节奏控制器，所有标签页共用
+            progress_callback: 进度回调函数 (message, current, total)
+            result_callback: 每条微博删除完成后的回调（用于保存检查点）
+        """
+        self.tabs = tabs
+        self.rate_limiter = rate_limiter
+        self.pacer = pacer
+        self.progress_callback = progress_callback
+        self.result_callback = result_callback
+        self._opened: List[Any] = []
+
+    @classmethod
+    async def open(
+        cls,
+        agent: Any,
+        concurrency: int,
+        strategy: str = STRATEGY_BROWSER,
+        **kwargs
+    ) -> "DeletionExecutor":
+        """
+        在代理的登录会话上打开指定数量的标签页
+
+        browser策略下额外的标签页是新的持久浏览器，导入会话的cookie后即为同一登录状态；
+        http策略下所有标签页共用一个带会话cookie的连接池直接调用删除接口。
+        会话没有可导出的浏览器状态时退回单个浏览器标签页
+
+        Args:
+            agent: 已登录的会话代理
+            concurrency: 标签页数量
+            strategy: 删除策略，browser 或 http
+            **kwargs: 传给执行器的其他参数
+
+        Returns:
+            删除执行器
+        """
+        tabs = [agent]
+        opened = []
+        if concurrency > 1 or strategy == STRATEGY_HTTP:
+            state = await agent.export_storage_state()
+            if state is None:
+                logger.warning("会话没有持久浏览器，无法共享登录状态，使用单个浏览器标签页删除")
+            elif strategy == STRATEGY_HTTP:
+                deleter = HttpDeleter.from_storage_state(state, max_connections=concurrency)
+                opened.append(deleter)
+                tabs = [deleter] * concurrency
+            else:
+                for _ in range(concurrency - 1):
+                    tab = type(agent)(persistent_browser=True)
+                    opened.append(tab)
+                    if await tab.import_storage_state(state):
+                        tab.is_logged_in = True
+                        tabs.append(tab)
+                    else:
+                        logger.warning("标签页导入登录状态失败，跳过该标签页")
+
+        executor = cls(tabs, **kwargs)
+        executor._opened = opened
+        logger.info(f"删除执行器已就绪，策略: {strategy}，共 {len(tabs)} 个标签页")
+        return executor
+
+    async def close(self):
+        """关闭执行器额外打开的标签页（会话本身的代理保持打开）"""
+        for tab in self._opened:
+            try:
+                await tab.close()
+            except Exception as e:
+                logger.warning(f"关闭删除标签页失败: {str(e)}")
+        self._opened = []
+
+    async def run(self, post_ids: List[str]) -> Dict[str, Any]:
+        """
+        并行删除微博
+
+        Args:
+            post_ids: 微博ID列表
+
+        Returns:
+            批量删除结果（含 throughput 吞吐量统计）
+        """
+        total_posts = len(post_ids)
+        queue: asyncio.Queue = asyncio.Queue()
+        for post_id in post_ids:
+            queue.put_nowait(post_id)
+
+        successful_deletes: List[Dict[str, Any]] = []
+        failed_deletes: List[Dict[str, Any]] = []
+        stats = [TabStats(i) for i in range(len(self.tabs))]
+        state = {"completed": 0, "retry_after": None}
+
+        def report(message: str):
+            if self.progress_callback:
+                self.progress_callback(message, state["completed"], total_posts)
+
+        def defer(post_id: str):
+            failed_deletes.append({
+                "post_id": post_id,
+                "success": False,
+                "error": f"已达到每小时删除上限，约 {state['retry_after']:.0f} 秒后可继续删除",
+                "timestamp": datetime.now().isoformat()
+            })
+            DELETIONS.labels("rate_limited").inc()
+            state["completed"] += 1
+
+        async def worker(tab_stats: TabStats, agent: Any):
+            first = True
+            while True:
+                try:
+                    post_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                # 额度已耗尽：剩余微博直接留待稍后删除
+                if state["retry_after"] is not None:
+                    defer(post_id)
+                    continue
+
+                if self.pacer is not None and not first:
+                    report(f"标签页 {tab_stats.tab} 等待 {self.pacer.delay:.1f} 秒后删除微博 {post_id}...")
+                    await self.pacer.wait()
+                first = False
+
+                if self.rate_limiter is not None and not await self.rate_limiter.acquire(
+                    max_wait=settings.delete_rate_max_wait
+                ):
+                    if state["retry_after"] is None:
+                        state["retry_after"] = self.rate_limiter.status()["seconds_until_next"]
+                        logger.warning(
+                            f"删除额度不足，剩余 {queue.qsize() + 1} 条微博约 "
+                            f"{state['retry_after']:.0f} 秒后可继续"
+                        )
+                    defer(post_id)
+                    continue
+
+                tab_stats.attempted += 1
+                started = time.perf_counter()
+                try:
+                    result = await agent.delete_post(post_id, lambda msg: report(msg))
+                    outcome = classify_outcome(result["success"], result.get("error"))
+                    if result["success"]:
+                        successful_deletes.append(result)
+                        tab_stats.succeeded += 1
+                        DELETIONS.labels("success").inc()
+                        logger.info(f"标签页 {tab_stats.tab} 成功删除微博: {post_id}")
+                    else:
+                        failed_deletes.append(result)
+                        tab_stats.failed += 1
+                        DELETIONS.labels("failure").inc()
+                        logger.error(f"删除微博失败: {post_id} - {result.get('error')}")
+                except Exception as e:
+                    result = {
+                        "post_id": post_id,
+                        "success": False,
+                        "error": str(e),
+                        "timestamp": datetime.now().isoformat()
+                    }
+                    failed_deletes.append(result)
+                    tab_stats.failed += 1
+                    outcome = classify_outcome(False, str(e))
+                    DELETIONS.labels("error").inc()
+                    logger.error(f"删除微博异常: {post_id} - {str(e)}")
+                finally:
+                    tab_stats.busy_seconds += time.perf_counter() - started
+
+                if self.result_callback:
+                    self.result_callback(result)
+                if self.pacer is not None:
+                    self.pacer.record(outcome)
+                state["completed"] += 1
+                report("删除进度")
+
+        logger.info(f"开始批量删除 {total_posts} 条微博，标签页数: {len(self.tabs)}")
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker(s, agent) for s, agent in zip(stats, self.tabs)))
+        elapsed = time.perf_counter() - started_at
+
+        throughput = {
+            "tabs": [s.to_dict(elapsed) for s in stats],
+            "elapsed_seconds": round(elapsed, 3),
+            "deletions_per_minute": _per_minute(len(successful_deletes), elapsed)
+        }
+        logger.info(
+            f"批量删除完成，成功 {len(successful_deletes)} 条，"
+            f"整体吞吐 {throughput['deletions_per_minute']} 条/分钟"
+        )
+
+        return {
+            "total_requested": total_posts,
+            "successful_count": len(successful_deletes),
+            "failed_count": len(failed_deletes),
+            "successful_deletes": successful_deletes,
+            "failed_deletes": failed_deletes,
+            "throughput": throughput,
+            "completion_time": datetime.now().isoformat()
+        }
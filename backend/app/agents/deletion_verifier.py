@@ -0,0 +1,83 @@
+"""
+批量删除校验
+
+删除时不再逐条检查页面，整批删除后只获取一次当前时间线，与尝试删除的微博ID对比：
+仍在时间线中的为 still_present，时间线覆盖范围内已消失的为 confirmed，
+超出覆盖范围或获取失败的为 unknown
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+# 校验结论
+VERIFY_CONFIRMED = "confirmed"
+VERIFY_STILL_PRESENT = "still_present"
+VERIFY_UNKNOWN = "unknown"
+
+
+def diff_timeline(
+    attempted_ids: Iterable[str],
+    timeline_ids: Iterable[str],
+    complete: bool
+) -> Dict[str, List[str]]:
+    """
+    对比尝试删除的微博与当前时间线
+
+    微博ID随发布时间递增，时间线只取到最近的一段时，
+    比其中最早一条还旧的微博无法判断是否已删除
+
+    Args:
+        attempted_ids: 尝试删除的微博ID
+        timeline_ids: 当前时间线中的微博ID（从新到旧）
+        complete: 时间线是否已取到最后一条
+
+    Returns:
+        confirmed / still_present / unknown 三组微博ID
+    """
+    present = {str(post_id) for post_id in timeline_ids}
+    numeric_ids = [int(post_id) for post_id in present if post_id.isdigit()]
+    oldest = min(numeric_ids) if numeric_ids else None
+
+    verdicts: Dict[str, List[str]] = {VERIFY_CONFIRMED: [], VERIFY_STILL_PRESENT: [], VERIFY_UNKNOWN: []}
+    for post_id in attempted_ids:
+        post_id = str(post_id)
+        if post_id in present:
+            verdicts[VERIFY_STILL_PRESENT].append(post_id)
+        elif complete or (oldest is not None and post_id.isdigit() and int(post_id) >= oldest):
+            verdicts[VERIFY_CONFIRMED].append(post_id)
+        else:
+            verdicts[VERIFY_UNKNOWN].append(post_id)
+    return verdicts
+
+
+def apply_verification(result: Dict[str, Any], verdicts: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    """
+    把校验结论写回批量删除结果
+
+    每条成功记录带上 verification 字段；仍然存在的微博移到失败列表
+
+    Args:
+        result: 批量删除结果（原地修改）
+        verdicts: diff_timeline 的结果
+
+    Returns:
+        被修改的记录（用于更新检查点）
+    """
+    verdict_of = {post_id: verdict for verdict, post_ids in verdicts.items() for post_id in post_ids}
+    kept, changed = [], []
+    for record in result["successful_deletes"]:
+        record["verification"] = verdict_of.get(str(record["post_id"]), VERIFY_UNKNOWN)
+        if record["verification"] == VERIFY_STILL_PRESENT:
+            record["success"] = False
+            record["error"] = "删除后微博仍在时间线中"
+            record["timestamp"] = datetime.now().isoformat()
+            result["failed_deletes"].append(record)
+        else:
+            kept.append(record)
+        changed.append(record)
+
+    result["successful_deletes"] = kept
+    result["successful_count"] = len(kept)
+    result["failed_count"] = len(result["failed_deletes"])
+    result["verification"] = {verdict: len(post_ids) for verdict, post_ids in verdicts.items()}
+    return changed
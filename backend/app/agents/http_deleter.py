@@ -0,0 +1,124 @@
+"""
+HTTP删除后端
+
+直接调用微博网页版的删除接口，不经过浏览器和LLM：用登录会话导出的cookie
+和XSRF-TOKEN构造连接池化的httpx客户端，按接口返回的JSON判断是否删除成功。
+与浏览器标签页提供相同的 delete_post 接口，可作为并行删除执行器的一种策略
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+DESTROY_PATH = "/ajax/statuses/destroy"
+XSRF_COOKIE = "XSRF-TOKEN"
+
+# 微博用418/429表示请求过于频繁
+THROTTLE_STATUS_CODES = (418, 429)
+
+
+class HttpDeleter:
+    """基于会话cookie的HTTP删除客户端"""
+
+    def __init__(
+        self,
+        cookies: List[Dict[str, Any]],
+        base_url: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """
+        初始化HTTP删除客户端
+
+        Args:
+            cookies: Playwright storage_state 中的cookie列表
+            base_url: 微博接口地址，默认 weibo_api_base_url
+            max_connections: 连接池大小，默认 deletion_concurrency
+            transport: 自定义传输层（测试时接入本地桩服务）
+        """
+        jar = httpx.Cookies()
+        xsrf_token = None
+        for cookie in cookies:
+            jar.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+            if cookie["name"] == XSRF_COOKIE:
+                xsrf_token = cookie["value"]
+        if xsrf_token is None:
+            logger.warning("会话cookie中没有XSRF-TOKEN，删除请求可能被拒绝")
+
+        base_url = base_url or settings.weibo_api_base_url
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            cookies=jar,
+            headers={
+                "Accept": "application/json, text/plain, */*",
+                "X-Requested-With": "XMLHttpRequest",
+                "X-XSRF-TOKEN": xsrf_token or "",
+                "Referer": f"{base_url}/",
+                "Origin": base_url
+            },
+            limits=httpx.Limits(max_connections=max_connections or settings.deletion_concurrency),
+            timeout=settings.http_delete_timeout,
+            transport=transport
+        )
+
+    @classmethod
+    def from_storage_state(cls, state: Dict[str, Any], **kwargs) -> "HttpDeleter":
+        """从 export_storage_state 的结果创建客户端"""
+        return cls(state.get("cookies", []), **kwargs)
+
+    async def delete_post(
+        self,
+        post_id: str,
+        progress_callback: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        删除单条微博
+
+        Args:
+            post_id: 微博ID
+            progress_callback: 进度回调函数
+
+        Returns:
+            删除结果（与浏览器删除的结构相同）
+        """
+        if progress_callback:
+            progress_callback(f"正在删除微博 {post_id}...")
+
+        delete_result = {
+            "post_id": post_id,
+            "success": False,
+            "timestamp": datetime.now().isoformat()
+        }
+
+        try:
+            response = await self.client.post(DESTROY_PATH, json={"id": post_id})
+        except httpx.HTTPError as e:
+            delete_result["error"] = f"删除请求失败: {str(e)}"
+            return delete_result
+
+        if response.status_code in THROTTLE_STATUS_CODES:
+            delete_result["error"] = f"操作过于频繁（HTTP {response.status_code}）"
+            return delete_result
+
+        try:
+            data = response.json()
+        except ValueError:
+            delete_result["error"] = f"删除接口返回非JSON响应（HTTP {response.status_code}）"
+            return delete_result
+
+        if data.get("ok") == 1:
+            delete_result["success"] = True
+        else:
+            delete_result["error"] = data.get("msg") or f"删除失败（HTTP {response.status_code}）"
+        return delete_result
+
+    async def close(self):
+        """关闭连接池"""
+        await self.client.aclose()
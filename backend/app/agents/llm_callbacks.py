@@ -0,0 +1,116 @@
+"""
+LLM调用回调
+
+通过LangChain回调记录每次LLM请求的耗时和token消耗，并为每次请求创建追踪span，
+同时把token消耗记入当前代理运行的预算用量
+"""
+
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from app.agents import budgets
+from app.core import tracing
+from app.core.metrics import LLM_REQUEST_DURATION, LLM_TOKENS
+
+
+logger = logging.getLogger(__name__)
+
+
+def extract_token_usage(response: LLMResult) -> Tuple[int, int]:
+    """从LLM响应中提取 (prompt_tokens, completion_tokens)"""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens", 0) or 0, usage.get("completion_tokens", 0) or 0
+
+    prompt_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            prompt_tokens += metadata.get("input_tokens", 0)
+            completion_tokens += metadata.get("output_tokens", 0)
+    return prompt_tokens, completion_tokens
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """记录LLM请求耗时与token消耗的回调"""
+
+    def __init__(self, model: str):
+        self.model = model
+        self._started: Dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: Any, *, run_id: UUID, **kwargs: Any):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        self._observe(run_id, "success")
+
+        prompt_tokens, completion_tokens = extract_token_usage(response)
+        LLM_TOKENS.labels(self.model, "prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(self.model, "completion").inc(completion_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._observe(run_id, "error")
+
+    def _observe(self, run_id: UUID, outcome: str) -> Optional[float]:
+        """记录请求耗时"""
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return None
+        elapsed = time.perf_counter() - started
+        LLM_REQUEST_DURATION.labels(self.model, outcome).observe(elapsed)
+        return elapsed
+
+
+class LLMBudgetCallback(BaseCallbackHandler):
+    """把每次LLM请求的token消耗记入当前代理运行的预算用量"""
+
+    # 在事件循环中直接执行，保证能读取调用方的预算上下文
+    run_inline = True
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        prompt_tokens, completion_tokens = extract_token_usage(response)
+        budgets.record_tokens(prompt_tokens + completion_tokens)
+
+
+class LLMTracingCallback(BaseCallbackHandler):
+    """为每次LLM请求创建追踪span（父span为发起请求时的当前span）"""
+
+    # 在事件循环中直接执行，保证能读取调用方的追踪上下文
+    run_inline = True
+
+    def __init__(self, model: str):
+        self.model = model
+        self._spans: Dict[UUID, tracing.Span] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: Any, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        prompt_tokens, completion_tokens = extract_token_usage(response)
+        span.set_attribute("llm.prompt_tokens", prompt_tokens)
+        span.set_attribute("llm.completion_tokens", completion_tokens)
+        span.end()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        span.record_error(error)
+        span.end()
+
+    def _start(self, run_id: UUID):
+        self._spans[run_id] = tracing.start_span("llm.request", attributes={"llm.model": self.model})
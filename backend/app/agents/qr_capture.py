@@ -0,0 +1,75 @@
+"""
+登录二维码截取
+
+直接打开扫码登录页，从二维码图片的网络响应中取得图片；
+规定时间内没有拦截到时退回截取二维码元素，结果为 data URI，不经过LLM
+"""
+
+import asyncio
+import base64
+import logging
+from typing import Any, Awaitable, Callable
+
+
+logger = logging.getLogger(__name__)
+
+# 扫码登录页（默认显示二维码）
+QR_LOGIN_URL = "https://passport.weibo.com/sso/signin?entry=miniblog&source=miniblog&url=https%3A%2F%2Fweibo.com%2F"
+
+# 二维码图片由 qr.weibo.cn 生成
+QR_IMAGE_HOST = "qr.weibo.cn"
+QR_IMAGE_SELECTOR = 'img[src*="qr.weibo.cn"]'
+
+
+def to_data_uri(body: bytes, content_type: str = "image/png") -> str:
+    """图片内容转为 data URI"""
+    mime = (content_type or "image/png").split(";")[0].strip()
+    return f"data:{mime};base64,{base64.b64encode(body).decode('ascii')}"
+
+
+def is_qr_image(url: str, content_type: str) -> bool:
+    """响应是否为登录二维码图片"""
+    return QR_IMAGE_HOST in url and (content_type or "").startswith("image/")
+
+
+async def capture_qr_code(
+    page: Any,
+    load: Callable[[], Awaitable[Any]],
+    timeout: float = 10
+) -> str:
+    """
+    加载页面并截取二维码
+
+    Args:
+        page: Playwright页面
+        load: 加载或刷新二维码的操作（打开登录页、刷新页面等）
+        timeout: 等待二维码图片响应的秒数
+
+    Returns:
+        二维码图片的 data URI
+    """
+    captured = asyncio.get_running_loop().create_future()
+
+    async def on_response(response: Any):
+        content_type = response.headers.get("content-type", "")
+        if captured.done() or not is_qr_image(response.url, content_type):
+            return
+        try:
+            body = await response.body()
+        except Exception as e:
+            logger.debug(f"读取二维码图片失败: {str(e)}")
+            return
+        if not captured.done():
+            captured.set_result(to_data_uri(body, content_type))
+
+    page.on("response", on_response)
+    try:
+        await load()
+        try:
+            return await asyncio.wait_for(asyncio.shield(captured), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("未拦截到二维码图片响应，改为截取二维码元素")
+            png = await page.locator(QR_IMAGE_SELECTOR).first.screenshot(timeout=timeout * 1000)
+            return to_data_uri(png)
+    finally:
+        page.remove_listener("response", on_response)
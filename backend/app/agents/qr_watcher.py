@@ -0,0 +1,143 @@
+"""
+扫码登录状态监听
+
+停留在二维码页面上，监听页面自身轮询二维码状态的网络响应和登录后的页面跳转，
+状态变化（已扫描/已确认/已过期）时立即推送，不再由LLM反复读取页面
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from typing import Any, AsyncIterator, Callable, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# 二维码状态
+QR_WAITING = "waiting"
+QR_SCANNED = "scanned"
+QR_CONFIRMED = "confirmed"
+QR_EXPIRED = "expired"
+# 手机端已确认，但页面没有跳转回微博（登录cookie未写入）
+QR_UNCONFIRMED = "unconfirmed"
+TERMINAL_QR_STATUSES = (QR_CONFIRMED, QR_EXPIRED)
+
+# 登录页轮询接口（passport.weibo.com/sso/v2/qrcode/check 及旧版 login.sina.com.cn/sso/qrcode/check）的返回码
+RETCODE_STATUS = {
+    50114001: QR_WAITING,
+    50114002: QR_SCANNED,
+    20000000: QR_CONFIRMED,
+    50114004: QR_EXPIRED,
+}
+QR_CHECK_PATH = "qrcode/check"
+
+# 登录完成后跳转到的微博页面（排除登录页本身）
+LOGGED_IN_URL = re.compile(r"^https://(www\.)?weibo\.com/(?!login|signup|newlogin)")
+
+
+def parse_qr_check(body: str) -> Optional[str]:
+    """
+    解析二维码状态接口的响应（JSON或JSONP）
+
+    Args:
+        body: 响应文本
+
+    Returns:
+        二维码状态，无法识别时返回None
+    """
+    start, end = body.find("{"), body.rfind("}") + 1
+    if start == -1 or end == 0:
+        return None
+    try:
+        retcode = int(json.loads(body[start:end]).get("retcode"))
+    except (ValueError, TypeError):
+        return None
+    return RETCODE_STATUS.get(retcode)
+
+
+class QrLoginWatcher:
+    """二维码页面状态监听器"""
+
+    def __init__(self, page: Any, on_change: Optional[Callable[[str], None]] = None):
+        """
+        初始化监听器
+
+        Args:
+            page: 显示二维码的Playwright页面
+            on_change: 状态变化回调
+        """
+        self.page = page
+        self.on_change = on_change
+        self.status = QR_WAITING
+        self._changes: asyncio.Queue = asyncio.Queue()
+        self._redirected = asyncio.Event()
+
+    def start(self) -> "QrLoginWatcher":
+        """开始监听页面事件"""
+        self.page.on("response", self._on_response)
+        self.page.on("framenavigated", self._on_navigated)
+        return self
+
+    def stop(self):
+        """停止监听"""
+        self.page.remove_listener("response", self._on_response)
+        self.page.remove_listener("framenavigated", self._on_navigated)
+
+    def reset(self):
+        """二维码刷新后重新从等待扫码开始监听"""
+        self.status = QR_WAITING
+
+    async def _on_response(self, response: Any):
+        if QR_CHECK_PATH not in response.url:
+            return
+        try:
+            status = parse_qr_check(await response.text())
+        except Exception as e:
+            logger.debug(f"读取二维码状态响应失败: {str(e)}")
+            return
+        if status:
+            self._set(status)
+
+    def _on_navigated(self, frame: Any):
+        if frame is self.page.main_frame and LOGGED_IN_URL.match(frame.url):
+            self._redirected.set()
+            self._set(QR_CONFIRMED)
+
+    def _set(self, status: str):
+        if status == self.status or self.status in TERMINAL_QR_STATUSES:
+            return
+        logger.info(f"二维码状态变化: {self.status} -> {status}")
+        self.status = status
+        self._changes.put_nowait(status)
+        if self.on_change:
+            self.on_change(status)
+
+    async def changes(self, timeout: float) -> AsyncIterator[str]:
+        """
+        逐个产出状态变化，到达确认/过期或超时后结束
+
+        Args:
+            timeout: 最长等待秒数
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                status = await asyncio.wait_for(self._changes.get(), remaining)
+            except asyncio.TimeoutError:
+                return
+            yield status
+            if status in TERMINAL_QR_STATUSES:
+                return
+
+    async def wait_redirected(self, timeout: float) -> bool:
+        """确认登录后等待页面跳转回微博（登录cookie在跳转过程中写入）"""
+        try:
+            await asyncio.wait_for(self._redirected.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
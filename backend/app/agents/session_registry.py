@@ -0,0 +1,238 @@
+"""
+账号会话注册表
+
+按账号维护独立的微博代理会话：每个会话持有自己的浏览器上下文、登录状态和删除额度。
+空闲会话按LRU淘汰，会话数量和估算内存超过上限时优先淘汰最久未使用的空闲会话。
+worker预热时启动的备用浏览器在创建新会话时优先使用
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, List, Optional
+
+from app.agents.weibo_agent import WeiboAgent
+from app.core.config import settings
+from app.core.rate_limiter import SlidingWindowLimiter, deletion_bucket
+
+
+logger = logging.getLogger(__name__)
+
+
+class AccountSession:
+    """单个账号的会话"""
+
+    def __init__(self, account_id: str, agent: WeiboAgent, clock: Callable[[], float] = time.monotonic):
+        self.account_id = account_id
+        self.agent = agent
+        self.created_at = clock()
+        self.last_used_at = self.created_at
+        self.in_use = 0
+
+    @property
+    def delete_budget(self) -> SlidingWindowLimiter:
+        """账号的删除额度（集群共享的滑动窗口）"""
+        return deletion_bucket(self.account_id)
+
+    @property
+    def is_logged_in(self) -> bool:
+        return self.agent.is_logged_in
+
+    async def close(self):
+        """关闭会话的浏览器"""
+        await self.agent.close()
+
+
+class SessionRegistry:
+    """账号会话注册表"""
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        idle_ttl: Optional[float] = None,
+        memory_limit_mb: Optional[int] = None,
+        session_memory_mb: Optional[int] = None,
+        agent_factory: Optional[Callable[[str], WeiboAgent]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        初始化会话注册表
+
+        Args:
+            max_sessions: 最大会话数
+            idle_ttl: 空闲会话的存活时间（秒）
+            memory_limit_mb: 会话总内存上限（MB）
+            session_memory_mb: 单个会话（含浏览器）的估算内存（MB）
+            agent_factory: 按账号创建代理的工厂函数
+            clock: 时钟，便于测试注入
+        """
+        self.max_sessions = max_sessions or settings.session_max_count
+        self.idle_ttl = idle_ttl or settings.session_idle_ttl
+        self.memory_limit_mb = memory_limit_mb or settings.session_memory_limit_mb
+        self.session_memory_mb = session_memory_mb or settings.session_memory_mb
+        self._agent_factory = agent_factory or (lambda account_id: WeiboAgent(persistent_browser=True))
+        self._clock = clock
+        self._sessions: "OrderedDict[str, AccountSession]" = OrderedDict()
+        self._spares: List[WeiboAgent] = []
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, account_id: str) -> bool:
+        return account_id in self._sessions
+
+    def accounts(self) -> List[str]:
+        """当前会话的账号（从最久未使用到最近使用）"""
+        return list(self._sessions)
+
+    def peek(self, account_id: str) -> Optional[AccountSession]:
+        """查看会话，不更新使用时间"""
+        return self._sessions.get(account_id)
+
+    @property
+    def spare_count(self) -> int:
+        """尚未分配给账号的备用浏览器数"""
+        return len(self._spares)
+
+    def add_spare(self, agent: WeiboAgent) -> bool:
+        """
+        登记预先启动的备用浏览器
+
+        Args:
+            agent: 已启动浏览器的代理（未登录）
+
+        Returns:
+            是否登记成功（会话与备用浏览器总数达到上限时不登记）
+        """
+        if len(self._sessions) + len(self._spares) >= self.capacity:
+            return False
+        self._spares.append(agent)
+        return True
+
+    @property
+    def capacity(self) -> int:
+        """同时允许的会话数（数量上限与内存上限取较小值）"""
+        by_memory = max(self.memory_limit_mb // max(self.session_memory_mb, 1), 1)
+        return min(self.max_sessions, by_memory)
+
+    async def acquire(self, account_id: str, hold: bool = False) -> AccountSession:
+        """
+        获取账号会话，不存在时创建
+
+        Args:
+            account_id: 账号ID
+            hold: 是否同时标记为使用中（调用方用完后需减少 in_use）
+
+        Returns:
+            账号会话
+        """
+        async with self._lock:
+            evicted = self._expire_idle(exclude=account_id)
+            session = self._sessions.get(account_id)
+            if session is None:
+                evicted += self._make_room()
+                agent = self._spares.pop() if self._spares else self._agent_factory(account_id)
+                session = AccountSession(account_id, agent, self._clock)
+                self._sessions[account_id] = session
+                logger.info(f"创建账号会话: {account_id}（当前 {len(self._sessions)} 个）")
+            else:
+                self._sessions.move_to_end(account_id)
+            session.last_used_at = self._clock()
+            if hold:
+                session.in_use += 1
+
+        await self._close_sessions(evicted)
+        return session
+
+    @asynccontextmanager
+    async def session(self, account_id: str) -> AsyncIterator[AccountSession]:
+        """在代码块内使用账号会话，使用中的会话不会被淘汰"""
+        session = await self.acquire(account_id, hold=True)
+        try:
+            yield session
+        finally:
+            self.release(session)
+
+    def release(self, session: AccountSession):
+        """结束使用会话"""
+        session.in_use = max(session.in_use - 1, 0)
+        session.last_used_at = self._clock()
+
+    async def evict_idle(self) -> List[str]:
+        """淘汰超过空闲时间的会话"""
+        async with self._lock:
+            expired = self._expire_idle()
+
+        await self._close_sessions(expired)
+        return [session.account_id for session in expired]
+
+    async def remove(self, account_id: str):
+        """移除并关闭账号会话"""
+        async with self._lock:
+            session = self._sessions.pop(account_id, None)
+        if session:
+            await self._close_sessions([session])
+
+    async def close_all(self):
+        """关闭全部会话和备用浏览器"""
+        async with self._lock:
+            sessions = list(self._sessions.values())
+            spares, self._spares = self._spares, []
+            self._sessions.clear()
+        await self._close_sessions(sessions)
+        for agent in spares:
+            try:
+                await agent.close()
+            except Exception as e:
+                logger.warning(f"关闭备用浏览器失败: {str(e)}")
+
+    def _expire_idle(self, exclude: Optional[str] = None) -> List[AccountSession]:
+        """移除超过空闲时间的会话，返回被移除的会话（调用方需持有锁）"""
+        now = self._clock()
+        expired = [
+            session for session in self._sessions.values()
+            if session.account_id != exclude
+            and not session.in_use
+            and now - session.last_used_at >= self.idle_ttl
+        ]
+        for session in expired:
+            del self._sessions[session.account_id]
+        return expired
+
+    def _make_room(self) -> List[AccountSession]:
+        """为新会话腾出位置，返回被淘汰的会话（调用方需持有锁）"""
+        evicted = []
+        for session in list(self._sessions.values()):
+            if len(self._sessions) < self.capacity:
+                break
+            if session.in_use:
+                continue
+            del self._sessions[session.account_id]
+            evicted.append(session)
+
+        if len(self._sessions) >= self.capacity:
+            logger.warning(f"会话均在使用中，临时超出上限 {self.capacity}")
+        return evicted
+
+    async def _close_sessions(self, sessions: List[AccountSession]):
+        for session in sessions:
+            logger.info(f"关闭账号会话: {session.account_id}")
+            try:
+                await session.close()
+            except Exception as e:
+                logger.warning(f"关闭账号会话 {session.account_id} 失败: {str(e)}")
+
+
+# 进程内的会话注册表
+_registry: Optional[SessionRegistry] = None
+
+
+def get_session_registry() -> SessionRegistry:
+    """获取进程内的会话注册表"""
+    global _registry
+    if _registry is None:
+        _registry = SessionRegistry()
+    return _registry
@@ -0,0 +1,292 @@
+"""
+微博列表提取动作
+
+为browser_use的Controller注册自定义动作：在页面中运行JavaScript读取已加载的微博卡片，
+整理为结构化记录存入收集器。动作只把条数摘要返回给LLM，LLM只负责导航和调用动作，不再抄写微博内容
+"""
+
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from browser_use import Controller
+from browser_use.agent.views import ActionResult
+from browser_use.browser.service import Browser
+
+
+logger = logging.getLogger(__name__)
+
+# 连续几次滚动都没有加载出新微博时认为已到底
+MAX_IDLE_SCROLLS = 3
+# 每次滚动后等待新内容加载的毫秒数
+SCROLL_WAIT_MS = 1500
+
+# 读取页面上已加载的微博卡片（优先读取卡片组件的数据，取不到时解析DOM）
+EXTRACT_CARDS_JS = r"""
+() => {
+  const text = (el) => (el ? el.innerText.trim() : "");
+  const componentData = (card) => {
+    let el = card;
+    for (let depth = 0; el && depth < 4; depth++, el = el.parentElement) {
+      const props = (el.__vueParentComponent && el.__vueParentComponent.props)
+        || (el.__vue__ && el.__vue__.$props) || {};
+      const item = props.item || props.data;
+      if (item && (item.idstr || item.mid)) return item;
+    }
+    return null;
+  };
+  return Array.from(document.querySelectorAll("article")).map((card) => {
+    const data = componentData(card);
+    if (data) {
+      return {
+        id: String(data.idstr || data.mid),
+        url: data.user && data.mblogid ? `https://weibo.com/${data.user.idstr || data.user.id}/${data.mblogid}` : "",
+        time: data.created_at || "",
+        content: data.text_raw || "",
+        repost: data.reposts_count || 0,
+        comment: data.comments_count || 0,
+        like: data.attitudes_count || 0,
+        media: Boolean(data.pic_num || data.page_info)
+      };
+    }
+    const link = card.querySelector('a[class*="head-info_time"], a[href*="weibo.com/"][title]');
+    if (!link) return null;
+    const counts = Array.from(card.querySelectorAll('footer [class*="toolbar_item"]')).map(text);
+    const like = card.querySelector("footer .woo-like-count");
+    return {
+      id: link.href.split("?")[0].split("/").pop(),
+      url: link.href.split("?")[0],
+      time: link.getAttribute("title") || text(link),
+      content: text(card.querySelector('[class*="detail_wbtext"]')),
+      repost: counts[0] || "",
+      comment: counts[1] || "",
+      like: like ? text(like) : (counts[2] || ""),
+      media: Boolean(card.querySelector('[class*="picture"] img, video, [class*="card-video"]'))
+    };
+  }).filter(Boolean);
+}
+"""
+
+
+def parse_count(value: Any) -> int:
+    """
+    解析卡片上的互动数（如 "1.2万"，为0时显示为 "转发"/"评论"/"赞"）
+
+    Args:
+        value: 数字或卡片上的文字
+
+    Returns:
+        互动数，无法识别时为0
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.search(r"(\d+(?:\.\d+)?)\s*(万|亿)?", str(value or ""))
+    if not match:
+        return 0
+    number = float(match.group(1))
+    unit = {"万": 10_000, "亿": 100_000_000}.get(match.group(2), 1)
+    return int(number * unit)
+
+
+def parse_publish_time(value: str, now: Optional[datetime] = None) -> str:
+    """
+    把卡片上的发布时间统一为 "YYYY-MM-DD HH:MM"
+
+    Args:
+        value: 卡片上的时间（"刚刚"、"5分钟前"、"昨天 12:00"、"01-05 12:00"、接口的created_at等）
+        now: 当前时间，便于测试注入
+
+    Returns:
+        统一格式的时间，无法识别时原样返回
+    """
+    now = now or datetime.now()
+    value = (value or "").strip()
+    fmt = "%Y-%m-%d %H:%M"
+
+    if value == "刚刚":
+        return now.strftime(fmt)
+    match = re.fullmatch(r"(\d+)\s*(秒|分钟|小时)前", value)
+    if match:
+        unit = {"秒": "seconds", "分钟": "minutes", "小时": "hours"}[match.group(2)]
+        return (now - timedelta(**{unit: int(match.group(1))})).strftime(fmt)
+    match = re.fullmatch(r"(今天|昨天)\s*(\d{1,2}):(\d{2})", value)
+    if match:
+        day = now - timedelta(days=1 if match.group(1) == "昨天" else 0)
+        return day.replace(hour=int(match.group(2)), minute=int(match.group(3))).strftime(fmt)
+
+    for pattern in ("%Y-%m-%d %H:%M", "%y-%m-%d %H:%M", "%a %b %d %H:%M:%S %z %Y"):
+        try:
+            return datetime.strptime(value, pattern).strftime(fmt)
+        except ValueError:
+            continue
+    try:
+        # 今年的微博不显示年份
+        return datetime.strptime(f"{now.year}-{value}", "%Y-%m-%d %H:%M").strftime(fmt)
+    except ValueError:
+        return value
+
+
+def normalize_card(card: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Any]:
+    """页面脚本返回的卡片整理为微博记录（与 get_user_weibos 的返回格式一致）"""
+    return {
+        "id": str(card.get("id", "")),
+        "content": str(card.get("content", "")),
+        "publish_time": parse_publish_time(str(card.get("time", "")), now),
+        "repost_count": parse_count(card.get("repost")),
+        "comment_count": parse_count(card.get("comment")),
+        "like_count": parse_count(card.get("like")),
+        "has_media": bool(card.get("media", False)),
+        "url": str(card.get("url", ""))
+    }
+
+
+class PostCollector:
+    """按微博ID去重保存动作提取到的微博，并记录本次获取的筛选条件"""
+
+    def __init__(self):
+        self._posts: Dict[str, Dict[str, Any]] = {}
+        self.start_date: Optional[str] = None
+        self.end_date: Optional[str] = None
+        self.keywords: Optional[List[str]] = None
+        # 滚动收集是否已到时间线末尾（收集到的就是全部微博）
+        self.reached_end = False
+
+    def reset(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        keywords: Optional[List[str]] = None
+    ):
+        """开始新的获取任务前清空，并设置筛选条件"""
+        self._posts = {}
+        self.reached_end = False
+        self.start_date = start_date
+        self.end_date = end_date
+        self.keywords = keywords
+
+    def add(self, cards: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        加入页面脚本返回的卡片
+
+        Returns:
+            新增的微博记录
+        """
+        added = []
+        for card in cards or []:
+            post = normalize_card(card)
+            if post["id"] and post["id"] not in self._posts:
+                self._posts[post["id"]] = post
+                added.append(post)
+        return added
+
+    @property
+    def posts(self) -> List[Dict[str, Any]]:
+        """已收集的微博（按页面顺序）"""
+        return list(self._posts.values())
+
+    @property
+    def matched(self) -> List[Dict[str, Any]]:
+        """已收集的微博中符合筛选条件的部分"""
+        return filter_posts(self.posts, self.start_date, self.end_date, self.keywords)
+
+    def summary(self, added: int) -> str:
+        """返回给LLM的摘要（不含微博内容）"""
+        if not self._posts:
+            return "当前页面没有找到微博卡片，请确认已打开个人主页的微博列表"
+        times = sorted(post["publish_time"] for post in self._posts.values())
+        return (
+            f"已收集 {len(self._posts)} 条微博，其中 {len(self.matched)} 条符合条件"
+            f"（本次新增 {added} 条，最早 {times[0]}，最新 {times[-1]}）"
+        )
+
+
+def filter_posts(
+    posts: List[Dict[str, Any]],
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    keywords: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    按发布日期和关键词筛选微博
+
+    Args:
+        posts: 微博记录
+        start_date: 开始日期 (YYYY-MM-DD)
+        end_date: 结束日期 (YYYY-MM-DD)
+        keywords: 关键词，包含任意一个即保留
+
+    Returns:
+        符合条件的微博（发布时间无法识别的不按日期排除）
+    """
+    selected = []
+    for post in posts:
+        day = post["publish_time"][:10]
+        if re.fullmatch(r"\d{4}-\d{2}-\d{2}", day):
+            if (start_date and day < start_date) or (end_date and day > end_date):
+                continue
+        if keywords and not any(keyword in post["content"] for keyword in keywords):
+            continue
+        selected.append(post)
+    return selected
+
+
+async def collect_posts(
+    page: Any,
+    collector: PostCollector,
+    max_count: int,
+    stop_before: str = ""
+) -> Tuple[int, bool]:
+    """
+    滚动页面并收集微博，直到符合筛选条件的微博够数量、加载到更早的微博或没有更多内容
+
+    Args:
+        page: Playwright页面
+        collector: 收集器
+        max_count: 符合筛选条件的微博数量上限
+        stop_before: 日期 (YYYY-MM-DD)，新加载的微博全部早于该日期时停止
+
+    Returns:
+        (本次新增的条数, 是否已到时间线末尾)
+    """
+    total_added = idle = 0
+    while len(collector.matched) < max_count and idle < MAX_IDLE_SCROLLS:
+        added = collector.add(await page.evaluate(EXTRACT_CARDS_JS))
+        total_added += len(added)
+        if len(collector.matched) >= max_count:
+            break
+        # 置顶微博可能早于开始日期，只有一批新微博全部更早时才停止
+        if stop_before and added and all(post["publish_time"] < stop_before for post in added):
+            break
+        idle = 0 if added else idle + 1
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        await page.wait_for_timeout(SCROLL_WAIT_MS)
+    return total_added, idle >= MAX_IDLE_SCROLLS
+
+
+def register_weibo_actions(controller: Controller, collector: PostCollector):
+    """
+    在Controller上注册微博列表提取动作
+
+    Args:
+        controller: browser_use的Controller
+        collector: 动作提取的微博存入的收集器
+    """
+
+    @controller.action("提取当前页面已加载的微博卡片并保存，只返回条数摘要，不返回微博内容", requires_browser=True)
+    async def extract_weibo_cards(browser: Browser):
+        page = await browser.get_current_page()
+        added = collector.add(await page.evaluate(EXTRACT_CARDS_JS))
+        return ActionResult(extracted_content=collector.summary(len(added)))
+
+    @controller.action(
+        "在微博列表页向下滚动并持续保存微博卡片，直到符合条件的微博达到 max_count 条、没有更多微博，"
+        "或新加载的微博都早于 stop_before 日期（YYYY-MM-DD，可留空）；只返回条数摘要",
+        requires_browser=True
+    )
+    async def scroll_and_collect(max_count: int, browser: Browser, stop_before: str = ""):
+        page = await browser.get_current_page()
+        added, reached_end = await collect_posts(page, collector, max_count, stop_before)
+        collector.reached_end = collector.reached_end or reached_end
+        logger.info(f"动作收集微博: 新增 {added} 条，共 {len(collector.posts)} 条" + ("，已到末尾" if reached_end else ""))
+        return ActionResult(extracted_content=collector.summary(added))
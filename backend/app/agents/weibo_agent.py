@@ -6,152 +6,226 @@
 
 import asyncio
 import json
-import random
 import logging
-import re
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Dict, Any, Optional, Callable
 
 from .base_agent import BaseAgent
+from .budgets import TASK_ANALYZE, TASK_DELETE, TASK_FETCH, TASK_LOGIN
+from .deletion_executor import STRATEGY_BROWSER, DeletionExecutor
+from .deletion_verifier import apply_verification, diff_timeline
+from .qr_capture import QR_LOGIN_URL, capture_qr_code
+from .qr_watcher import QR_CONFIRMED, QR_UNCONFIRMED, QrLoginWatcher
+from .weibo_actions import PostCollector, collect_posts, register_weibo_actions
 from app.core.config import settings
+from app.core.pacing import AdaptivePacer
+from app.core.rate_limiter import RateLimiter
+from app.core.tracing import traced
 
 
 logger = logging.getLogger(__name__)
 
+# 读取当前登录账号的资料：从页面配置取用户ID，再在页面内请求资料接口（自动带上登录cookie）
+PROFILE_JS = r"""
+async () => {
+  const config = window.$CONFIG || {};
+  let user = config.user || null;
+  const uid = user && (user.idstr || user.id);
+  if (uid) {
+    try {
+      const response = await fetch(`/ajax/profile/info?uid=${uid}`, {credentials: "include"});
+      const data = response.ok ? await response.json() : null;
+      if (data && data.data && data.data.user) user = data.data.user;
+    } catch (e) {}
+  }
+  return user;
+}
+"""
+
+# 当前登录账号的用户ID（微博页面的全局配置）
+CURRENT_UID_JS = r"""
+() => {
+  const user = (window.$CONFIG || {}).user;
+  return user ? String(user.idstr || user.id || "") : "";
+}
+"""
+
+# 个人主页的微博列表
+TIMELINE_URL = "https://weibo.com/u/{uid}"
+
 
 class WeiboAgent(BaseAgent):
     """微博专用AI代理"""
     
-    def __init__(self):
+    def __init__(self, persistent_browser: bool = False):
+        """
+        初始化微博代理
+        
+        Args:
+            persistent_browser: 是否在多次任务间复用同一浏览器（保留登录状态）
+        """
         super().__init__(
             task_description="微博内容智能管理代理",
             temperature=0.1,
-            max_retries=3
+            max_retries=3,
+            persistent_browser=persistent_browser
         )
         self.is_logged_in = False
         self.user_info = {}
+        # 提取动作收集到的微博，每次获取列表前清空
+        self.post_collector = PostCollector()
     
+    def _register_actions(self, controller):
+        """注册微博列表提取动作"""
+        register_weibo_actions(controller, self.post_collector)
+    
+    @traced("weibo.login_qr")
     async def login_weibo_qr(
         self,
         progress_callback: Optional[Callable[[str], None]] = None
     ) -> Dict[str, Any]:
         """
-        使用扫码方式登录微博
+        打开扫码登录页并直接截取二维码（不经过LLM）
         
         Args:
             progress_callback: 进度回调函数
             
         Returns:
-            登录结果，包含二维码信息
+            登录结果，包含二维码的 data URI
         """
-        login_prompt = """
-请帮我使用扫码方式登录微博。
-
-任务步骤：
-1. 访问微博登录页面 https://weibo.com/login.php
-2. 寻找并点击"扫码登录"或"二维码登录"按钮
-3. 等待二维码出现在页面上
-4. 截取二维码图片或获取其信息
-5. 返回登录状态和二维码信息
-
-请以JSON格式返回结果，包含以下字段：
-- success: 布尔值，表示操作是否成功
-- qr_code: 二维码信息或图片路径
-- qr_status: 状态（waiting/scanned/confirmed/expired）
-- user_info: 用户信息对象（如果登录成功）
-- error: 错误信息（如果失败）
-
-示例：{"success": true, "qr_code": "data:image/png;base64,...", "qr_status": "waiting", "user_info": {}, "error": ""}
-"""
+        page = await self.current_page()
+        if page is None:
+            return {
+                "success": False,
+                "error": "扫码登录需要持久浏览器会话"
+            }
         
         if progress_callback:
             progress_callback("正在生成登录二维码...")
         
-        result = await self.execute_task(login_prompt, progress_callback)
+        try:
+            qr_code = await capture_qr_code(page, lambda: page.goto(QR_LOGIN_URL))
+        except Exception as e:
+            logger.error(f"获取登录二维码失败: {str(e)}")
+            return {
+                "success": False,
+                "error": f"获取登录二维码失败: {str(e)}"
+            }
         
-        if result["success"]:
-            try:
-                # 解析登录结果
-                login_data = self._parse_qr_login_result(result["result"])
-                if login_data.get("qr_status") == "confirmed" and login_data.get("success"):
-                    self.is_logged_in = True
-                    self.user_info = login_data.get("user_info", {})
-                    logger.info(f"微博扫码登录成功: {self.user_info.get('nickname', 'Unknown')}")
-                return login_data
-            except Exception as e:
-                logger.error(f"解析扫码登录结果失败: {str(e)}")
-                return {
-                    "success": False,
-                    "error": f"解析扫码登录结果失败: {str(e)}"
-                }
-        else:
+        return {
+            "success": True,
+            "qr_code": qr_code,
+            "qr_status": "waiting",
+            "user_info": {}
+        }
+    
+    @traced("weibo.refresh_qr")
+    async def refresh_qr_code(self) -> Dict[str, Any]:
+        """
+        二维码过期后重新加载登录页，截取新的二维码
+        
+        Returns:
+            包含新二维码 data URI 的结果
+        """
+        page = await self.current_page()
+        if page is None:
+            return {
+                "success": False,
+                "error": "扫码登录需要持久浏览器会话"
+            }
+        
+        try:
+            qr_code = await capture_qr_code(page, page.reload)
+        except Exception as e:
+            logger.error(f"刷新登录二维码失败: {str(e)}")
             return {
                 "success": False,
-                "error": result.get("error", "生成登录二维码失败")
+                "error": f"刷新登录二维码失败: {str(e)}"
             }
+        
+        logger.info("登录二维码已刷新")
+        return {
+            "success": True,
+            "qr_code": qr_code,
+            "qr_status": "waiting"
+        }
     
-    async def check_qr_status(
+    async def watch_qr_login(
         self,
-        progress_callback: Optional[Callable[[str], None]] = None
-    ) -> Dict[str, Any]:
+        on_change: Optional[Callable[[str], None]] = None
+    ) -> Optional[QrLoginWatcher]:
         """
-        检查二维码登录状态
+        在当前二维码页面上开始监听扫码状态
         
         Args:
-            progress_callback: 进度回调函数
+            on_change: 状态变化回调
             
         Returns:
-            登录状态
+            监听器，未启用持久浏览器时返回None
         """
-        check_prompt = """
-请检查当前二维码登录的状态。
-
-请执行以下操作：
-1. 检查页面上的登录状态提示
-2. 判断二维码是否已被扫描
-3. 判断用户是否已确认登录
-4. 如果登录成功，获取用户信息
-5. 如果二维码过期，返回过期状态
-
-请返回JSON格式的结果：
-{
-    "success": true/false,
-    "qr_status": "waiting/scanned/confirmed/expired",
-    "user_info": {
-        "nickname": "用户昵称",
-        "followers_count": "粉丝数",
-        "following_count": "关注数",
-        "weibo_count": "微博数"
-    },
-    "message": "状态描述",
-    "error": "错误信息（如果有）"
-}
-"""
-        
-        if progress_callback:
-            progress_callback("正在检查登录状态...")
-        
-        result = await self.execute_task(check_prompt, progress_callback)
+        page = await self.current_page()
+        if page is None:
+            return None
+        
+        def handle_change(status: str):
+            if status == QR_CONFIRMED:
+                self.is_logged_in = True
+                logger.info("微博扫码登录确认成功")
+            if on_change:
+                on_change(status)
+        
+        return QrLoginWatcher(page, handle_change).start()
+    
+    async def finish_qr_login(self, watcher: QrLoginWatcher, timeout: float) -> Dict[str, Any]:
+        """
+        扫码确认后等待跳转回微博并读取用户信息
         
-        if result["success"]:
-            try:
-                status_data = self._parse_qr_status_result(result["result"])
-                if status_data.get("qr_status") == "confirmed" and status_data.get("success"):
-                    self.is_logged_in = True
-                    self.user_info = status_data.get("user_info", {})
-                    logger.info(f"微博扫码登录确认成功: {self.user_info.get('nickname', 'Unknown')}")
-                return status_data
-            except Exception as e:
-                logger.error(f"解析登录状态失败: {str(e)}")
-                return {
-                    "success": False,
-                    "error": f"解析登录状态失败: {str(e)}"
-                }
-        else:
+        Args:
+            watcher: 已收到确认状态的监听器
+            timeout: 等待跳转的最长秒数
+            
+        Returns:
+            登录结果；未等到跳转时登录未完成，qr_status 为 unconfirmed
+        """
+        if not await watcher.wait_redirected(timeout):
+            logger.warning("扫码已确认，但未等到跳转回微博，登录未完成")
+            self.is_logged_in = False
             return {
                 "success": False,
-                "error": result.get("error", "检查登录状态失败")
+                "qr_status": QR_UNCONFIRMED,
+                "error": "扫码已确认，但页面未跳转回微博，登录未完成，请重新扫码"
             }
+        
+        user_info = await self.fetch_profile()
+        if not user_info:
+            logger.warning("扫码登录成功，但未能读取用户信息")
+        return {
+            "success": True,
+            "qr_status": QR_CONFIRMED,
+            "user_info": user_info
+        }
+    
+    async def fetch_profile(self) -> Dict[str, Any]:
+        """
+        读取当前登录账号的资料并保存到 user_info
+        
+        Returns:
+            用户信息，读取失败时为空字典
+        """
+        page = await self.current_page()
+        if page is None:
+            return {}
+        try:
+            user = await page.evaluate(PROFILE_JS)
+        except Exception as e:
+            logger.warning(f"读取用户信息失败: {str(e)}")
+            return {}
+        if not user:
+            return {}
+        
+        self.user_info = self._parse_profile(user)
+        logger.info(f"当前登录用户: {self.user_info['nickname']}")
+        return self.user_info
     
     async def login_weibo(
         self,
@@ -178,6 +252,7 @@ class WeiboAgent(BaseAgent):
             # 保留原有的密码登录方式作为备选
             return await self.login_weibo_password(username, password, progress_callback)
     
+    @traced("weibo.login_password")
     async def login_weibo_password(
         self,
         username: str,
@@ -228,7 +303,7 @@ class WeiboAgent(BaseAgent):
         if progress_callback:
             progress_callback("正在使用密码登录微博...")
         
-        result = await self.execute_task(login_prompt, progress_callback)
+        result = await self.execute_task(login_prompt, progress_callback, task_type=TASK_LOGIN)
         
         if result["success"]:
             try:
@@ -251,6 +326,7 @@ class WeiboAgent(BaseAgent):
                 "error": result.get("error", "密码登录失败")
             }
     
+    @traced("weibo.get_user_weibos")
     async def get_user_weibos(
         self,
         start_date: Optional[str] = None,
@@ -278,65 +354,41 @@ class WeiboAgent(BaseAgent):
                 "error": "请先登录微博"
             }
         
-        # 构建获取微博的提示词
-        time_filter = ""
-        if start_date and end_date:
-            time_filter = f"时间范围：{start_date} 到 {end_date}"
-        elif start_date:
-            time_filter = f"从 {start_date} 开始"
-        elif end_date:
-            time_filter = f"到 {end_date} 结束"
-        
-        keyword_filter = ""
-        if keywords:
-            keyword_filter = f"包含关键词：{', '.join(keywords)}"
-        
+        # 页面内容由提取动作直接保存，LLM只负责打开列表页并调用动作
+        stop_before = f"，stop_before=\"{start_date}\"" if start_date else ""
         get_weibos_prompt = f"""
 请帮我获取我的微博列表。
 
-筛选条件：
-- {time_filter if time_filter else '不限时间'}
-- {keyword_filter if keyword_filter else '不限关键词'}
-- 最大数量：{max_count} 条
-
 请执行以下步骤：
-1. 进入我的微博主页
-2. 滚动页面加载更多微博
-3. 根据时间和关键词筛选微博
-4. 提取每条微博的详细信息
-
-对于每条微博，请提取以下信息：
-- 微博ID
-- 发布时间
-- 微博内容（完整文本）
-- 转发数、评论数、点赞数
-- 是否包含图片/视频
-- 微博链接
+1. 进入我的微博主页（个人主页的微博列表）
+2. 调用 scroll_and_collect 动作收集微博，参数 max_count={max_count}{stop_before}
+3. 收集完成后调用 done 结束任务，只需回复收集到的条数
 
-请返回JSON格式的结果：
-{{
-    "success": true/false,
-    "weibos": [
-        {{
-            "id": "微博ID",
-            "content": "微博内容",
-            "publish_time": "发布时间",
-            "repost_count": 转发数,
-            "comment_count": 评论数,
-            "like_count": 点赞数,
-            "has_media": true/false,
-            "url": "微博链接"
-        }}
-    ],
-    "total_count": 总数量,
-    "error": "错误信息（如果有）"
-}}
+微博内容由动作直接保存，不要抄写微博内容，也不要用 extract_content 读取页面文字。
+如果动作返回没有找到微博卡片，先确认当前页面是个人主页的微博列表，再调用一次。
 """
         
         if progress_callback:
             progress_callback("正在获取微博列表...")
         
-        result = await self.execute_task(get_weibos_prompt, progress_callback)
+        self.post_collector.reset(start_date, end_date, keywords)
+        result = await self.execute_task(get_weibos_prompt, progress_callback, task_type=TASK_FETCH)
+        
+        posts = self.post_collector.posts
+        if posts and (result["success"] or result.get("partial")):
+            matched = self.post_collector.matched
+            weibos = matched[:max_count]
+            weibos_data = {
+                "success": True,
+                "weibos": weibos,
+                "total_count": len(weibos),
+                # 滚动到了时间线末尾且没有截断，返回的就是全部符合条件的微博
+                "complete": self.post_collector.reached_end and len(matched) <= max_count
+            }
+            if not result["success"]:
+                # 超出预算时返回已收集的部分
+                weibos_data["partial"] = True
+            return weibos_data
         
         if result["success"]:
             try:
@@ -369,21 +421,8 @@ class WeiboAgent(BaseAgent):
         Returns:
             分析结果
         """
-        if progress_callback:
-            progress_callback("开始获取微博内容...")
-        
         # 首先获取微博列表
-        time_range = criteria.get("time_range", {})
-        keywords = criteria.get("keywords", [])
-        max_posts = criteria.get("max_posts", 100)
-        
-        weibos_result = await self.get_user_weibos(
-            start_date=time_range.get("start_date"),
-            end_date=time_range.get("end_date"),
-            keywords=keywords,
-            max_count=max_posts,
-            progress_callback=progress_callback
-        )
+        weibos_result = await self.fetch_posts(criteria, progress_callback)
         
         if not weibos_result["success"]:
             return weibos_result
@@ -400,17 +439,7 @@ class WeiboAgent(BaseAgent):
         if progress_callback:
             progress_callback(f"开始分析 {len(weibos)} 条微博...")
         
-        # 分析每条微博的风险
-        analyzed_posts = []
-        for i, weibo in enumerate(weibos):
-            if progress_callback:
-                progress_callback(f"分析进度: {i+1}/{len(weibos)}")
-            
-            risk_analysis = await self._analyze_single_weibo(weibo)
-            analyzed_posts.append(risk_analysis)
-            
-            # 添加延迟避免过于频繁的请求
-            await asyncio.sleep(1)
+        analyzed_posts = await self.score_posts(weibos, progress_callback)
         
         # 按风险分数排序
         analyzed_posts.sort(key=lambda x: x["risk_score"], reverse=True)
@@ -422,6 +451,72 @@ class WeiboAgent(BaseAgent):
             "criteria": criteria
         }
     
+    @traced("weibo.fetch_posts")
+    async def fetch_posts(
+        self,
+        criteria: Dict[str, Any],
+        progress_callback: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        按分析条件获取待分析的微博列表
+        
+        Args:
+            criteria: 筛选条件，包含时间范围、关键词等
+            progress_callback: 进度回调函数
+            
+        Returns:
+            微博列表
+        """
+        if progress_callback:
+            progress_callback("开始获取微博内容...")
+        
+        time_range = criteria.get("time_range", {})
+        keywords = criteria.get("keywords", [])
+        max_posts = criteria.get("max_posts", 100)
+        
+        return await self.get_user_weibos(
+            start_date=time_range.get("start_date"),
+            end_date=time_range.get("end_date"),
+            keywords=keywords,
+            max_count=max_posts,
+            progress_callback=progress_callback
+        )
+    
+    @traced("weibo.score_posts")
+    async def score_posts(
+        self,
+        weibos: List[Dict[str, Any]],
+        progress_callback: Optional[Callable[[str, int, int], None]] = None,
+        on_scored: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        逐条评估微博风险（不要求登录，可在任意worker上执行）
+        
+        Args:
+            weibos: 微博列表
+            progress_callback: 进度回调函数 (message, current, total)
+            on_scored: 每条微博评估完成后的回调
+            
+        Returns:
+            分析结果列表（未排序）
+        """
+        analyzed_posts = []
+        for i, weibo in enumerate(weibos):
+            if progress_callback:
+                progress_callback(f"分析进度: {i+1}/{len(weibos)}", i, len(weibos))
+            
+            risk_analysis = await self._analyze_single_weibo(weibo)
+            analyzed_posts.append(risk_analysis)
+            
+            if on_scored:
+                on_scored(risk_analysis)
+            
+            # 添加延迟避免过于频繁的请求
+            await asyncio.sleep(1)
+        
+        return analyzed_posts
+    
+    @traced("weibo.analyze_post")
     async def _analyze_single_weibo(self, weibo: Dict[str, Any]) -> Dict[str, Any]:
         """分析单条微博的风险"""
         content = weibo.get("content", "")
@@ -452,7 +547,7 @@ class WeiboAgent(BaseAgent):
 """
         
         try:
-            result = await self.execute_task(analysis_prompt)
+            result = await self.execute_task(analysis_prompt, task_type=TASK_ANALYZE)
             if result["success"]:
                 analysis_data = self._parse_analysis_result(result["result"])
                 
@@ -512,6 +607,7 @@ class WeiboAgent(BaseAgent):
             "original_weibo": weibo
         }
     
+    @traced("weibo.delete_post")
     async def delete_post(
         self,
         post_id: str,
@@ -535,17 +631,6 @@ class WeiboAgent(BaseAgent):
                 "timestamp": datetime.now().isoformat()
             }
         
-        # 添加随机延迟，避免被检测
-        delay = random.randint(
-            settings.operation_delay_min, 
-            settings.operation_delay_max
-        )
-        
-        if progress_callback:
-            progress_callback(f"等待 {delay} 秒后删除微博 {post_id}...")
-        
-        await asyncio.sleep(delay)
-        
         # 构建删除任务的提示词
         delete_prompt = f"""
 请帮我删除指定的微博。
@@ -557,8 +642,8 @@ class WeiboAgent(BaseAgent):
 2. 点击微博右上角的"更多"按钮
 3. 选择"删除"选项
 4. 确认删除操作
-5. 验证删除是否成功
 
+确认删除后即可返回结果，无需再检查页面（整批删除后会统一校验）。
 请小心操作，确保只删除指定的微博。
 如果找不到该微博或删除失败，请返回具体的错误信息。
 
@@ -572,7 +657,7 @@ class WeiboAgent(BaseAgent):
         if progress_callback:
             progress_callback(f"正在删除微博 {post_id}...")
         
-        result = await self.execute_task(delete_prompt, progress_callback)
+        result = await self.execute_task(delete_prompt, progress_callback, task_type=TASK_DELETE)
         
         delete_result = {
             "post_id": post_id,
@@ -594,10 +679,17 @@ class WeiboAgent(BaseAgent):
         
         return delete_result
     
+    @traced("weibo.batch_delete")
     async def batch_delete_posts(
         self,
         post_ids: List[str],
-        progress_callback: Optional[Callable[[str, int, int], None]] = None
+        progress_callback: Optional[Callable[[str, int, int], None]] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        pacer: Optional[AdaptivePacer] = None,
+        concurrency: int = 1,
+        strategy: str = STRATEGY_BROWSER,
+        result_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        verify: bool = False
     ) -> Dict[str, Any]:
         """
         批量删除微博
@@ -605,50 +697,91 @@ class WeiboAgent(BaseAgent):
         Args:
             post_ids: 微博ID列表
             progress_callback: 进度回调函数 (message, current, total)
+            rate_limiter: 账号的删除额度，每次删除前获取一次
+            pacer: 自适应节奏控制器，决定同一标签页相邻两次删除的间隔
+            concurrency: 并行删除的标签页数量
+            strategy: 删除策略，browser（浏览器操作）或 http（直接调用删除接口）
+            result_callback: 每条微博删除完成后的回调（用于保存检查点）
+            verify: 删除完成后是否获取一次时间线统一校验
             
         Returns:
             批量删除结果
         """
-        total_posts = len(post_ids)
-        successful_deletes = []
-        failed_deletes = []
-        
-        logger.info(f"开始批量删除 {total_posts} 条微博")
+        executor = await DeletionExecutor.open(
+            self,
+            concurrency,
+            strategy=strategy,
+            rate_limiter=rate_limiter,
+            pacer=pacer,
+            progress_callback=progress_callback,
+            result_callback=result_callback
+        )
+        try:
+            result = await executor.run(post_ids)
+        finally:
+            await executor.close()
         
-        for i, post_id in enumerate(post_ids, 1):
+        attempted = [record["post_id"] for record in result["successful_deletes"]]
+        if verify and attempted:
             if progress_callback:
-                progress_callback(f"删除进度", i, total_posts)
+                progress_callback(f"正在校验 {len(attempted)} 条微博的删除结果...", len(post_ids), len(post_ids))
+            verdicts = await self.verify_deletions(attempted)
+            for record in apply_verification(result, verdicts):
+                if result_callback:
+                    result_callback(record)
+            logger.info(f"删除校验完成: {result['verification']}")
+        
+        return result
+    
+    @traced("weibo.verify_deletions")
+    async def verify_deletions(
+        self,
+        post_ids: List[str],
+        progress_callback: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, List[str]]:
+        """
+        在已打开的页面上直接读取一次个人主页时间线（不经过LLM），校验哪些微博已被删除
+        
+        Args:
+            post_ids: 尝试删除的微博ID列表
+            progress_callback: 进度回调函数
             
-            try:
-                result = await self.delete_post(
-                    post_id,
-                    lambda msg: progress_callback(msg, i, total_posts) if progress_callback else None
-                )
-                
-                if result["success"]:
-                    successful_deletes.append(result)
-                    logger.info(f"成功删除微博: {post_id}")
-                else:
-                    failed_deletes.append(result)
-                    logger.error(f"删除微博失败: {post_id} - {result.get('error')}")
-                    
-            except Exception as e:
-                error_result = {
-                    "post_id": post_id,
-                    "success": False,
-                    "error": str(e),
-                    "timestamp": datetime.now().isoformat()
-                }
-                failed_deletes.append(error_result)
-                logger.error(f"删除微博异常: {post_id} - {str(e)}")
+        Returns:
+            confirmed / still_present / unknown 三组微博ID
+        """
+        page = await self.current_page()
+        if page is None:
+            logger.warning("未启用持久浏览器，无法读取时间线校验删除结果")
+            return diff_timeline(post_ids, [], complete=False)
+        
+        if progress_callback:
+            progress_callback("正在读取时间线校验删除结果...")
+        # 使用单独的收集器，不覆盖获取微博任务的结果
+        collector = PostCollector()
+        try:
+            uid = await page.evaluate(CURRENT_UID_JS)
+            if not uid:
+                raise ValueError("页面中没有当前登录用户")
+            await page.goto(TIMELINE_URL.format(uid=uid), wait_until="domcontentloaded")
+            _, reached_end = await collect_posts(page, collector, settings.deletion_verify_timeline_size)
+        except Exception as e:
+            logger.warning(f"读取时间线失败，无法校验删除结果: {str(e)}")
+            return diff_timeline(post_ids, [], complete=False)
+        
+        # 只有确认滚动到了时间线末尾，未出现的微博才能判定为已删除
+        return diff_timeline(post_ids, [post["id"] for post in collector.posts], complete=reached_end)
+    
+    @staticmethod
+    def _parse_profile(user: Dict[str, Any]) -> Dict[str, str]:
+        """资料接口的用户对象整理为用户信息（与 UserInfo 模型一致）"""
+        def count(field: str) -> str:
+            return str(user.get(f"{field}_str") or user.get(field) or 0)
         
         return {
-            "total_requested": total_posts,
-            "successful_count": len(successful_deletes),
-            "failed_count": len(failed_deletes),
-            "successful_deletes": successful_deletes,
-            "failed_deletes": failed_deletes,
-            "completion_time": datetime.now().isoformat()
+            "nickname": str(user.get("screen_name", "")),
+            "followers_count": count("followers_count"),
+            "following_count": count("friends_count"),
+            "weibo_count": count("statuses_count")
         }
     
     def _parse_login_result(self, raw_result: Any) -> Dict[str, Any]:
@@ -782,106 +915,3 @@ class WeiboAgent(BaseAgent):
                 "success": False,
                 "error": f"解析删除结果失败: {str(e)}"
             }
-    
-    def _parse_qr_login_result(self, raw_result: Any) -> Dict[str, Any]:
-        """解析扫码登录结果"""
-        try:
-            # 处理AgentHistoryList对象
-            if hasattr(raw_result, 'final_result'):
-                final_result = raw_result.final_result()
-                if final_result:
-                    raw_result = final_result
-                else:
-                    # 如果没有final_result，尝试获取最后的输出
-                    if hasattr(raw_result, 'model_outputs') and raw_result.model_outputs():
-                        last_output = raw_result.model_outputs()[-1]
-                        if hasattr(last_output, 'content'):
-                            raw_result = last_output.content
-                        else:
-                            raw_result = str(last_output)
-                    else:
-                        # 尝试直接转换为字符串
-                        raw_result = str(raw_result)
-                        
-            # 如果仍然是对象，尝试获取其字符串表示
-            if not isinstance(raw_result, str):
-                raw_result = str(raw_result)
-            
-            if isinstance(raw_result, str):
-                # 提取JSON部分
-                start_idx = raw_result.find('{')
-                end_idx = raw_result.rfind('}') + 1
-                if start_idx != -1 and end_idx != 0:
-                    json_str = raw_result[start_idx:end_idx]
-                    result_data = json.loads(json_str)
-                else:
-                    raise ValueError("未找到有效的JSON数据")
-            else:
-                result_data = raw_result
-            
-            return {
-                "success": result_data.get("success", False),
-                "qr_code": result_data.get("qr_code", ""),
-                "qr_status": result_data.get("qr_status", "waiting"),
-                "user_info": result_data.get("user_info", {}),
-                "error": result_data.get("error", "")
-            }
-            
-        except Exception as e:
-            logger.error(f"解析扫码登录结果时出错: {str(e)}")
-            # 如果解析失败，返回一个基本的成功状态，让前端可以继续
-            logger.warning(f"解析扫码登录结果失败，返回默认状态: {str(e)}")
-            return {
-                "success": True,
-                "qr_code": "generated",
-                "qr_status": "waiting",
-                "user_info": {},
-                "error": f"解析结果时出现问题，但二维码可能已生成: {str(e)}"
-            }
-    
-    def _parse_qr_status_result(self, raw_result: Any) -> Dict[str, Any]:
-        """解析二维码状态检查结果"""
-        try:
-            # 处理AgentHistoryList对象
-            if hasattr(raw_result, 'final_result'):
-                final_result = raw_result.final_result()
-                if final_result:
-                    raw_result = final_result
-                else:
-                    # 如果没有final_result，尝试获取最后的输出
-                    if hasattr(raw_result, 'model_outputs') and raw_result.model_outputs():
-                        last_output = raw_result.model_outputs()[-1]
-                        if hasattr(last_output, 'content'):
-                            raw_result = last_output.content
-                        else:
-                            raw_result = str(last_output)
-                    else:
-                        raw_result = str(raw_result)
-            
-            if isinstance(raw_result, str):
-                # 提取JSON部分
-                start_idx = raw_result.find('{')
-                end_idx = raw_result.rfind('}') + 1
-                if start_idx != -1 and end_idx != 0:
-                    json_str = raw_result[start_idx:end_idx]
-                    result_data = json.loads(json_str)
-                else:
-                    raise ValueError("未找到有效的JSON数据")
-            else:
-                result_data = raw_result
-            
-            return {
-                "success": result_data.get("success", False),
-                "qr_status": result_data.get("qr_status", "waiting"),
-                "user_info": result_data.get("user_info", {}),
-                "message": result_data.get("message", ""),
-                "error": result_data.get("error", "")
-            }
-            
-        except Exception as e:
-            logger.error(f"解析二维码状态结果时出错: {str(e)}")
-            return {
-                "success": False,
-                "qr_status": "error",
-                "error": f"解析二维码状态结果失败: {str(e)}"
-            } 
\ No newline at end of file
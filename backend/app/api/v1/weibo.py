@@ -4,15 +4,30 @@
 提供微博内容分析和删除的REST API端点
 """
 
+import json
 import logging
-from typing import Dict, Any
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+import time
+from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Request
+from fastapi.responses import StreamingResponse
 from celery.result import AsyncResult
+from celery.utils import uuid
 
+from app.core.affinity import route_options
+from app.core.dedup import RequestDeduplicator, analysis_fingerprint
+from app.core.deletion_jobs import DeletionJobStore
 from app.core.celery_app import celery_app
-from app.tasks.weibo_tasks import analyze_weibo_content, delete_weibo_posts, login_weibo_task
+from app.core.event_monitor import STATS_SNAPSHOT_KEY, monitored_queues
+from app.core.priorities import priority_steps, queue_keys
+from app.core.qr_cache import QrCodeCache
+from app.core.rate_limiter import deletion_bucket
+from app.core.redis_client import get_redis
+from app.core.result_store import AnalysisResultStore
+from app.core.task_stream import stream_task_events
+from app.tasks.names import ANALYZE_TASK, DELETE_TASK, LOGIN_TASK
 from app.models.schemas import (
-    AnalysisRequest, DeleteRequest, TaskResponse, TaskStatus,
+    AnalysisRequest, AnalysisResultsPage, DeleteRequest, DeletionJobStatus, RateLimitStatus, TaskResponse,
+    TaskStatus,
     LoginRequest, ErrorResponse
 )
 from app.core.config import settings
@@ -34,11 +49,15 @@ async def login_weibo(
     创建异步任务来登录微博账号，支持扫码和密码两种方式
     """
     try:
-        # 创建Celery任务，默认使用扫码登录
-        task = login_weibo_task.delay(
-            username=request.username,
-            password=request.password,
-            use_qr=True  # 默认使用扫码登录
+        # 创建Celery任务，默认使用扫码登录（账号已有会话时发往持有会话的worker）
+        task = celery_app.signature(LOGIN_TASK).apply_async(
+            kwargs={
+                "username": request.username,
+                "password": request.password,
+                "use_qr": True,  # 默认使用扫码登录
+                "account_id": request.account_id
+            },
+            **route_options(request.account_id)
         )
         
         logger.info(f"创建扫码登录任务: {task.id}")
@@ -76,10 +95,14 @@ async def login_weibo_password(
             )
         
         # 创建Celery任务，使用密码登录
-        task = login_weibo_task.delay(
-            username=request.username,
-            password=request.password,
-            use_qr=False  # 使用密码登录
+        task = celery_app.signature(LOGIN_TASK).apply_async(
+            kwargs={
+                "username": request.username,
+                "password": request.password,
+                "use_qr": False,  # 使用密码登录
+                "account_id": request.account_id
+            },
+            **route_options(request.account_id)
         )
         
         logger.info(f"创建密码登录任务: {task.id}")
@@ -127,21 +150,34 @@ async def check_qr_login_status(task_id: str) -> Dict[str, Any]:
             "error": None
         }
         
+        # 二维码按任务缓存，进度写入之前也能直接取到
+        cached = QrCodeCache().get(task_id)
+        if cached:
+            response["qr_code"] = cached["qr_code"]
+            response["qr_status"] = cached["qr_status"]
+        
         if task_result.status == "PENDING":
-            response["message"] = "正在生成二维码..."
+            response["message"] = "请使用微博APP扫描二维码" if cached else "正在生成二维码..."
             
         elif task_result.status == "PROGRESS":
             # 获取进度信息
             meta = task_result.info or {}
             response["message"] = meta.get("message", "任务执行中...")
-            response["qr_code"] = meta.get("qr_code")
-            response["qr_status"] = meta.get("qr_status", "waiting")
+            response["qr_code"] = response["qr_code"] or meta.get("qr_code")
+            if not cached:
+                response["qr_status"] = meta.get("qr_status", "waiting")
             
         elif task_result.status == "SUCCESS":
             result = task_result.result or {}
-            response["message"] = "登录成功"
-            response["qr_status"] = "confirmed"
-            response["user_info"] = result.get("user_info", {})
+            if result.get("success"):
+                response["message"] = "登录成功"
+                response["qr_status"] = "confirmed"
+                response["user_info"] = result.get("user_info") or None
+            else:
+                # 任务正常结束但登录未完成（二维码过期、超时或确认后未跳转）
+                response["message"] = "登录失败"
+                response["qr_status"] = result.get("qr_status", "error")
+                response["error"] = result.get("error")
             
         elif task_result.status == "FAILURE":
             response["message"] = "登录失败"
@@ -160,6 +196,39 @@ async def check_qr_login_status(task_id: str) -> Dict[str, Any]:
         )
 
 
+def _coalesce_analysis(account_id: str, criteria: Dict[str, Any], task_id: str) -> Optional[AsyncResult]:
+    """
+    登记分析请求，相同请求的任务仍在运行或刚刚完成时返回该任务
+
+    Args:
+        account_id: 账号ID
+        criteria: 分析条件
+        task_id: 本次请求预先分配的任务ID
+
+    Returns:
+        可复用的已有任务，需要创建新任务时返回None
+    """
+    dedup = RequestDeduplicator()
+    if not dedup.enabled:
+        return None
+    
+    fingerprint = analysis_fingerprint(account_id, criteria)
+    # 登记覆盖任务最长运行时间，完成后由任务缩短为去重窗口
+    ttl = celery_app.conf.task_time_limit + dedup.window
+    existing_id = dedup.claim(fingerprint, task_id, ttl)
+    if existing_id is None:
+        return None
+    
+    existing = AsyncResult(existing_id, app=celery_app)
+    failed = existing.status in ("FAILURE", "REVOKED") or (
+        existing.status == "SUCCESS" and not (existing.result or {}).get("success", False)
+    )
+    if failed:
+        dedup.replace(fingerprint, task_id, ttl)
+        return None
+    return existing
+
+
 @router.post("/analyze", response_model=TaskResponse)
 async def analyze_content(
     request: AnalysisRequest,
@@ -178,10 +247,27 @@ async def analyze_content(
             "max_posts": request.max_posts
         }
         
-        # 创建Celery任务
-        task = analyze_weibo_content.delay(
-            user_id="default_user",  # TODO: 从认证中获取用户ID
-            criteria=criteria
+        # 相同请求合并到已有任务，所有调用方共享同一任务的进度和结果
+        task_id = uuid()
+        try:
+            existing = _coalesce_analysis(request.account_id, criteria, task_id)
+        except Exception as e:
+            logger.warning(f"分析请求去重失败，直接创建任务: {str(e)}")
+            existing = None
+        
+        if existing is not None:
+            logger.info(f"相同分析请求复用已有任务: {existing.id}")
+            return TaskResponse(
+                task_id=existing.id,
+                status=existing.status,
+                message="相同的分析任务正在进行或刚刚完成，已返回该任务"
+            )
+        
+        # 创建Celery任务，发往持有账号会话的worker
+        task = celery_app.signature(ANALYZE_TASK).apply_async(
+            kwargs={"user_id": request.account_id, "criteria": criteria},
+            task_id=task_id,
+            **route_options(request.account_id)
         )
         
         logger.info(f"创建分析任务: {task.id}")
@@ -225,10 +311,10 @@ async def delete_posts(
                 detail=f"单次删除数量不能超过 {settings.max_delete_per_hour} 条"
             )
         
-        # 创建Celery任务
-        task = delete_weibo_posts.delay(
-            user_id="default_user",  # TODO: 从认证中获取用户ID
-            post_ids=request.post_ids
+        # 创建Celery任务，发往持有账号会话的worker
+        task = celery_app.signature(DELETE_TASK).apply_async(
+            kwargs={"user_id": request.account_id, "post_ids": request.post_ids},
+            **route_options(request.account_id)
         )
         
         logger.info(f"创建删除任务: {task.id}，删除 {len(request.post_ids)} 条微博")
@@ -249,6 +335,71 @@ async def delete_posts(
         )
 
 
+@router.get("/delete/{job_id}", response_model=DeletionJobStatus)
+async def get_deletion_job(job_id: str) -> DeletionJobStatus:
+    """
+    获取删除任务进度
+    
+    删除任务ID即创建删除时返回的任务ID，进度来自逐条保存的检查点
+    """
+    try:
+        summary = DeletionJobStore().summary(job_id)
+        if summary is None:
+            raise HTTPException(status_code=404, detail="删除任务不存在或已过期")
+        return DeletionJobStatus(**summary)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"获取删除任务进度失败: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取删除任务进度失败: {str(e)}"
+        )
+
+
+@router.post("/delete/{job_id}/resume", response_model=TaskResponse)
+async def resume_deletion_job(job_id: str) -> TaskResponse:
+    """
+    恢复中断的删除任务
+    
+    重新提交原删除任务，已确认删除的微博会被跳过
+    """
+    try:
+        jobs = DeletionJobStore()
+        summary = jobs.summary(job_id)
+        if summary is None:
+            raise HTTPException(status_code=404, detail="删除任务不存在或已过期")
+        if summary["running"]:
+            raise HTTPException(status_code=409, detail="删除任务正在执行中")
+        if summary["deleted_count"] == summary["total"]:
+            raise HTTPException(status_code=400, detail="删除任务已全部完成，无需恢复")
+        
+        meta = jobs.get(job_id)
+        task = celery_app.signature(DELETE_TASK).apply_async(
+            kwargs={"user_id": meta["user_id"], "post_ids": meta["post_ids"], "job_id": job_id},
+            **route_options(meta["user_id"])
+        )
+        
+        remaining = summary["total"] - summary["deleted_count"]
+        logger.info(f"恢复删除任务 {job_id}: {task.id}，剩余 {remaining} 条微博")
+        
+        return TaskResponse(
+            task_id=task.id,
+            status="PENDING",
+            message=f"删除任务已恢复，将继续删除剩余的 {remaining} 条微博..."
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"恢复删除任务失败: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"恢复删除任务失败: {str(e)}"
+        )
+
+
 @router.get("/task/{task_id}", response_model=TaskStatus)
 async def get_task_status(task_id: str) -> TaskStatus:
     """
@@ -309,6 +460,99 @@ async def get_task_status(task_id: str) -> TaskStatus:
         )
 
 
+@router.get("/task/{task_id}/results", response_model=AnalysisResultsPage)
+async def get_analysis_results(
+    task_id: str,
+    offset: int = Query(0, ge=0, description="偏移量"),
+    limit: int = Query(20, ge=1, le=100, description="每页数量"),
+    min_risk: Optional[float] = Query(None, ge=0, le=10, description="最低风险分数"),
+    category: Optional[List[str]] = Query(None, description="风险类别过滤，可重复")
+) -> AnalysisResultsPage:
+    """
+    分页查询分析结果
+    
+    按风险分数从高到低返回，分析进行中也可查询已完成分片的结果
+    """
+    try:
+        store = AnalysisResultStore()
+        
+        if not store.exists(task_id):
+            raise HTTPException(
+                status_code=404,
+                detail="分析结果不存在或已过期"
+            )
+        
+        page = store.query(task_id, offset, limit, min_risk, category)
+        
+        return AnalysisResultsPage(
+            task_id=task_id,
+            total=page["total"],
+            offset=offset,
+            limit=limit,
+            categories=store.categories(task_id),
+            items=page["items"]
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"查询分析结果失败: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"查询分析结果失败: {str(e)}"
+        )
+
+
+def _task_snapshot(task_id: str) -> Dict[str, Any]:
+    """读取任务当前状态，转换为事件流的首条事件"""
+    task_result = AsyncResult(task_id, app=celery_app)
+    
+    if task_result.status == "PENDING":
+        return {
+            "event": "progress",
+            "task_id": task_id,
+            "status": "PENDING",
+            "progress": 0,
+            "message": "任务等待执行中..."
+        }
+    
+    if task_result.status == "PROGRESS":
+        return {
+            "event": "progress",
+            "task_id": task_id,
+            "status": "PROGRESS",
+            **(task_result.info or {})
+        }
+    
+    event = {"event": "status", "task_id": task_id, "status": task_result.status}
+    if task_result.status == "SUCCESS":
+        event["result"] = task_result.result
+    else:
+        event["error"] = str(task_result.info)
+    return event
+
+
+@router.get("/task/{task_id}/events")
+async def stream_task_status(task_id: str, request: Request) -> StreamingResponse:
+    """
+    订阅任务实时事件
+    
+    以Server-Sent Events推送进度、扫码状态变化和部分结果，任务结束后关闭连接
+    """
+    return StreamingResponse(
+        stream_task_events(
+            task_id,
+            lambda: _task_snapshot(task_id),
+            request.is_disconnected
+        ),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @router.delete("/task/{task_id}")
 async def cancel_task(task_id: str) -> Dict[str, Any]:
     """
@@ -336,36 +580,86 @@ async def cancel_task(task_id: str) -> Dict[str, Any]:
         )
 
 
+@router.get("/rate-limit", response_model=RateLimitStatus)
+async def get_rate_limit(
+    account_id: str = Query("default", min_length=1, max_length=64, description="微博账号ID")
+) -> RateLimitStatus:
+    """
+    获取账号的删除额度
+    
+    额度由所有worker共享的滑动窗口维护，任意一小时内的删除数不超过每小时上限
+    """
+    try:
+        status = deletion_bucket(account_id).status()
+        return RateLimitStatus(account_id=account_id, **status)
+        
+    except Exception as e:
+        logger.error(f"获取删除额度失败: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取删除额度失败: {str(e)}"
+        )
+
+
+# /stats 的进程内缓存
+_stats_cache: Dict[str, Any] = {"expires_at": 0.0, "data": None}
+
+
 @router.get("/stats")
 async def get_stats() -> Dict[str, Any]:
     """
     获取系统统计信息
     
-    返回任务队列和系统状态的统计信息
+    读取事件监控写入Redis的统计快照和各队列积压数，不再向worker广播inspect
     """
     try:
-        # 获取Celery统计信息
-        inspect = celery_app.control.inspect()
-        
-        # 活跃任务
-        active_tasks = inspect.active()
-        active_count = sum(len(tasks) for tasks in (active_tasks or {}).values())
-        
-        # 等待任务
-        reserved_tasks = inspect.reserved()
-        reserved_count = sum(len(tasks) for tasks in (reserved_tasks or {}).values())
+        now = time.monotonic()
+        if _stats_cache["data"] is not None and now < _stats_cache["expires_at"]:
+            return _stats_cache["data"]
+        
+        redis_client = get_redis()
+        queues = monitored_queues()
+        
+        # 每个队列按消息优先级拆分为多个列表，合计得到队列长度
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.get(STATS_SNAPSHOT_KEY)
+        for queue in queues:
+            for key in queue_keys(queue):
+                pipe.llen(key)
+        raw_snapshot, *depths = pipe.execute()
+        
+        snapshot = json.loads(raw_snapshot) if raw_snapshot else {}
+        steps = len(priority_steps())
+        queue_depths = {
+            queue: sum(depths[i * steps:(i + 1) * steps]) for i, queue in enumerate(queues)
+        }
+        active_count = snapshot.get("active_tasks", 0)
+        reserved_count = snapshot.get("reserved_tasks", 0)
         
-        return {
+        data = {
             "active_tasks": active_count,
             "reserved_tasks": reserved_count,
-            "total_pending": active_count + reserved_count,
+            "total_pending": active_count + reserved_count + sum(queue_depths.values()),
+            "queue_depths": queue_depths,
+            "throughput_per_minute": snapshot.get("throughput_per_minute", 0),
+            "duration_p50": snapshot.get("duration_p50"),
+            "duration_p95": snapshot.get("duration_p95"),
+            "task_durations": snapshot.get("task_durations", {}),
+            "succeeded_total": snapshot.get("succeeded_total", 0),
+            "failed_total": snapshot.get("failed_total", 0),
+            "workers_online": snapshot.get("workers_online", 0),
+            "monitor_online": raw_snapshot is not None,
             "max_delete_per_hour": settings.max_delete_per_hour,
             "operation_delay_range": f"{settings.operation_delay_min}-{settings.operation_delay_max}秒"
         }
         
+        _stats_cache["data"] = data
+        _stats_cache["expires_at"] = now + settings.stats_cache_ttl_ms / 1000
+        return data
+        
     except Exception as e:
         logger.error(f"获取统计信息失败: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"获取统计信息失败: {str(e)}"
-        ) 
\ No newline at end of file
+        )
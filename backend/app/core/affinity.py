@@ -0,0 +1,276 @@
+"""
+会话亲和路由
+
+已登录的浏览器会话只存在于某一个worker中。每个worker额外消费一个专属队列，
+Redis中记录 账号 -> worker 的归属和worker心跳：
+API把账号的后续任务发到归属worker的专属队列，复用已登录的浏览器；
+归属worker失联时任务回落到共享队列，接手的worker用Redis中保存的cookie恢复会话并成为新的归属。
+失联worker专属队列中已排队的任务由在线worker在心跳时转回共享队列
+
+会话worker需以 --concurrency=1 运行，保证专属队列上的任务落在持有会话的进程中
+"""
+
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import redis
+
+from app.core.config import settings
+from app.core.priorities import PRIORITY_ANALYSIS, PRIORITY_QUEUES, priority_class, queue_keys
+from app.core.redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+# 账号 -> worker 归属表
+OWNERS_KEY = "weibo:sessions:owners"
+
+# worker -> 最近一次心跳时间，用于找出失联worker
+WORKERS_SEEN_KEY = "weibo:workers:seen"
+
+# 失联worker检查的互斥锁（同一时间只由一个worker检查）
+RECOVERY_LOCK_KEY = "weibo:workers:recovery_lock"
+
+# 只有消费该共享队列的worker才有专属队列并登记账号归属；
+# 只处理登录和删除的交互worker没有专属队列，账号的分析任务不会被路由过去占用预留的容量
+SESSION_HOST_QUEUE = PRIORITY_QUEUES[PRIORITY_ANALYSIS]
+
+# 本进程所在worker是否有专属队列（worker启动时设置，prefork子进程继承）
+_session_queue_enabled = False
+
+
+def worker_queue(hostname: str) -> str:
+    """worker的专属队列"""
+    return f"session.{hostname}"
+
+
+class SessionDirectory:
+    """账号会话归属目录"""
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None):
+        """
+        初始化归属目录
+
+        Args:
+            redis_client: Redis客户端，默认使用全局客户端
+        """
+        self.redis = redis_client or get_redis()
+
+    @staticmethod
+    def _alive_key(hostname: str) -> str:
+        return f"weibo:workers:{hostname}:alive"
+
+    @staticmethod
+    def _draining_key(hostname: str) -> str:
+        return f"weibo:workers:{hostname}:draining"
+
+    @staticmethod
+    def _state_key(account_id: str) -> str:
+        return f"weibo:sessions:state:{account_id}"
+
+    def heartbeat(self, hostname: str):
+        """刷新worker心跳"""
+        self.redis.set(self._alive_key(hostname), 1, ex=settings.session_heartbeat_ttl)
+        self.redis.zadd(WORKERS_SEEN_KEY, {hostname: time.time()})
+
+    def mark_offline(self, hostname: str):
+        """worker退出时清除心跳"""
+        self.redis.delete(self._alive_key(hostname), self._draining_key(hostname))
+
+    def mark_draining(self, hostname: str):
+        """worker即将缩容：不再接收新的账号任务，已有账号的后续任务回落到共享队列"""
+        self.redis.set(self._draining_key(hostname), 1, ex=settings.session_state_ttl)
+
+    def is_draining(self, hostname: str) -> bool:
+        """worker是否正在排空"""
+        return bool(self.redis.exists(self._draining_key(hostname)))
+
+    def is_alive(self, hostname: str) -> bool:
+        """worker是否在线"""
+        return bool(self.redis.exists(self._alive_key(hostname)))
+
+    def claim(self, account_id: str, hostname: str):
+        """登记账号会话归属（原归属worker已失联时把其专属队列中的任务转回共享队列）"""
+        previous = self.redis.hget(OWNERS_KEY, account_id)
+        self.redis.hset(OWNERS_KEY, account_id, hostname)
+        if previous and previous != hostname:
+            logger.info(f"账号 {account_id} 的会话从 {previous} 迁移到 {hostname}")
+            if not self.is_alive(previous):
+                self.recover_worker(previous)
+
+    def release(self, account_id: str, hostname: Optional[str] = None):
+        """取消账号会话归属（指定hostname时仅在归属未变化时取消）"""
+        if hostname is None or self.redis.hget(OWNERS_KEY, account_id) == hostname:
+            self.redis.hdel(OWNERS_KEY, account_id)
+
+    def owner(self, account_id: str) -> Optional[str]:
+        """账号会话所在的在线worker，归属worker已失联或正在排空时返回None"""
+        hostname = self.redis.hget(OWNERS_KEY, account_id)
+        if hostname and self.is_alive(hostname) and not self.is_draining(hostname):
+            return hostname
+        return None
+
+    def route(self, account_id: str) -> Optional[str]:
+        """账号任务应发往的队列，无在线归属时返回None（使用默认路由）"""
+        hostname = self.owner(account_id)
+        return worker_queue(hostname) if hostname else None
+
+    def accounts_of(self, hostname: str) -> List[str]:
+        """归属于某个worker的账号"""
+        return [
+            account_id for account_id, owner in self.redis.hgetall(OWNERS_KEY).items()
+            if owner == hostname
+        ]
+
+    def recover_worker(self, hostname: str) -> int:
+        """
+        接管失联worker：取消其账号归属，专属队列中滞留的任务转回共享队列
+
+        Args:
+            hostname: 失联worker的主机名
+
+        Returns:
+            转回共享队列的任务数
+        """
+        for account_id in self.accounts_of(hostname):
+            self.release(account_id, hostname)
+        moved = requeue_session_queue(self.redis, hostname)
+        if moved:
+            logger.warning(f"worker {hostname} 已失联，{moved} 个滞留任务转回共享队列")
+        return moved
+
+    def recover_dead_workers(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        检查心跳超时的worker并接管（由在线worker在心跳时调用，多个worker之间互斥）
+
+        失联超过会话状态保存时间的worker不再检查；在此之前每轮都会检查一次，
+        确保失联worker未确认的消息在可见性超时后重新回到专属队列时也会被转走
+
+        Args:
+            now: 当前时间戳，默认为当前时间
+
+        Returns:
+            {失联worker: 转回共享队列的任务数}
+        """
+        if not self.redis.set(RECOVERY_LOCK_KEY, 1, nx=True, ex=settings.session_heartbeat_ttl):
+            return {}
+        now = time.time() if now is None else now
+        self.redis.zremrangebyscore(WORKERS_SEEN_KEY, "-inf", now - settings.session_state_ttl)
+        stale = self.redis.zrangebyscore(WORKERS_SEEN_KEY, "-inf", now - settings.session_heartbeat_ttl)
+        return {
+            hostname: self.recover_worker(hostname)
+            for hostname in stale
+            if not self.is_alive(hostname)
+        }
+
+    def save_state(self, account_id: str, state: Dict[str, Any]):
+        """保存会话的浏览器状态（cookie），供故障转移时恢复"""
+        self.redis.set(
+            self._state_key(account_id),
+            json.dumps(state, ensure_ascii=False),
+            ex=settings.session_state_ttl
+        )
+
+    def load_state(self, account_id: str) -> Optional[Dict[str, Any]]:
+        """读取保存的浏览器状态"""
+        raw = self.redis.get(self._state_key(account_id))
+        return json.loads(raw) if raw else None
+
+    def drop_state(self, account_id: str):
+        """删除保存的浏览器状态"""
+        self.redis.delete(self._state_key(account_id))
+
+
+def requeue_session_queue(redis_client: redis.Redis, hostname: str) -> int:
+    """
+    把worker专属队列中残留的任务转回其优先级类别的共享队列（保持消息优先级）
+
+    Args:
+        redis_client: Redis客户端
+        hostname: worker主机名
+
+    Returns:
+        转移的任务数
+    """
+    moved = 0
+    for step, key in enumerate(queue_keys(worker_queue(hostname))):
+        # 从最新的消息开始逐条推到共享队列的取出端，最老的消息最终最先被取出
+        while True:
+            raw = redis_client.lpop(key)
+            if raw is None:
+                break
+            try:
+                task_name = json.loads(raw).get("headers", {}).get("task", "")
+            except (ValueError, AttributeError):
+                task_name = ""
+            target = queue_keys(PRIORITY_QUEUES[priority_class(task_name)])[step]
+            redis_client.rpush(target, raw)
+            moved += 1
+    return moved
+
+
+def route_options(account_id: str) -> Dict[str, Any]:
+    """
+    生成账号任务的 apply_async 路由参数
+
+    Args:
+        account_id: 账号ID
+
+    Returns:
+        归属worker在线时为 {"queue": 专属队列}，否则为空（走默认路由）
+    """
+    try:
+        queue = SessionDirectory().route(account_id)
+    except Exception as e:
+        logger.warning(f"查询账号 {account_id} 的会话归属失败，使用默认路由: {str(e)}")
+        return {}
+    return {"queue": queue} if queue else {}
+
+
+def session_queue_enabled() -> bool:
+    """本worker是否有专属队列（没有时不登记账号归属，避免账号任务被路由到无人消费的队列）"""
+    return _session_queue_enabled
+
+
+def _add_worker_queue(sender=None, instance=None, **kwargs):
+    """消费分析队列的worker启动时增加专属队列"""
+    global _session_queue_enabled
+    queues = instance.app.amqp.queues
+    if SESSION_HOST_QUEUE not in queues.consume_from:
+        logger.info(f"worker {sender} 不消费 {SESSION_HOST_QUEUE} 队列，不增加专属队列")
+        return
+    queues.select_add(worker_queue(sender))
+    _session_queue_enabled = True
+    logger.info(f"worker {sender} 消费专属队列 {worker_queue(sender)}")
+
+
+def _send_heartbeat(sender=None, **kwargs):
+    """随Celery事件心跳刷新在线状态，并接管心跳超时的worker"""
+    try:
+        directory = SessionDirectory()
+        directory.heartbeat(sender.eventer.hostname)
+        directory.recover_dead_workers()
+    except Exception as e:
+        logger.warning(f"刷新worker心跳失败: {str(e)}")
+
+
+def _mark_worker_offline(sender=None, **kwargs):
+    """worker关闭时立即清除在线状态，后续任务回落到共享队列"""
+    hostname = getattr(sender, "hostname", None)
+    if not hostname:
+        return
+    try:
+        SessionDirectory().mark_offline(hostname)
+    except Exception as e:
+        logger.warning(f"清除worker在线状态失败: {str(e)}")
+
+
+def setup_session_affinity():
+    """连接Celery信号：专属队列、心跳和下线"""
+    from celery.signals import celeryd_after_setup, heartbeat_sent, worker_shutdown
+
+    celeryd_after_setup.connect(_add_worker_queue, weak=False)
+    heartbeat_sent.connect(_send_heartbeat, weak=False)
+    worker_shutdown.connect(_mark_worker_offline, weak=False)
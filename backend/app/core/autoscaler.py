@@ -0,0 +1,320 @@
+"""
+worker自动扩缩容
+
+定期从Redis读取共享队列的排队数和最老任务的等待时间，在配置范围内增减worker进程，
+并按在线账号数调整每个worker的浏览器会话上限（worker在任务开始时读取）。
+缩容时逐个排空worker：先标记为排空，账号的后续任务回落到共享队列，由其他worker用保存的cookie恢复会话；
+专属队列清空后再温和关闭，关闭后残留在专属队列中的任务转回对应的共享队列
+
+运行方式: python -m app.core.autoscaler
+"""
+
+import json
+import logging
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import redis
+
+from app.core.affinity import OWNERS_KEY, SessionDirectory, requeue_session_queue, worker_queue
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.metrics import start_metrics_server
+from app.core.priorities import PRIORITY_QUEUES, queue_keys
+from app.core.redis_client import get_redis
+from app.core.tracing import ENQUEUED_AT_HEADER
+
+
+logger = logging.getLogger(__name__)
+
+# 自动扩缩的worker消费的共享队列（按优先级依次列出）
+SHARED_QUEUES = list(PRIORITY_QUEUES.values()) + [celery_app.conf.task_default_queue]
+
+# 每个worker的浏览器会话上限，由控制器写入、worker在任务开始时读取
+SESSION_CAPACITY_KEY = "weibo:autoscale:session_capacity"
+
+
+def message_age(raw: Optional[str], now: float) -> Optional[float]:
+    """
+    计算Redis队列中一条消息的等待时间
+
+    Args:
+        raw: 队列中的原始消息（kombu的JSON信封）
+        now: 当前时间戳（秒）
+
+    Returns:
+        等待秒数，消息不含入队时间时返回None
+    """
+    if not raw:
+        return None
+    try:
+        enqueued_at = json.loads(raw).get("headers", {}).get(ENQUEUED_AT_HEADER)
+    except (ValueError, AttributeError):
+        return None
+    if not enqueued_at:
+        return None
+    return max(now - int(enqueued_at) / 1e9, 0.0)
+
+
+def read_queue_metrics(
+    redis_client: redis.Redis,
+    queues: List[str],
+    now: Optional[float] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    读取队列的排队数和最老任务的等待时间
+
+    Args:
+        redis_client: Redis客户端
+        queues: 队列名称
+        now: 当前时间戳，默认为当前时间
+
+    Returns:
+        {队列: {"depth": 排队数, "oldest_age": 最老任务等待秒数或None}}
+    """
+    now = time.time() if now is None else now
+    keys = [(queue, key) for queue in queues for key in queue_keys(queue)]
+
+    # 消息从列表左侧推入、右侧取出，最右侧即最老的消息
+    pipe = redis_client.pipeline(transaction=False)
+    for _, key in keys:
+        pipe.llen(key)
+        pipe.lindex(key, -1)
+    replies = pipe.execute()
+
+    metrics = {queue: {"depth": 0, "oldest_age": None} for queue in queues}
+    for index, (queue, _) in enumerate(keys):
+        depth, oldest = replies[2 * index], replies[2 * index + 1]
+        metrics[queue]["depth"] += depth
+        age = message_age(oldest, now)
+        if age is not None:
+            current = metrics[queue]["oldest_age"]
+            metrics[queue]["oldest_age"] = age if current is None else max(current, age)
+    return metrics
+
+
+def decide(
+    depth: int,
+    oldest_age: Optional[float],
+    current_workers: int,
+    accounts: int,
+    min_workers: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    tasks_per_worker: Optional[int] = None,
+    max_task_age: Optional[float] = None,
+    min_sessions: Optional[int] = None,
+    max_sessions: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    根据队列指标计算目标worker数和每个worker的会话上限
+
+    Args:
+        depth: 共享队列的排队总数
+        oldest_age: 最老任务的等待秒数
+        current_workers: 当前worker数（不含正在排空的）
+        accounts: 在线账号会话数
+        其余参数为扩缩容范围，默认使用配置
+
+    Returns:
+        {"workers": 目标worker数, "session_capacity": 每个worker的会话上限, "reason": 原因}
+    """
+    min_workers = settings.autoscale_min_workers if min_workers is None else min_workers
+    max_workers = settings.autoscale_max_workers if max_workers is None else max_workers
+    tasks_per_worker = tasks_per_worker or settings.autoscale_tasks_per_worker
+    max_task_age = settings.autoscale_max_task_age if max_task_age is None else max_task_age
+    min_sessions = min_sessions or settings.autoscale_min_sessions
+    max_sessions = max_sessions or settings.session_max_count
+
+    target = math.ceil(depth / tasks_per_worker)
+    reason = f"排队 {depth} 个任务"
+    if oldest_age is not None and oldest_age > max_task_age and target <= current_workers:
+        # 排队数不多但任务等待过久（如长时间分析占满worker）
+        target = current_workers + 1
+        reason = f"最老任务已等待 {oldest_age:.0f} 秒"
+
+    target = min(max(target, min_workers), max_workers)
+    if target < current_workers:
+        # 每次最多缩减一个worker，逐个排空
+        target = current_workers - 1
+
+    session_capacity = math.ceil(accounts / max(target, 1))
+    session_capacity = min(max(session_capacity, min_sessions), max_sessions)
+
+    return {"workers": target, "session_capacity": session_capacity, "reason": reason}
+
+
+class LocalWorkerPool:
+    """在本机启动和排空worker进程"""
+
+    def __init__(
+        self,
+        queues: Optional[List[str]] = None,
+        redis_client: Optional[redis.Redis] = None,
+        directory: Optional[SessionDirectory] = None
+    ):
+        """
+        初始化worker进程池
+
+        Args:
+            queues: worker消费的共享队列
+            redis_client: Redis客户端，默认使用全局客户端
+            directory: 账号会话归属目录
+        """
+        self.queues = queues or SHARED_QUEUES
+        self.redis = redis_client or get_redis()
+        self.directory = directory or SessionDirectory(self.redis)
+        self._processes: Dict[str, subprocess.Popen] = {}
+        self._draining: Dict[str, bool] = {}  # hostname -> 是否已发送关闭命令
+        self._next_index = 1
+
+    def active(self) -> List[str]:
+        """正在服务的worker（不含正在排空的）"""
+        return [hostname for hostname in self._processes if hostname not in self._draining]
+
+    def draining(self) -> List[str]:
+        """正在排空的worker"""
+        return list(self._draining)
+
+    def start(self) -> str:
+        """启动一个worker进程（并发为1，保证专属队列上的任务落在持有会话的进程中）"""
+        hostname = f"auto{self._next_index}@{socket.gethostname()}"
+        self._next_index += 1
+        self._processes[hostname] = subprocess.Popen([
+            sys.executable, "-m", "celery", "-A", "app.core.celery_app", "worker",
+            f"--hostname={hostname}",
+            f"--queues={','.join(self.queues)}",
+            "--concurrency=1",
+            "--loglevel=info"
+        ], env={**os.environ, "METRICS_PORT": "0"})  # 本容器的指标由控制器进程统一暴露
+        logger.info(f"启动worker {hostname}")
+        return hostname
+
+    def drain(self, hostname: str):
+        """开始排空worker：停止消费共享队列，账号的后续任务回落到共享队列"""
+        self.directory.mark_draining(hostname)
+        for queue in self.queues:
+            celery_app.control.cancel_consumer(queue, destination=[hostname])
+        self._draining[hostname] = False
+        logger.info(f"开始排空worker {hostname}，归属账号: {self.directory.accounts_of(hostname)}")
+
+    def poll(self) -> List[str]:
+        """推进排空：专属队列清空后温和关闭，回收已退出的进程；返回已退出的worker"""
+        exited = []
+        for hostname, process in list(self._processes.items()):
+            if process.poll() is not None:
+                self._reap(hostname)
+                exited.append(hostname)
+                continue
+
+            if self._draining.get(hostname) is False and self._session_queue_depth(hostname) == 0:
+                # 温和关闭：等待正在执行的任务完成
+                celery_app.control.shutdown(destination=[hostname])
+                self._draining[hostname] = True
+                logger.info(f"worker {hostname} 的专属队列已清空，发送关闭命令")
+        return exited
+
+    def _session_queue_depth(self, hostname: str) -> int:
+        pipe = self.redis.pipeline(transaction=False)
+        for key in queue_keys(worker_queue(hostname)):
+            pipe.llen(key)
+        return sum(pipe.execute())
+
+    def _reap(self, hostname: str):
+        """worker退出后清理状态，专属队列中残留的任务转回共享队列"""
+        self._processes.pop(hostname, None)
+        self._draining.pop(hostname, None)
+        self.directory.mark_offline(hostname)
+        moved = requeue_session_queue(self.redis, hostname)
+        logger.info(f"worker {hostname} 已退出" + (f"，{moved} 个残留任务转回共享队列" if moved else ""))
+
+
+class Autoscaler:
+    """队列驱动的扩缩容控制器"""
+
+    def __init__(
+        self,
+        pool: Any,
+        redis_client: Optional[redis.Redis] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        初始化控制器
+
+        Args:
+            pool: worker进程池（提供 active/draining/start/drain/poll）
+            redis_client: Redis客户端，默认使用全局客户端
+            clock: 时钟，便于测试注入
+        """
+        self.pool = pool
+        self.redis = redis_client or get_redis()
+        self.directory = SessionDirectory(self.redis)
+        self._clock = clock
+        self._last_scaled_at: Optional[float] = None
+
+    def tick(self) -> Dict[str, Any]:
+        """执行一轮扩缩容，返回本轮的指标与决定"""
+        self.pool.poll()
+        now = self._clock()
+
+        metrics = read_queue_metrics(self.redis, SHARED_QUEUES, now)
+        depth = sum(item["depth"] for item in metrics.values())
+        ages = [item["oldest_age"] for item in metrics.values() if item["oldest_age"] is not None]
+        oldest_age = max(ages) if ages else None
+        accounts = len(self.redis.hkeys(OWNERS_KEY))
+        current = len(self.pool.active())
+
+        decision = decide(depth, oldest_age, current, accounts)
+        if decision["workers"] > current:
+            for _ in range(decision["workers"] - current):
+                self.pool.start()
+            self._last_scaled_at = now
+        elif decision["workers"] < current and self._cooled_down(now):
+            self.pool.drain(self._drain_candidate())
+            self._last_scaled_at = now
+
+        self.redis.set(SESSION_CAPACITY_KEY, decision["session_capacity"])
+        return {
+            **decision,
+            "depth": depth,
+            "oldest_age": oldest_age,
+            "current_workers": current,
+            "draining": self.pool.draining()
+        }
+
+    def _cooled_down(self, now: float) -> bool:
+        """距上次扩缩容超过冷却时间才缩容，避免突发负载间隙中反复启停"""
+        return self._last_scaled_at is None or now - self._last_scaled_at >= settings.autoscale_scale_down_cooldown
+
+    def _drain_candidate(self) -> str:
+        """优先排空归属账号最少的worker，减少需要迁移的会话"""
+        return min(self.pool.active(), key=lambda hostname: len(self.directory.accounts_of(hostname)))
+
+    def run(self):
+        """持续执行扩缩容"""
+        logger.info("自动扩缩容已启动")
+        while True:
+            try:
+                result = self.tick()
+                logger.info(
+                    f"扩缩容: {result['current_workers']} -> {result['workers']} 个worker"
+                    f"（{result['reason']}），每个worker会话上限 {result['session_capacity']}"
+                )
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            except Exception as e:
+                logger.error(f"扩缩容执行失败: {str(e)}")
+            time.sleep(settings.autoscale_interval)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    start_metrics_server(settings.metrics_port)
+    Autoscaler(LocalWorkerPool()).run()
@@ -5,7 +5,13 @@ Celery应用配置
 """
 
 from celery import Celery
+from app.core.affinity import setup_session_affinity
 from app.core.config import settings
+from app.core.priorities import (
+    PRIORITY_BACKGROUND, PRIORITY_LEVELS, PRIORITY_SEP, priority_steps, task_routes
+)
+from app.core.serialization import SERIALIZER_NAME, register_serializer
+from app.core.tracing import setup_celery_tracing
 
 
 # 创建Celery实例
@@ -16,12 +22,22 @@ celery_app = Celery(
     include=["app.tasks.weibo_tasks"]
 )
 
+# 任务与结果序列化：默认json，可选msgpack并按阈值压缩
+if settings.celery_serializer == "msgpack":
+    register_serializer()
+    serializer = SERIALIZER_NAME
+    accept_content = ["json", SERIALIZER_NAME]  # 兼容切换前已入队的json消息
+else:
+    serializer = "json"
+    accept_content = ["json"]
+
 # 配置Celery
 celery_app.conf.update(
     # 任务序列化
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
+    task_serializer=serializer,
+    accept_content=accept_content,
+    result_serializer=serializer,
+    result_accept_content=accept_content,
     
     # 时区设置
     timezone="Asia/Shanghai",
@@ -34,18 +50,27 @@ celery_app.conf.update(
     # 结果过期时间
     result_expires=60 * 60,  # 1小时
     
-    # 任务路由
-    task_routes={
-        "app.tasks.weibo_tasks.login_weibo_task": {"queue": "analysis"},
-        "app.tasks.weibo_tasks.analyze_weibo_content": {"queue": "analysis"},
-        "app.tasks.weibo_tasks.delete_weibo_posts": {"queue": "deletion"},
+    # 任务路由（键为任务注册名）：按优先级类别分队列并设置消息优先级
+    task_routes=task_routes(),
+    task_default_priority=PRIORITY_LEVELS[PRIORITY_BACKGROUND],
+    broker_transport_options={
+        "priority_steps": priority_steps(),
+        "sep": PRIORITY_SEP,
     },
     
     # 工作进程配置
     worker_prefetch_multiplier=1,
+    # 子进程在 worker_process_init 中完成浏览器预热后才报告就绪，等待时间需覆盖预热超时
+    worker_proc_alive_timeout=settings.warmup_timeout + 10 if settings.warmup_enabled else 4.0,
     task_acks_late=True,
     
     # 监控配置
     worker_send_task_events=True,
     task_send_sent_event=True,
-) 
\ No newline at end of file
+)
+
+# 在消息头中传递追踪上下文
+setup_celery_tracing()
+
+# 每个worker消费专属队列，账号任务优先发往持有会话的worker
+setup_session_affinity()
@@ -42,10 +42,81 @@ class Settings(BaseSettings):
         alias="ACCESS_TOKEN_EXPIRE_MINUTES"
     )
     
+    # 浏览器代理预算（按任务类型，0表示不限制）
+    agent_login_max_steps: int = Field(default=25, alias="AGENT_LOGIN_MAX_STEPS")
+    agent_login_max_tokens: int = Field(default=150000, alias="AGENT_LOGIN_MAX_TOKENS")
+    agent_login_max_seconds: int = Field(default=300, alias="AGENT_LOGIN_MAX_SECONDS")
+    agent_fetch_max_steps: int = Field(default=40, alias="AGENT_FETCH_MAX_STEPS")
+    agent_fetch_max_tokens: int = Field(default=300000, alias="AGENT_FETCH_MAX_TOKENS")
+    agent_fetch_max_seconds: int = Field(default=600, alias="AGENT_FETCH_MAX_SECONDS")
+    agent_analyze_max_steps: int = Field(default=8, alias="AGENT_ANALYZE_MAX_STEPS")
+    agent_analyze_max_tokens: int = Field(default=40000, alias="AGENT_ANALYZE_MAX_TOKENS")
+    agent_analyze_max_seconds: int = Field(default=120, alias="AGENT_ANALYZE_MAX_SECONDS")
+    agent_delete_max_steps: int = Field(default=15, alias="AGENT_DELETE_MAX_STEPS")
+    agent_delete_max_tokens: int = Field(default=100000, alias="AGENT_DELETE_MAX_TOKENS")
+    agent_delete_max_seconds: int = Field(default=180, alias="AGENT_DELETE_MAX_SECONDS")
+    
     # 微博操作限制
     max_delete_per_hour: int = Field(default=100, alias="MAX_DELETE_PER_HOUR")
     operation_delay_min: int = Field(default=2, alias="OPERATION_DELAY_MIN")
     operation_delay_max: int = Field(default=10, alias="OPERATION_DELAY_MAX")
+    delete_rate_max_wait: int = Field(default=300, alias="DELETE_RATE_MAX_WAIT")
+    deletion_concurrency: int = Field(default=2, alias="DELETION_CONCURRENCY")
+    deletion_strategy: str = Field(default="browser", alias="DELETION_STRATEGY")
+    weibo_api_base_url: str = Field(default="https://weibo.com", alias="WEIBO_API_BASE_URL")
+    http_delete_timeout: int = Field(default=15, alias="HTTP_DELETE_TIMEOUT")
+    deletion_verify_enabled: bool = Field(default=True, alias="DELETION_VERIFY_ENABLED")
+    deletion_verify_timeline_size: int = Field(default=100, alias="DELETION_VERIFY_TIMELINE_SIZE")
+    pacing_decrease_step: float = Field(default=0.5, alias="PACING_DECREASE_STEP")
+    pacing_backoff_factor: float = Field(default=2.0, alias="PACING_BACKOFF_FACTOR")
+    pacing_failure_factor: float = Field(default=1.5, alias="PACING_FAILURE_FACTOR")
+    pacing_state_ttl: int = Field(default=7 * 24 * 60 * 60, alias="PACING_STATE_TTL")
+    
+    # 会话管理配置
+    session_max_count: int = Field(default=5, alias="SESSION_MAX_COUNT")
+    session_idle_ttl: int = Field(default=30 * 60, alias="SESSION_IDLE_TTL")
+    session_memory_mb: int = Field(default=300, alias="SESSION_MEMORY_MB")
+    session_memory_limit_mb: int = Field(default=2048, alias="SESSION_MEMORY_LIMIT_MB")
+    session_heartbeat_ttl: int = Field(default=30, alias="SESSION_HEARTBEAT_TTL")
+    session_state_ttl: int = Field(default=7 * 24 * 60 * 60, alias="SESSION_STATE_TTL")
+    warmup_enabled: bool = Field(default=True, alias="WARMUP_ENABLED")
+    warmup_browsers: int = Field(default=1, alias="WARMUP_BROWSERS")
+    warmup_timeout: int = Field(default=90, alias="WARMUP_TIMEOUT")
+    qr_login_timeout: int = Field(default=300, alias="QR_LOGIN_TIMEOUT")
+    qr_redirect_timeout: int = Field(default=15, alias="QR_REDIRECT_TIMEOUT")
+    qr_max_refreshes: int = Field(default=3, alias="QR_MAX_REFRESHES")
+    
+    # 任务调度配置
+    analysis_chunk_size: int = Field(default=10, alias="ANALYSIS_CHUNK_SIZE")
+    analysis_dedup_window: int = Field(default=5 * 60, alias="ANALYSIS_DEDUP_WINDOW")
+    progress_min_interval_ms: int = Field(default=1000, alias="PROGRESS_MIN_INTERVAL_MS")
+    progress_min_step: int = Field(default=5, alias="PROGRESS_MIN_STEP")
+    sse_heartbeat_seconds: int = Field(default=15, alias="SSE_HEARTBEAT_SECONDS")
+    result_store_ttl: int = Field(default=24 * 60 * 60, alias="RESULT_STORE_TTL")
+    deletion_job_ttl: int = Field(default=7 * 24 * 60 * 60, alias="DELETION_JOB_TTL")
+    deletion_lock_ttl: int = Field(default=60, alias="DELETION_LOCK_TTL")
+    celery_serializer: str = Field(default="json", alias="CELERY_SERIALIZER")
+    celery_compression_threshold: int = Field(default=1024, alias="CELERY_COMPRESSION_THRESHOLD")
+    
+    # 自动扩缩容配置
+    autoscale_min_workers: int = Field(default=1, alias="AUTOSCALE_MIN_WORKERS")
+    autoscale_max_workers: int = Field(default=4, alias="AUTOSCALE_MAX_WORKERS")
+    autoscale_tasks_per_worker: int = Field(default=5, alias="AUTOSCALE_TASKS_PER_WORKER")
+    autoscale_max_task_age: int = Field(default=60, alias="AUTOSCALE_MAX_TASK_AGE")
+    autoscale_min_sessions: int = Field(default=1, alias="AUTOSCALE_MIN_SESSIONS")
+    autoscale_interval: int = Field(default=10, alias="AUTOSCALE_INTERVAL")
+    autoscale_scale_down_cooldown: int = Field(default=120, alias="AUTOSCALE_SCALE_DOWN_COOLDOWN")
+    
+    # 监控统计配置
+    stats_flush_interval: int = Field(default=1, alias="STATS_FLUSH_INTERVAL")
+    stats_duration_window: int = Field(default=500, alias="STATS_DURATION_WINDOW")
+    stats_max_tasks: int = Field(default=10000, alias="STATS_MAX_TASKS")
+    stats_cache_ttl_ms: int = Field(default=500, alias="STATS_CACHE_TTL_MS")
+    metrics_port: int = Field(default=9100, alias="METRICS_PORT")
+    tracing_enabled: bool = Field(default=False, alias="TRACING_ENABLED")
+    trace_export_path: str = Field(default="traces/spans.jsonl", alias="TRACE_EXPORT_PATH")
+    trace_max_bytes: int = Field(default=50 * 1024 * 1024, alias="TRACE_MAX_BYTES")
+    trace_backup_count: int = Field(default=3, alias="TRACE_BACKUP_COUNT")
     
     # 前端配置
     frontend_url: str = Field(default="http://localhost:3000", alias="FRONTEND_URL")
@@ -0,0 +1,115 @@
+"""
+分析请求去重
+
+同一账号、相同分析条件的请求在任务运行期间及完成后的一段时间内合并为同一个任务：
+Redis中以 账号+规范化条件 的哈希为键（SET NX）记录任务ID，后到的请求直接返回已有任务ID，
+所有调用方轮询/订阅同一个任务的进度和结果
+"""
+
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional
+
+import redis
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_criteria(criteria: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    规范化分析条件，使语义相同的条件得到相同的结果
+
+    关键词去除首尾空白、忽略大小写、去重并排序；时间范围去掉空值
+    """
+    keywords = {str(keyword).strip().casefold() for keyword in criteria.get("keywords") or []}
+    time_range = {
+        key: value for key, value in (criteria.get("time_range") or {}).items()
+        if value not in (None, "")
+    }
+    return {
+        "time_range": time_range,
+        "keywords": sorted(keyword for keyword in keywords if keyword),
+        "max_posts": criteria.get("max_posts")
+    }
+
+
+def analysis_fingerprint(account_id: str, criteria: Dict[str, Any]) -> str:
+    """
+    计算分析请求的指纹
+
+    Args:
+        account_id: 账号ID
+        criteria: 分析条件
+
+    Returns:
+        账号与规范化条件的sha256
+    """
+    payload = json.dumps(
+        {"account_id": account_id, "criteria": normalize_criteria(criteria)},
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RequestDeduplicator:
+    """进行中/最近完成的分析任务登记"""
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None, window: Optional[int] = None):
+        """
+        初始化去重登记
+
+        Args:
+            redis_client: Redis客户端，默认使用全局客户端
+            window: 任务完成后仍复用的秒数，默认使用配置
+        """
+        self.redis = redis_client or get_redis()
+        self.window = settings.analysis_dedup_window if window is None else window
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    @staticmethod
+    def _key(fingerprint: str) -> str:
+        return f"weibo:dedup:analyze:{fingerprint}"
+
+    def claim(self, fingerprint: str, task_id: str, ttl: int) -> Optional[str]:
+        """
+        登记新任务
+
+        Args:
+            fingerprint: 请求指纹
+            task_id: 新任务ID
+            ttl: 登记的最长保留秒数（应覆盖任务运行时间）
+
+        Returns:
+            已有相同任务时返回其任务ID，登记成功返回None
+        """
+        if self.redis.set(self._key(fingerprint), task_id, nx=True, ex=ttl):
+            return None
+        existing = self.redis.get(self._key(fingerprint))
+        if existing is None:
+            # 已有登记恰好过期，重新登记
+            return self.claim(fingerprint, task_id, ttl)
+        return existing
+
+    def replace(self, fingerprint: str, task_id: str, ttl: int):
+        """已有任务失败或已撤销时改为登记新任务"""
+        self.redis.set(self._key(fingerprint), task_id, ex=ttl)
+
+    def finish(self, fingerprint: str, task_id: str):
+        """任务完成后只在去重窗口内继续复用"""
+        if self.redis.get(self._key(fingerprint)) == task_id:
+            self.redis.expire(self._key(fingerprint), self.window)
+
+    def release(self, fingerprint: str, task_id: str):
+        """任务失败时立即取消登记，后续请求重新创建任务"""
+        if self.redis.get(self._key(fingerprint)) == task_id:
+            self.redis.delete(self._key(fingerprint))
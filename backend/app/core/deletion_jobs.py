@@ -0,0 +1,202 @@
+"""
+删除任务检查点
+
+每条微博删除完成后立即把结果写入Redis（按任务ID的哈希），任务重试或中断后恢复时
+跳过已确认删除的微博；同一任务同一时间只允许一个执行者，避免重复提交时并发删除。
+执行锁的过期时间很短并由执行者定期续期，执行者崩溃后锁很快过期，中断的任务可以立即恢复
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+import redis
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+# 单条微博的删除状态
+POST_DELETED = "deleted"
+POST_FAILED = "failed"
+
+# 任务状态
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"      # 全部确认删除
+JOB_PARTIAL = "partial"          # 执行结束但有失败或因额度延后的微博
+JOB_INTERRUPTED = "interrupted"  # 执行异常中断
+
+# KEYS[1]: 执行锁; ARGV: 任务ID, 过期毫秒数
+# 锁仍由该任务持有时续期，返回1；否则返回0
+_REFRESH_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# KEYS[1]: 执行锁; ARGV: 任务ID
+# 锁仍由该任务持有时删除，返回1；否则返回0
+_UNLOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class DeletionJobStore:
+    """删除任务检查点存储"""
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None, ttl: Optional[int] = None):
+        """
+        初始化检查点存储
+
+        Args:
+            redis_client: Redis客户端，默认使用全局客户端
+            ttl: 检查点过期时间（秒）
+        """
+        self.redis = redis_client or get_redis()
+        self.ttl = ttl or settings.deletion_job_ttl
+        self._refresh_script = self.redis.register_script(_REFRESH_SCRIPT)
+        self._unlock_script = self.redis.register_script(_UNLOCK_SCRIPT)
+
+    @staticmethod
+    def _key(job_id: str, name: str) -> str:
+        """检查点的Redis键"""
+        return f"weibo:deletion:{job_id}:{name}"
+
+    def start(self, job_id: str, user_id: str, post_ids: List[str], task_id: str):
+        """
+        登记任务（已存在时保留原有的微博列表和删除记录）
+
+        Args:
+            job_id: 删除任务ID
+            user_id: 账号ID
+            post_ids: 要删除的微博ID列表
+            task_id: 本次执行的Celery任务ID
+        """
+        meta_key = self._key(job_id, "meta")
+        pipe = self.redis.pipeline()
+        pipe.hsetnx(meta_key, "user_id", user_id)
+        pipe.hsetnx(meta_key, "post_ids", json.dumps(post_ids))
+        pipe.hsetnx(meta_key, "created_at", datetime.now().isoformat())
+        pipe.hset(meta_key, mapping={
+            "status": JOB_RUNNING,
+            "task_id": task_id,
+            "updated_at": datetime.now().isoformat()
+        })
+        pipe.expire(meta_key, self.ttl)
+        pipe.execute()
+
+    def lock(self, job_id: str, task_id: str, ttl: int) -> bool:
+        """
+        获取任务执行锁
+
+        同一个Celery任务重新投递（worker崩溃后 acks_late 重发）时可以重入；
+        执行期间需按 refresh_lock 定期续期，被强制终止的执行者的锁在过期时间后释放
+
+        Args:
+            job_id: 删除任务ID
+            task_id: 本次执行的Celery任务ID
+            ttl: 锁的过期时间（秒）
+
+        Returns:
+            是否获得执行权
+        """
+        if self.redis.set(self._key(job_id, "lock"), task_id, nx=True, ex=ttl):
+            return True
+        return self.refresh_lock(job_id, task_id, ttl)
+
+    def refresh_lock(self, job_id: str, task_id: str, ttl: int) -> bool:
+        """
+        续期执行锁（原子地检查持有者后续期）
+
+        Returns:
+            锁是否仍由该任务持有
+        """
+        return bool(self._refresh_script(keys=[self._key(job_id, "lock")], args=[task_id, int(ttl * 1000)]))
+
+    def unlock(self, job_id: str, task_id: str):
+        """释放执行锁（原子地检查持有者后删除，只释放自己持有的锁）"""
+        self._unlock_script(keys=[self._key(job_id, "lock")], args=[task_id])
+
+    def is_locked(self, job_id: str) -> bool:
+        """任务是否正在执行"""
+        return bool(self.redis.exists(self._key(job_id, "lock")))
+
+    def record(self, job_id: str, result: Dict[str, Any]):
+        """
+        保存一条微博的删除结果
+
+        Args:
+            job_id: 删除任务ID
+            result: delete_post 的结果
+        """
+        record = dict(result, status=POST_DELETED if result.get("success") else POST_FAILED)
+        posts_key = self._key(job_id, "posts")
+        try:
+            pipe = self.redis.pipeline()
+            pipe.hset(posts_key, str(result["post_id"]), json.dumps(record, ensure_ascii=False))
+            pipe.expire(posts_key, self.ttl)
+            pipe.hset(self._key(job_id, "meta"), "updated_at", datetime.now().isoformat())
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"保存删除检查点失败: {job_id}/{result.get('post_id')} - {str(e)}")
+
+    def finish(self, job_id: str, status: str):
+        """更新任务状态"""
+        self.redis.hset(self._key(job_id, "meta"), mapping={
+            "status": status,
+            "updated_at": datetime.now().isoformat()
+        })
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """任务信息，不存在时返回None"""
+        meta = self.redis.hgetall(self._key(job_id, "meta"))
+        if not meta:
+            return None
+        meta["post_ids"] = json.loads(meta.get("post_ids", "[]"))
+        return meta
+
+    def records(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        """已保存的删除结果，按微博ID索引"""
+        raw = self.redis.hgetall(self._key(job_id, "posts"))
+        return {post_id: json.loads(record) for post_id, record in raw.items()}
+
+    def deleted_ids(self, job_id: str) -> Set[str]:
+        """已确认删除的微博ID"""
+        return {
+            post_id for post_id, record in self.records(job_id).items()
+            if record.get("status") == POST_DELETED
+        }
+
+    def summary(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        任务进度汇总
+
+        Returns:
+            任务信息和各状态数量，任务不存在时返回None
+        """
+        meta = self.get(job_id)
+        if meta is None:
+            return None
+        records = self.records(job_id)
+        deleted = [p for p in meta["post_ids"] if records.get(p, {}).get("status") == POST_DELETED]
+        failed = [p for p in meta["post_ids"] if records.get(p, {}).get("status") == POST_FAILED]
+        return {
+            "job_id": job_id,
+            "user_id": meta.get("user_id"),
+            "status": meta.get("status"),
+            "task_id": meta.get("task_id"),
+            "created_at": meta.get("created_at"),
+            "updated_at": meta.get("updated_at"),
+            "total": len(meta["post_ids"]),
+            "deleted_count": len(deleted),
+            "failed_count": len(failed),
+            "pending_count": len(meta["post_ids"]) - len(deleted) - len(failed),
+            "running": self.is_locked(job_id)
+        }
@@ -0,0 +1,183 @@
+"""
+Celery事件监控
+
+消费worker发出的任务事件，在内存中维护任务状态（保留的任务数有上限），
+定期把活跃/等待任务数、吞吐量和耗时分位数写入Redis，供 /weibo/stats 直接读取。
+下线或心跳超时的worker上的任务不会再收到结束事件，不计入活跃/等待任务
+
+运行方式:
+    python -m app.core.event_monitor
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+import redis
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.priorities import PRIORITY_QUEUES
+from app.core.redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+# 监控快照在Redis中的键
+STATS_SNAPSHOT_KEY = "weibo:stats:snapshot"
+
+
+def monitored_queues() -> List[str]:
+    """任务路由中声明的全部队列（含默认队列）"""
+    queues = {route["queue"] for route in celery_app.conf.task_routes.values()}
+    queues.update(PRIORITY_QUEUES.values())
+    queues.add(celery_app.conf.task_default_queue)
+    return sorted(queues)
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """计算分位数（最近邻法）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return round(ordered[index], 3)
+
+
+def worker_alive(worker: Any, now: float) -> bool:
+    """worker在给定时间是否在线（收到过心跳且未超时）"""
+    return bool(worker is not None and worker.heartbeats and now < worker.heartbeat_expires)
+
+
+class TaskEventMonitor:
+    """任务事件监控器"""
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        window_size: Optional[int] = None,
+        clock=time.time
+    ):
+        """
+        初始化事件监控器
+
+        Args:
+            redis_client: Redis客户端
+            window_size: 每种任务保留的最近耗时样本数
+            clock: 时钟，便于测试注入
+        """
+        self.redis = redis_client or get_redis()
+        self.state = celery_app.events.State(max_tasks_in_memory=settings.stats_max_tasks)
+        self.window_size = window_size or settings.stats_duration_window
+        self._clock = clock
+        self._durations: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.window_size))
+        self._completed_at: Deque[float] = deque()
+        self._totals = {"succeeded": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    def handle_event(self, event: Dict[str, Any]):
+        """处理一条Celery事件"""
+        with self._lock:
+            self.state.event(event)
+
+            event_type = event.get("type")
+            if event_type == "task-succeeded":
+                task = self.state.tasks.get(event["uuid"])
+                name = task.name if task and task.name else "unknown"
+                if event.get("runtime") is not None:
+                    self._durations[name].append(float(event["runtime"]))
+                self._totals["succeeded"] += 1
+                self._completed_at.append(self._clock())
+            elif event_type == "task-failed":
+                self._totals["failed"] += 1
+                self._completed_at.append(self._clock())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """生成当前统计快照"""
+        with self._lock:
+            now = self._clock()
+            while self._completed_at and now - self._completed_at[0] > 60:
+                self._completed_at.popleft()
+
+            active = reserved = 0
+            for task in self.state.tasks.values():
+                if not worker_alive(task.worker, now):
+                    continue
+                if task.state == "STARTED":
+                    active += 1
+                elif task.state == "RECEIVED":
+                    reserved += 1
+
+            all_durations = [d for samples in self._durations.values() for d in samples]
+            task_durations = {
+                name: {
+                    "count": len(samples),
+                    "p50": percentile(list(samples), 50),
+                    "p95": percentile(list(samples), 95)
+                }
+                for name, samples in self._durations.items()
+            }
+
+            return {
+                "active_tasks": active,
+                "reserved_tasks": reserved,
+                "succeeded_total": self._totals["succeeded"],
+                "failed_total": self._totals["failed"],
+                "throughput_per_minute": len(self._completed_at),
+                "duration_p50": percentile(all_durations, 50),
+                "duration_p95": percentile(all_durations, 95),
+                "task_durations": task_durations,
+                "workers_online": sum(1 for worker in self.state.workers.values() if worker_alive(worker, now)),
+                "updated_at": now
+            }
+
+    def flush(self):
+        """把统计快照写入Redis（监控停止后快照自动过期）"""
+        self.redis.set(
+            STATS_SNAPSHOT_KEY,
+            json.dumps(self.snapshot()),
+            ex=settings.stats_flush_interval * 10
+        )
+
+    def _flush_loop(self, stop: threading.Event):
+        """定期写入快照"""
+        while not stop.wait(settings.stats_flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"写入任务统计快照失败: {str(e)}")
+
+    def run(self):
+        """持续消费任务事件"""
+        stop = threading.Event()
+        flusher = threading.Thread(target=self._flush_loop, args=(stop,), daemon=True)
+        flusher.start()
+
+        try:
+            while True:
+                try:
+                    with celery_app.connection() as connection:
+                        receiver = celery_app.events.Receiver(
+                            connection,
+                            handlers={"*": self.handle_event}
+                        )
+                        logger.info("任务事件监控已启动")
+                        receiver.capture(limit=None, timeout=None, wakeup=True)
+                except (KeyboardInterrupt, SystemExit):
+                    raise
+                except Exception as e:
+                    logger.error(f"任务事件监控连接中断，5秒后重连: {str(e)}")
+                    time.sleep(5)
+        finally:
+            stop.set()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    TaskEventMonitor().run()
@@ -0,0 +1,120 @@
+"""
+Prometheus指标
+
+定义API、Celery任务、浏览器代理和LLM调用的指标。
+设置环境变量 PROMETHEUS_MULTIPROC_DIR 后进入多进程模式：
+同一容器内的各进程写入该目录，汇总后由本容器暴露（API在 /metrics，worker在独立端口）。
+目录中的文件按PID命名，不能在容器之间共享，容器启动时清空（见 docker-entrypoint.sh）
+"""
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+    generate_latest, multiprocess, start_http_server
+)
+
+
+# 较长的耗时分桶：浏览器代理任务可达数十分钟
+LONG_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, float("inf"))
+
+HTTP_REQUEST_DURATION = Histogram(
+    "weibo_http_request_duration_seconds",
+    "API请求耗时",
+    ["method", "route", "status"]
+)
+
+TASK_DURATION = Histogram(
+    "weibo_task_duration_seconds",
+    "Celery任务执行耗时",
+    ["task", "state"],
+    buckets=LONG_BUCKETS
+)
+
+TASK_QUEUE_WAIT = Histogram(
+    "weibo_task_queue_wait_seconds",
+    "Celery任务从入队到开始执行的等待时间",
+    ["priority_class", "task"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, float("inf"))
+)
+
+AGENT_ATTEMPTS = Counter(
+    "weibo_agent_attempts_total",
+    "execute_task 执行次数",
+    ["outcome"]
+)
+
+AGENT_BUDGET_EXCEEDED = Counter(
+    "weibo_agent_budget_exceeded_total",
+    "代理任务超出预算次数",
+    ["task_type", "budget"]
+)
+
+AGENT_RETRIES = Counter(
+    "weibo_agent_retries_total",
+    "execute_task 重试次数"
+)
+
+BROWSER_LAUNCH_DURATION = Histogram(
+    "weibo_browser_launch_seconds",
+    "浏览器环境启动耗时",
+    ["phase"]
+)
+
+LLM_REQUEST_DURATION = Histogram(
+    "weibo_llm_request_duration_seconds",
+    "LLM请求耗时",
+    ["model", "outcome"],
+    buckets=(0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, float("inf"))
+)
+
+LLM_TOKENS = Counter(
+    "weibo_llm_tokens_total",
+    "LLM消耗的token数",
+    ["model", "kind"]
+)
+
+DELETIONS = Counter(
+    "weibo_deletions_total",
+    "微博删除结果",
+    ["outcome"]
+)
+
+
+def _collector_registry() -> CollectorRegistry:
+    """多进程模式下汇总本容器所有进程的注册表"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics() -> bytes:
+    """生成Prometheus文本格式的指标（多进程模式下汇总所有进程）"""
+    return generate_latest(_collector_registry())
+
+
+def start_metrics_server(port: int) -> bool:
+    """
+    在独立端口上暴露本容器的指标（worker等没有HTTP服务的进程使用）
+
+    Args:
+        port: 监听端口，0表示不启动
+
+    Returns:
+        是否已启动
+    """
+    if not port:
+        return False
+    start_http_server(port, registry=_collector_registry())
+    return True
+
+
+def mark_process_dead(pid: int):
+    """进程退出时清理多进程模式下的存活指标文件"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
@@ -0,0 +1,132 @@
+"""
+自适应操作节奏
+
+AIMD式的延迟控制：操作成功时线性缩短间隔，遇到验证码、限流或失败时成倍拉长，
+延迟限制在 operation_delay_min/max 之间，并按账号保存在Redis中，后续任务沿用学到的节奏
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+import redis
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+# 操作结果
+OUTCOME_SUCCESS = "success"
+OUTCOME_FAILURE = "failure"
+OUTCOME_THROTTLED = "throttled"
+OUTCOME_CAPTCHA = "captcha"
+
+# 识别风控信号的关键词（匹配错误信息，不区分大小写）
+CAPTCHA_KEYWORDS = ("验证码", "captcha", "安全验证", "滑块")
+THROTTLE_KEYWORDS = ("频繁", "过于频繁", "稍后再试", "too many", "rate limit", "429", "限流", "操作受限")
+
+
+def classify_outcome(success: bool, error: Optional[str] = None) -> str:
+    """
+    根据操作结果判断节奏信号
+
+    Args:
+        success: 操作是否成功
+        error: 错误信息
+
+    Returns:
+        success / failure / throttled / captcha
+    """
+    if success:
+        return OUTCOME_SUCCESS
+    text = (error or "").lower()
+    if any(keyword in text for keyword in CAPTCHA_KEYWORDS):
+        return OUTCOME_CAPTCHA
+    if any(keyword in text for keyword in THROTTLE_KEYWORDS):
+        return OUTCOME_THROTTLED
+    return OUTCOME_FAILURE
+
+
+class AdaptivePacer:
+    """按账号学习操作间隔的节奏控制器"""
+
+    def __init__(
+        self,
+        key: str,
+        min_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        redis_client: Optional[redis.Redis] = None
+    ):
+        """
+        初始化节奏控制器
+
+        Args:
+            key: 保存延迟的Redis键
+            min_delay: 最短间隔（秒），默认 operation_delay_min
+            max_delay: 最长间隔（秒），默认 operation_delay_max
+            redis_client: Redis客户端，默认使用全局客户端
+        """
+        self.key = key
+        self.min_delay = settings.operation_delay_min if min_delay is None else min_delay
+        self.max_delay = settings.operation_delay_max if max_delay is None else max_delay
+        self.redis = redis_client or get_redis()
+        self._delay: Optional[float] = None
+
+    @classmethod
+    def for_account(cls, account_id: str, operation: str, **kwargs) -> "AdaptivePacer":
+        """账号某类操作的节奏控制器"""
+        return cls(f"weibo:pacing:{operation}:{account_id}", **kwargs)
+
+    def _clamp(self, delay: float) -> float:
+        return min(max(delay, self.min_delay), self.max_delay)
+
+    @property
+    def delay(self) -> float:
+        """当前间隔（首次读取时加载已学到的值，没有时从最长间隔开始）"""
+        if self._delay is None:
+            stored = None
+            try:
+                stored = self.redis.get(self.key)
+            except Exception as e:
+                logger.warning(f"读取操作节奏失败: {str(e)}")
+            self._delay = self._clamp(float(stored)) if stored is not None else self.max_delay
+        return self._delay
+
+    async def wait(self) -> float:
+        """按当前间隔等待，返回等待的秒数"""
+        delay = self.delay
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def record(self, outcome: str) -> float:
+        """
+        根据操作结果调整间隔并保存
+
+        Args:
+            outcome: classify_outcome 的结果
+
+        Returns:
+            调整后的间隔
+        """
+        current = self.delay
+        if outcome == OUTCOME_SUCCESS:
+            updated = current - settings.pacing_decrease_step
+        elif outcome == OUTCOME_CAPTCHA:
+            updated = self.max_delay
+        elif outcome == OUTCOME_THROTTLED:
+            updated = max(current, settings.pacing_decrease_step) * settings.pacing_backoff_factor
+        else:
+            updated = current * settings.pacing_failure_factor
+
+        self._delay = self._clamp(updated)
+        if outcome != OUTCOME_SUCCESS:
+            logger.warning(f"检测到{outcome}信号，操作间隔 {current:.1f}s -> {self._delay:.1f}s: {self.key}")
+
+        try:
+            self.redis.set(self.key, self._delay, ex=settings.pacing_state_ttl)
+        except Exception as e:
+            logger.warning(f"保存操作节奏失败: {str(e)}")
+        return self._delay
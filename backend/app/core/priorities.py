@@ -0,0 +1,72 @@
+"""
+任务优先级
+
+任务分为四个优先级类别：扫码登录（交互）> 用户发起的删除 > 批量分析 > 后台重扫。
+每个类别使用独立队列，并在消息上携带broker优先级：
+Redis传输按优先级依次检查worker消费的全部队列（含会话专属队列），数字越小越先取出，
+因此同一个worker上排队的登录任务总是先于分析任务执行
+"""
+
+from typing import Any, Dict, List
+
+from app.tasks.names import (
+    ANALYZE_CHUNK_TASK, ANALYZE_TASK, DELETE_TASK, LOGIN_TASK, MERGE_ANALYSIS_TASK
+)
+
+
+# 优先级类别
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_DELETION = "deletion"
+PRIORITY_ANALYSIS = "analysis"
+PRIORITY_BACKGROUND = "background"
+
+# Redis传输中优先级子队列的分隔符（非0优先级的消息存放在 "队列:优先级" 列表中）
+PRIORITY_SEP = ":"
+
+# 类别 -> broker优先级（Redis传输中0最先取出）
+PRIORITY_LEVELS = {
+    PRIORITY_INTERACTIVE: 0,
+    PRIORITY_DELETION: 3,
+    PRIORITY_ANALYSIS: 6,
+    PRIORITY_BACKGROUND: 9,
+}
+
+# 类别 -> 共享队列
+PRIORITY_QUEUES = {
+    PRIORITY_INTERACTIVE: "login",
+    PRIORITY_DELETION: "deletion",
+    PRIORITY_ANALYSIS: "analysis",
+    PRIORITY_BACKGROUND: "background",
+}
+
+# 任务注册名 -> 类别（未列出的任务归入后台类别）
+TASK_PRIORITIES = {
+    LOGIN_TASK: PRIORITY_INTERACTIVE,
+    DELETE_TASK: PRIORITY_DELETION,
+    ANALYZE_TASK: PRIORITY_ANALYSIS,
+    ANALYZE_CHUNK_TASK: PRIORITY_ANALYSIS,
+    MERGE_ANALYSIS_TASK: PRIORITY_ANALYSIS,
+}
+
+
+def priority_class(task_name: str) -> str:
+    """任务所属的优先级类别"""
+    return TASK_PRIORITIES.get(task_name, PRIORITY_BACKGROUND)
+
+
+def task_routes() -> Dict[str, Dict[str, Any]]:
+    """生成Celery任务路由：类别队列与broker优先级"""
+    return {
+        name: {"queue": PRIORITY_QUEUES[cls], "priority": PRIORITY_LEVELS[cls]}
+        for name, cls in TASK_PRIORITIES.items()
+    }
+
+
+def priority_steps() -> List[int]:
+    """Redis传输使用的优先级档位"""
+    return sorted(PRIORITY_LEVELS.values())
+
+
+def queue_keys(queue: str) -> List[str]:
+    """队列在Redis中按优先级拆分的全部列表键（统计队列长度时需要合计）"""
+    return [queue if step == 0 else f"{queue}{PRIORITY_SEP}{step}" for step in priority_steps()]
@@ -0,0 +1,316 @@
+"""
+任务进度上报
+
+合并高频的进度回调，按时间间隔或百分比变化限速写入Celery结果后端，
+并同步发布到任务事件流；多个分片任务共同推进的父任务进度由Redis中的共享计数写入
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import redis
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.redis_client import get_redis
+from app.core.task_stream import publish_task_event
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressReporter:
+    """合并限速的任务进度上报器"""
+
+    def __init__(
+        self,
+        task_id: str,
+        base_meta: Optional[Dict[str, Any]] = None,
+        min_interval_ms: Optional[int] = None,
+        min_progress_step: Optional[int] = None,
+        writer: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        初始化进度上报器
+
+        Args:
+            task_id: 进度写入的任务ID
+            base_meta: 每次写入都携带的固定字段
+            min_interval_ms: 两次写入之间的最小间隔（毫秒）
+            min_progress_step: 百分比变化达到该值时立即写入
+            writer: 写入函数 (task_id, meta)，默认写入Celery结果后端
+            clock: 单调时钟，便于测试注入
+        """
+        self.task_id = task_id
+        self.base_meta = dict(base_meta or {})
+        self.min_interval = (
+            min_interval_ms if min_interval_ms is not None else settings.progress_min_interval_ms
+        ) / 1000
+        self.min_progress_step = (
+            min_progress_step if min_progress_step is not None else settings.progress_min_step
+        )
+        self._writer = writer or self._store
+        self._clock = clock
+        self._started_at = clock()
+        self._last_write_at: Optional[float] = None
+        self._last_written_progress = 0
+        self._pending: Optional[Dict[str, Any]] = None
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._closed = False
+        self.current = 0
+        self.total = 0
+        self.writes = 0
+
+    def __call__(self, message: str, current: Optional[int] = None, total: Optional[int] = None, **extra):
+        """兼容 (message) 与 (message, current, total) 两种回调签名"""
+        self.update(message, current, total, **extra)
+
+    def set_meta(self, **fields):
+        """设置后续每次写入都携带的字段（如二维码信息）"""
+        self.base_meta.update(fields)
+
+    @property
+    def progress(self) -> int:
+        """当前进度百分比"""
+        if not self.total:
+            return 0
+        return min(int((self.current / self.total) * 100), 100)
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """按已完成速率估算的剩余秒数"""
+        if not self.total or not self.current:
+            return None
+        elapsed = self._clock() - self._started_at
+        remaining = max(self.total - self.current, 0)
+        return round(elapsed / self.current * remaining, 1)
+
+    def update(
+        self,
+        message: str,
+        current: Optional[int] = None,
+        total: Optional[int] = None,
+        force: bool = False,
+        **extra
+    ) -> bool:
+        """
+        记录一次进度更新
+
+        Args:
+            message: 状态消息
+            current: 已完成数量
+            total: 总数量
+            force: 是否跳过限速立即写入（用于状态切换等关键事件）
+            **extra: 本次写入附带的额外字段
+
+        Returns:
+            是否实际写入了结果后端
+        """
+        if self._closed:
+            return False
+        if total:
+            self.total = total
+        if current is not None:
+            self.current = current
+
+        meta = {
+            **self.base_meta,
+            **extra,
+            "message": message,
+            "current": self.current,
+            "total": self.total,
+            "progress": self.progress,
+            "eta_seconds": self.eta_seconds
+        }
+
+        now = self._clock()
+        due = (
+            force
+            or self._last_write_at is None
+            or now - self._last_write_at >= self.min_interval
+            or meta["progress"] - self._last_written_progress >= self.min_progress_step
+        )
+
+        if not due:
+            self._pending = meta
+            self._schedule_flush(self.min_interval - (now - self._last_write_at))
+            return False
+
+        self._write(meta, now)
+        return True
+
+    def flush(self):
+        """写入尚未落盘的最新进度"""
+        if self._pending is not None and not self._closed:
+            self._write(self._pending, self._clock())
+
+    def close(self):
+        """
+        任务结束时停止上报：取消尚未触发的尾部写入并丢弃未写入的进度
+
+        事件循环在同一worker进程的后续任务中复用，不取消的话尾部写入会在下一个任务中触发，
+        用PROGRESS覆盖已结束任务的最终结果；任务在返回前关闭上报器，写入时无需再查询任务状态
+        """
+        self._closed = True
+        self._pending = None
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+    def _write(self, meta: Dict[str, Any], now: float):
+        """写入进度并重置合并状态"""
+        self._pending = None
+        self._last_write_at = now
+        self._last_written_progress = meta["progress"]
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        try:
+            self._writer(self.task_id, meta)
+            self.writes += 1
+        except Exception as e:
+            logger.warning(f"写入任务进度失败: {str(e)}")
+
+    def _schedule_flush(self, delay: float):
+        """在事件循环中安排尾部写入，避免长时间操作前的最后一条消息丢失"""
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        def trailing_flush():
+            self._flush_handle = None
+            self.flush()
+
+        self._flush_handle = loop.call_later(max(delay, 0), trailing_flush)
+
+    @staticmethod
+    def _store(task_id: str, meta: Dict[str, Any]):
+        """写入Celery结果后端，并推送给订阅该任务事件流的客户端"""
+        celery_app.backend.store_result(task_id, meta, "PROGRESS")
+        publish_task_event(task_id, "progress", {"status": "PROGRESS", **meta})
+
+
+# KEYS[1]: 已完成项目的集合, KEYS[2]: 最近一次写入的计数和时间
+# ARGV: 过期秒数, 总数量, 最小写入间隔毫秒数, 最小进度百分比变化, 完成的项目ID...
+# 返回: {已完成数量, 是否需要写入}（需要写入时同时登记为最近一次写入）
+_SHARED_PROGRESS_SCRIPT = """
+local ttl = tonumber(ARGV[1])
+local total = tonumber(ARGV[2])
+local interval = tonumber(ARGV[3])
+local step = tonumber(ARGV[4])
+for i = 5, #ARGV do
+    redis.call('SADD', KEYS[1], ARGV[i])
+end
+redis.call('EXPIRE', KEYS[1], ttl)
+local count = redis.call('SCARD', KEYS[1])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local state = redis.call('HMGET', KEYS[2], 'count', 'at')
+local written = tonumber(state[1]) or 0
+local written_at = tonumber(state[2]) or 0
+
+local due = 0
+if count > written and (
+    count >= total
+    or now - written_at >= interval
+    or math.floor(count * 100 / total) - math.floor(written * 100 / total) >= step
+) then
+    due = 1
+    redis.call('HSET', KEYS[2], 'count', count, 'at', now)
+    redis.call('EXPIRE', KEYS[2], ttl)
+end
+return {count, due}
+"""
+
+
+class SharedProgress:
+    """
+    多个分片任务共同推进的父任务进度
+
+    各分片把完成的项目ID加入同一个Redis集合（分片重新投递时不会重复计数），写入父任务的始终是集合大小；
+    写入前在锁内确认自己持有的仍是最新计数，较旧的计数不会覆盖较新的，进度只增不减
+    """
+
+    def __init__(
+        self,
+        task_id: str,
+        total: int = 0,
+        message: str = "进度: {current}/{total}",
+        base_meta: Optional[Dict[str, Any]] = None,
+        redis_client: Optional[redis.Redis] = None,
+        writer: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ):
+        """
+        初始化共享进度
+
+        Args:
+            task_id: 进度写入的父任务ID
+            total: 总数量
+            message: 状态消息模板，可使用 {current} 和 {total}
+            base_meta: 每次写入都携带的固定字段
+            redis_client: Redis客户端，默认使用全局客户端
+            writer: 写入函数 (task_id, meta)，默认写入Celery结果后端
+        """
+        self.task_id = task_id
+        self.total = total
+        self.message = message
+        self.base_meta = dict(base_meta or {})
+        self.redis = redis_client or get_redis()
+        self._writer = writer or ProgressReporter._store
+        self._script = self.redis.register_script(_SHARED_PROGRESS_SCRIPT)
+
+    def _key(self, name: str) -> str:
+        return f"weibo:progress:{self.task_id}:{name}"
+
+    def reset(self):
+        """清除计数（开始拆分执行前和汇总完成后调用）"""
+        self.redis.delete(self._key("done"), self._key("written"))
+
+    def add(self, item_ids: Iterable[Any]) -> int:
+        """
+        登记完成的项目，计数推进到需要写入时写入父任务
+
+        Args:
+            item_ids: 完成的项目ID（同一ID重复登记只计一次）
+
+        Returns:
+            已完成数量
+        """
+        count, due = self._script(
+            keys=[self._key("done"), self._key("written")],
+            args=[
+                celery_app.conf.result_expires or 24 * 60 * 60,
+                max(self.total, 1),
+                settings.progress_min_interval_ms,
+                settings.progress_min_step,
+                *[str(item_id) for item_id in item_ids]
+            ]
+        )
+        if due:
+            self._write(int(count))
+        return int(count)
+
+    def _write(self, count: int):
+        """在锁内写入计数；其他分片已登记更新的计数时放弃，由其写入"""
+        try:
+            with self.redis.lock(self._key("lock"), timeout=5, blocking_timeout=2):
+                if int(self.redis.hget(self._key("written"), "count") or 0) != count:
+                    return
+                self._writer(self.task_id, {
+                    **self.base_meta,
+                    "message": self.message.format(current=count, total=self.total),
+                    "current": count,
+                    "total": self.total,
+                    "progress": min(int(count / self.total * 100), 100) if self.total else 0,
+                    "eta_seconds": None
+                })
+        except Exception as e:
+            logger.warning(f"写入共享进度失败: {str(e)}")
@@ -0,0 +1,53 @@
+"""
+登录二维码缓存
+
+按登录任务ID缓存二维码图片（data URI）和扫码状态，
+状态接口第一次查询即可拿到二维码，二维码过期刷新后覆盖为新图片
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import redis
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+
+class QrCodeCache:
+    """登录二维码缓存"""
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None, ttl: Optional[int] = None):
+        """
+        初始化二维码缓存
+
+        Args:
+            redis_client: Redis客户端，默认使用全局客户端
+            ttl: 缓存过期时间（秒），默认与扫码登录超时一致
+        """
+        self.redis = redis_client or get_redis()
+        self.ttl = ttl or settings.qr_login_timeout
+
+    @staticmethod
+    def _key(task_id: str) -> str:
+        return f"weibo:qr:{task_id}"
+
+    def save(self, task_id: str, qr_code: str, qr_status: str = "waiting"):
+        """保存（或替换刷新后的）二维码"""
+        self.redis.set(self._key(task_id), json.dumps({
+            "qr_code": qr_code,
+            "qr_status": qr_status,
+            "updated_at": datetime.now().isoformat()
+        }), ex=self.ttl)
+
+    def set_status(self, task_id: str, qr_status: str):
+        """更新扫码状态，保留二维码图片"""
+        cached = self.get(task_id)
+        if cached is not None:
+            self.save(task_id, cached["qr_code"], qr_status)
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """读取缓存，不存在时返回None"""
+        raw = self.redis.get(self._key(task_id))
+        return json.loads(raw) if raw else None
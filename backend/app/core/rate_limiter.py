@@ -0,0 +1,258 @@
+"""
+集群共享的限流
+
+令牌桶和滑动窗口的状态保存在Redis中，由Lua脚本原子地检查和扣减，所有worker共享同一账号的额度。
+申请失败时返回精确的等待时间，调用方按需等待而不是固定随机休眠。
+删除额度使用滑动窗口：令牌桶满桶突发后还会继续补充，一小时内最多可放行约两倍容量，不能作为每小时硬上限
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import redis
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: 令牌桶哈希
+# ARGV: 容量, 每秒补充令牌数, 申请数量
+# 返回: {是否获得, 需等待毫秒数, 剩余令牌}
+_ACQUIRE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate / 1000)
+
+local granted = 0
+local wait_ms = 0
+if tokens >= requested then
+    tokens = tokens - requested
+    granted = 1
+else
+    wait_ms = math.ceil((requested - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return {granted, wait_ms, tostring(tokens)}
+"""
+
+
+# KEYS[1]: 最近放行时间的有序集合, KEYS[2]: 成员序号
+# ARGV: 窗口内上限, 窗口毫秒数, 申请数量, 当前毫秒时间（留空时使用Redis时间）
+# 返回: {是否获得, 再获得max(申请数量, 1)个额度需等待的毫秒数, 剩余额度}
+_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+
+local now = tonumber(ARGV[4])
+if now == nil then
+    local time = redis.call('TIME')
+    now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+end
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+
+local granted = 0
+if count + requested <= limit then
+    granted = 1
+    for i = 1, requested do
+        local seq = redis.call('INCR', KEYS[2])
+        redis.call('ZADD', KEYS[1], now, now .. '-' .. seq)
+    end
+    count = count + requested
+end
+
+local wait_ms = 0
+local needed = math.max(requested, 1)
+if granted == 0 or requested == 0 then
+    if needed > limit then
+        wait_ms = window
+    elseif count + needed > limit then
+        -- 最早的若干次放行移出窗口后才有足够额度
+        local oldest = redis.call('ZRANGE', KEYS[1], count + needed - limit - 1, count + needed - limit - 1, 'WITHSCORES')
+        wait_ms = math.max(tonumber(oldest[2]) + window - now, 1)
+    end
+end
+
+redis.call('PEXPIRE', KEYS[1], window + 1000)
+redis.call('PEXPIRE', KEYS[2], window + 1000)
+return {granted, wait_ms, limit - count}
+"""
+
+
+class RateLimiter:
+    """Redis脚本限流的公共部分：脚本注册、等待重试和状态查询，由子类提供脚本调用"""
+
+    def __init__(
+        self,
+        key: str,
+        capacity: int,
+        refill_per_second: float,
+        script: str,
+        redis_client: Optional[redis.Redis] = None
+    ):
+        """
+        初始化限流器
+
+        Args:
+            key: Redis键
+            capacity: 允许的突发数量
+            refill_per_second: 每秒恢复的额度（用于状态展示）
+            script: 原子检查和扣减的Lua脚本
+            redis_client: Redis客户端，默认使用全局客户端
+        """
+        self.key = key
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.redis = redis_client or get_redis()
+        self._script = self.redis.register_script(script)
+
+    def _call(self, tokens: int) -> Tuple[bool, float, float]:
+        """执行脚本，返回 (是否获得, 需等待秒数, 剩余额度)"""
+        raise NotImplementedError
+
+    def _seconds_until_next(self, wait: float, remaining: float) -> float:
+        return wait
+
+    def try_acquire(self, tokens: int = 1) -> float:
+        """
+        尝试获取额度
+
+        Args:
+            tokens: 申请数量
+
+        Returns:
+            0表示已获得；否则为额度足够前需要等待的秒数
+        """
+        granted, wait, _ = self._call(tokens)
+        return 0.0 if granted else wait
+
+    async def acquire(self, tokens: int = 1, max_wait: Optional[float] = None) -> bool:
+        """
+        获取额度，不足时按返回的等待时间休眠后重试
+
+        Args:
+            tokens: 申请数量
+            max_wait: 最长等待秒数，None表示一直等待
+
+        Returns:
+            是否获得额度（需要等待的时间超过 max_wait 时返回False）
+        """
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return True
+            if max_wait is not None and waited + wait > max_wait:
+                return False
+            logger.info(f"额度不足，等待 {wait:.2f} 秒: {self.key}")
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def status(self) -> Dict[str, Any]:
+        """当前额度状态（不占用额度）"""
+        _, wait, remaining = self._call(0)
+        return {
+            "capacity": self.capacity,
+            "available": round(remaining, 3),
+            "refill_per_second": self.refill_per_second,
+            "seconds_until_next": round(self._seconds_until_next(wait, remaining), 3)
+        }
+
+
+class TokenBucket(RateLimiter):
+    """Redis令牌桶"""
+
+    def __init__(
+        self,
+        key: str,
+        capacity: int,
+        refill_per_second: float,
+        redis_client: Optional[redis.Redis] = None
+    ):
+        """
+        初始化令牌桶
+
+        Args:
+            key: Redis键
+            capacity: 桶容量（允许的突发数量）
+            refill_per_second: 每秒补充的令牌数
+            redis_client: Redis客户端，默认使用全局客户端
+        """
+        super().__init__(key, capacity, refill_per_second, _ACQUIRE_SCRIPT, redis_client)
+
+    def _call(self, tokens: int) -> Tuple[bool, float, float]:
+        granted, wait_ms, remaining = self._script(
+            keys=[self.key],
+            args=[self.capacity, self.refill_per_second, tokens]
+        )
+        return bool(granted), int(wait_ms) / 1000, float(remaining)
+
+    def _seconds_until_next(self, wait: float, remaining: float) -> float:
+        # 只补充不扣减时脚本不返回等待时间，按补充速度推算下一枚令牌
+        return 0.0 if remaining >= 1 else (1 - remaining) / self.refill_per_second
+
+
+class SlidingWindowLimiter(RateLimiter):
+    """Redis滑动窗口限流：任意连续的窗口时长内放行次数不超过上限"""
+
+    def __init__(
+        self,
+        key: str,
+        limit: int,
+        window_seconds: float,
+        redis_client: Optional[redis.Redis] = None,
+        clock: Optional[Callable[[], float]] = None
+    ):
+        """
+        初始化滑动窗口
+
+        Args:
+            key: Redis键（保存窗口内每次放行的时间）
+            limit: 窗口内的放行上限
+            window_seconds: 窗口时长（秒）
+            redis_client: Redis客户端，默认使用全局客户端
+            clock: 返回当前秒数的时钟，默认使用Redis服务器时间（便于测试注入）
+        """
+        # 状态中的 refill_per_second 为窗口内的平均放行速度
+        super().__init__(key, limit, limit / window_seconds, _WINDOW_SCRIPT, redis_client)
+        self.window_seconds = window_seconds
+        self.clock = clock
+
+    def _call(self, tokens: int) -> Tuple[bool, float, float]:
+        now_ms = int(self.clock() * 1000) if self.clock else ""
+        granted, wait_ms, remaining = self._script(
+            keys=[self.key, f"{self.key}:seq"],
+            args=[self.capacity, int(self.window_seconds * 1000), tokens, now_ms]
+        )
+        return bool(granted), int(wait_ms) / 1000, float(remaining)
+
+
+def deletion_bucket(account_id: str, redis_client: Optional[redis.Redis] = None) -> SlidingWindowLimiter:
+    """账号的删除额度：任意一小时内不超过每小时上限"""
+    # 与原令牌桶的哈希键区分，升级时不会读到旧类型的键
+    return SlidingWindowLimiter(
+        f"weibo:ratelimit:delete:{account_id}:window",
+        limit=settings.max_delete_per_hour,
+        window_seconds=3600,
+        redis_client=redis_client
+    )
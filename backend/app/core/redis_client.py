@@ -0,0 +1,23 @@
+"""
+Redis客户端
+
+提供进程内共享的Redis连接，供任务协调和状态聚合使用
+"""
+
+from typing import Optional
+
+import redis
+
+from app.core.config import settings
+
+
+# 全局Redis客户端（连接池自带fork检测，可在Celery子进程中安全复用）
+_redis_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """获取Redis客户端实例"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+    return _redis_client
@@ -0,0 +1,147 @@
+"""
+分析结果存储
+
+将逐条分析结果保存在Redis中（按风险分数排序的有序集合 + 详情哈希），
+Celery结果只保留汇总计数，前端按页查询
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+import redis
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+
+def compact_post(post: Dict[str, Any]) -> Dict[str, Any]:
+    """去掉与摘要重复的原始微博副本"""
+    return {k: v for k, v in post.items() if k != "original_weibo"}
+
+
+def risk_counts(posts: List[Dict[str, Any]]) -> Dict[str, int]:
+    """统计各风险等级数量"""
+    return {
+        "total_analyzed": len(posts),
+        "high_risk_count": len([p for p in posts if p["risk_score"] >= 7]),
+        "medium_risk_count": len([p for p in posts if 4 <= p["risk_score"] < 7]),
+        "low_risk_count": len([p for p in posts if p["risk_score"] < 4])
+    }
+
+
+class AnalysisResultStore:
+    """分析结果存储"""
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None, ttl: Optional[int] = None):
+        """
+        初始化结果存储
+
+        Args:
+            redis_client: Redis客户端，默认使用全局客户端
+            ttl: 结果过期时间（秒）
+        """
+        self.redis = redis_client or get_redis()
+        self.ttl = ttl or settings.result_store_ttl
+
+    @staticmethod
+    def _key(task_id: str, name: str) -> str:
+        """结果存储的Redis键"""
+        return f"weibo:results:{task_id}:{name}"
+
+    def save_posts(self, task_id: str, posts: List[Dict[str, Any]]):
+        """
+        保存一批分析结果（可被各分片并发调用）
+
+        Args:
+            task_id: 分析任务ID
+            posts: 分析结果列表
+        """
+        if not posts:
+            return
+
+        posts_key = self._key(task_id, "posts")
+        rank_key = self._key(task_id, "rank")
+        categories_key = self._key(task_id, "categories")
+
+        pipe = self.redis.pipeline(transaction=False)
+        category_keys = set()
+        for post in posts:
+            record = compact_post(post)
+            post_id = str(record.get("post_id", ""))
+            category = record.get("risk_category") or ""
+            category_key = self._key(task_id, f"cat:{category}")
+            category_keys.add(category_key)
+
+            pipe.hset(posts_key, post_id, json.dumps(record, ensure_ascii=False))
+            pipe.zadd(rank_key, {post_id: record["risk_score"]})
+            pipe.zadd(category_key, {post_id: record["risk_score"]})
+            pipe.sadd(categories_key, category)
+
+        for key in [posts_key, rank_key, categories_key, *category_keys]:
+            pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def categories(self, task_id: str) -> List[str]:
+        """已有结果中的风险类别"""
+        return sorted(self.redis.smembers(self._key(task_id, "categories")))
+
+    def query(
+        self,
+        task_id: str,
+        offset: int = 0,
+        limit: int = 20,
+        min_risk: Optional[float] = None,
+        categories: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        按风险分数从高到低分页查询
+
+        Args:
+            task_id: 分析任务ID
+            offset: 偏移量
+            limit: 每页数量
+            min_risk: 最低风险分数
+            categories: 风险类别过滤
+
+        Returns:
+            包含 total 与 items 的分页结果
+        """
+        source_key = self._source_key(task_id, categories)
+        min_score = min_risk if min_risk is not None else "-inf"
+
+        total = self.redis.zcount(source_key, min_score, "+inf")
+        post_ids = self.redis.zrevrangebyscore(
+            source_key, "+inf", min_score, start=offset, num=limit
+        )
+        records = self.redis.hmget(self._key(task_id, "posts"), post_ids) if post_ids else []
+
+        return {
+            "total": total,
+            "items": [json.loads(record) for record in records if record]
+        }
+
+    def exists(self, task_id: str) -> bool:
+        """任务是否已有结果"""
+        return bool(self.redis.exists(self._key(task_id, "rank")))
+
+    def _source_key(self, task_id: str, categories: Optional[List[str]]) -> str:
+        """确定查询的有序集合，多个类别时合并为短期缓存的临时集合"""
+        if not categories:
+            return self._key(task_id, "rank")
+        if len(categories) == 1:
+            return self._key(task_id, f"cat:{categories[0]}")
+
+        normalized = sorted(set(categories))
+        digest = hashlib.sha1("\n".join(normalized).encode("utf-8")).hexdigest()[:16]
+        union_key = self._key(task_id, f"union:{digest}")
+        if not self.redis.exists(union_key):
+            pipe = self.redis.pipeline()
+            pipe.zunionstore(
+                union_key,
+                [self._key(task_id, f"cat:{category}") for category in normalized],
+                aggregate="MAX"
+            )
+            pipe.expire(union_key, 10)
+            pipe.execute()
+        return union_key
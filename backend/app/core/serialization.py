@@ -0,0 +1,94 @@
+"""
+Celery消息与结果的紧凑序列化
+
+msgpack编码，超过阈值的载荷使用zstd压缩（未安装zstandard时回退为gzip），
+首字节标记压缩方式，解码端无需额外配置
+"""
+
+import gzip
+from datetime import date, datetime
+from typing import Any, Optional
+
+import msgpack
+from kombu.serialization import register
+
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 可选依赖
+    zstandard = None
+
+
+SERIALIZER_NAME = "msgpack-compressed"
+CONTENT_TYPE = "application/x-weibo-msgpack"
+
+# 载荷首字节：压缩方式
+_HEADER_RAW = b"\x00"
+_HEADER_GZIP = b"\x01"
+_HEADER_ZSTD = b"\x02"
+
+
+def _default(obj: Any) -> Any:
+    """日期时间转换为与json序列化器一致的isoformat，其他不支持的类型直接报错，避免静默变成字符串"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"无法序列化的类型: {type(obj).__name__}")
+
+
+def dumps(obj: Any, threshold: Optional[int] = None) -> bytes:
+    """
+    序列化对象
+
+    Args:
+        obj: 待序列化对象
+        threshold: 压缩阈值（字节），默认读取配置
+
+    Returns:
+        带压缩标记的二进制载荷
+    """
+    threshold = settings.celery_compression_threshold if threshold is None else threshold
+    packed = msgpack.packb(obj, default=_default, use_bin_type=True)
+
+    if len(packed) < threshold:
+        return _HEADER_RAW + packed
+    if zstandard is not None:
+        return _HEADER_ZSTD + zstandard.ZstdCompressor(level=3).compress(packed)
+    return _HEADER_GZIP + gzip.compress(packed, compresslevel=6)
+
+
+def loads(data: bytes) -> Any:
+    """
+    反序列化载荷
+
+    Args:
+        data: dumps生成的二进制载荷
+
+    Returns:
+        原始对象
+    """
+    if isinstance(data, str):
+        data = data.encode("latin-1")
+
+    header, body = data[:1], data[1:]
+    if header == _HEADER_ZSTD:
+        if zstandard is None:
+            raise ValueError("载荷使用zstd压缩，但未安装zstandard")
+        body = zstandard.ZstdDecompressor().decompress(body)
+    elif header == _HEADER_GZIP:
+        body = gzip.decompress(body)
+    elif header != _HEADER_RAW:
+        raise ValueError(f"未知的载荷压缩标记: {header!r}")
+
+    return msgpack.unpackb(body, raw=False, strict_map_key=False)
+
+
+def register_serializer():
+    """向kombu注册紧凑序列化器"""
+    register(
+        SERIALIZER_NAME,
+        dumps,
+        loads,
+        content_type=CONTENT_TYPE,
+        content_encoding="binary"
+    )
@@ -0,0 +1,108 @@
+"""
+任务事件流
+
+worker通过Redis发布/订阅推送任务进度、扫码状态和部分结果，
+API以Server-Sent Events的形式转发给前端，替代轮询
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+# 任务结束状态，推送后关闭事件流
+TERMINAL_STATES = {"SUCCESS", "FAILURE", "REVOKED"}
+
+
+def task_channel(task_id: str) -> str:
+    """任务事件的发布/订阅频道"""
+    return f"weibo:task-events:{task_id}"
+
+
+def publish_task_event(task_id: str, event: str, data: Dict[str, Any]):
+    """
+    发布任务事件
+
+    Args:
+        task_id: 任务ID
+        event: 事件类型（progress/partial/status）
+        data: 事件数据
+    """
+    payload = json.dumps(
+        {"event": event, "task_id": task_id, **data},
+        ensure_ascii=False,
+        default=str
+    )
+    get_redis().publish(task_channel(task_id), payload)
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """格式化为SSE消息"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def is_terminal(event: Dict[str, Any]) -> bool:
+    """判断事件是否表示任务已结束"""
+    return event.get("event") == "status" and event.get("status") in TERMINAL_STATES
+
+
+async def stream_task_events(
+    task_id: str,
+    snapshot: Callable[[], Dict[str, Any]],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    heartbeat_seconds: Optional[float] = None
+) -> AsyncIterator[str]:
+    """
+    生成任务的SSE事件流
+
+    先订阅频道再读取快照，保证快照与后续事件之间不丢消息。
+
+    Args:
+        task_id: 任务ID
+        snapshot: 返回当前任务状态事件的函数
+        is_disconnected: 检查客户端是否已断开的协程函数
+        heartbeat_seconds: 无事件时发送心跳的间隔
+
+    Yields:
+        SSE格式的消息
+    """
+    heartbeat_seconds = heartbeat_seconds or settings.sse_heartbeat_seconds
+    client = aioredis.Redis.from_url(settings.redis_url, decode_responses=True)
+    pubsub = client.pubsub()
+    try:
+        await pubsub.subscribe(task_channel(task_id))
+
+        current = await asyncio.to_thread(snapshot)
+        yield format_sse(current["event"], current)
+        if is_terminal(current):
+            return
+
+        idle = 0.0
+        while not await is_disconnected():
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message is None:
+                idle += 1.0
+                if idle >= heartbeat_seconds:
+                    idle = 0.0
+                    yield ": keepalive\n\n"
+                continue
+
+            idle = 0.0
+            event = json.loads(message["data"])
+            yield format_sse(event["event"], event)
+            if is_terminal(event):
+                return
+    finally:
+        try:
+            await pubsub.aclose()
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"关闭任务事件订阅失败: {str(e)}")
@@ -0,0 +1,457 @@
+"""
+链路追踪
+
+轻量的span追踪：使用W3C traceparent在API、Celery消息头和worker之间传递上下文，
+span以OTLP字段命名的JSON Lines写入本地文件（可由采集器转发），
+并可按任务输出火焰图式的时间线
+
+查看任务时间线:
+    python -m app.core.tracing <task_id>
+"""
+
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# 消息头中的入队时间，用于计算排队耗时
+ENQUEUED_AT_HEADER = "x-enqueued-at"
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "weibo_current_span", default=None
+)
+
+
+class SpanContext:
+    """跨进程传递的span上下文"""
+
+    def __init__(self, trace_id: str, span_id: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+    def to_traceparent(self) -> str:
+        """编码为W3C traceparent"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    @classmethod
+    def from_traceparent(cls, value: Optional[str]) -> Optional["SpanContext"]:
+        """解析W3C traceparent，格式不合法时返回None"""
+        if not value:
+            return None
+        parts = value.strip().split("-")
+        if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+        try:
+            int(parts[1], 16)
+            int(parts[2], 16)
+        except ValueError:
+            return None
+        return cls(parts[1], parts[2])
+
+
+class Span:
+    """一次计时操作"""
+
+    def __init__(
+        self,
+        name: str,
+        parent: Optional[SpanContext] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        start_ns: Optional[int] = None
+    ):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "OK"
+
+    @property
+    def context(self) -> SpanContext:
+        return SpanContext(self.trace_id, self.span_id)
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        """标记span失败"""
+        self.status = "ERROR"
+        self.attributes["error.type"] = type(error).__name__
+        self.attributes["error.message"] = str(error)[:500]
+
+    def end(self, end_ns: Optional[int] = None):
+        """结束span并导出（重复调用无效）"""
+        if self.end_ns is not None:
+            return
+        self.end_ns = end_ns if end_ns is not None else time.time_ns()
+        if settings.tracing_enabled:
+            get_exporter().export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出格式（OTLP字段命名）"""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "status": self.status
+        }
+
+
+class FileSpanExporter:
+    """
+    把span以JSON Lines追加写入文件
+
+    span先放入内存队列，由后台线程批量写入，不在代理的事件循环中做文件IO；
+    文件超过大小上限后轮转（spans.jsonl.1、.2 ...），队列满时丢弃新的span
+    """
+
+    QUEUE_SIZE = 10000
+    BATCH_SIZE = 500
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        backup_count: Optional[int] = None
+    ):
+        self.path = path or settings.trace_export_path
+        self.max_bytes = settings.trace_max_bytes if max_bytes is None else max_bytes
+        self.backup_count = settings.trace_backup_count if backup_count is None else backup_count
+        self._queue: queue.Queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """等待已导出的span全部写入文件"""
+        if self._writer is not None:
+            self._queue.join()
+
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            lines = [self._queue.get()]
+            while len(lines) < self.BATCH_SIZE:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(lines)
+            except OSError as e:
+                logger.warning(f"写入追踪数据失败: {str(e)}")
+            finally:
+                for _ in lines:
+                    self._queue.task_done()
+
+    def _write(self, lines: List[str]):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            size = f.tell()
+        if self.max_bytes and size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        """spans.jsonl -> spans.jsonl.1 -> ... ，超出保留个数的旧文件删除"""
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+class InMemorySpanExporter:
+    """在内存中收集span（用于测试）"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+
+_exporter = None
+
+
+def get_exporter():
+    """获取span导出器"""
+    global _exporter
+    if _exporter is None:
+        _exporter = FileSpanExporter()
+    return _exporter
+
+
+def set_exporter(exporter):
+    """替换span导出器"""
+    global _exporter
+    _exporter = exporter
+
+
+def current_span() -> Optional[Span]:
+    """当前上下文中的span"""
+    return _current_span.get()
+
+
+def start_span(
+    name: str,
+    parent: Optional[SpanContext] = None,
+    attributes: Optional[Dict[str, Any]] = None,
+    start_ns: Optional[int] = None
+) -> Span:
+    """
+    创建span（不改变当前上下文，需手动调用end）
+
+    Args:
+        name: span名称
+        parent: 父span上下文，默认使用当前span
+        attributes: span属性
+        start_ns: 开始时间（纳秒时间戳）
+
+    Returns:
+        新建的span
+    """
+    if parent is None:
+        active = current_span()
+        parent = active.context if active else None
+    return Span(name, parent, attributes, start_ns)
+
+
+def activate(span: Span) -> contextvars.Token:
+    """把span设为当前span"""
+    return _current_span.set(span)
+
+
+def deactivate(token: contextvars.Token):
+    """恢复之前的当前span"""
+    _current_span.reset(token)
+
+
+@contextmanager
+def span(name: str, parent: Optional[SpanContext] = None, **attributes) -> Iterator[Span]:
+    """在代码块内创建并激活span，异常时标记失败"""
+    item = start_span(name, parent, attributes)
+    token = activate(item)
+    try:
+        yield item
+    except BaseException as e:
+        item.record_error(e)
+        raise
+    finally:
+        deactivate(token)
+        item.end()
+
+
+def traced(name: str):
+    """为同步或异步函数创建span的装饰器"""
+    def decorator(func: Callable):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def inject(headers: Dict[str, Any]) -> Dict[str, Any]:
+    """把当前span上下文和入队时间写入消息头"""
+    active = current_span()
+    if active:
+        headers["traceparent"] = active.context.to_traceparent()
+    headers[ENQUEUED_AT_HEADER] = time.time_ns()
+    return headers
+
+
+def extract(carrier: Any) -> Optional[SpanContext]:
+    """从HTTP头或Celery请求中读取span上下文"""
+    if carrier is None:
+        return None
+    getter = carrier.get if hasattr(carrier, "get") else lambda key: getattr(carrier, key, None)
+    value = getter("traceparent")
+    if value is None and getattr(carrier, "headers", None):
+        value = carrier.headers.get("traceparent")
+    return SpanContext.from_traceparent(value)
+
+
+# worker中正在执行的任务span: task_id -> (span, token)
+_task_spans: Dict[str, Tuple[Span, contextvars.Token]] = {}
+
+
+def _inject_task_headers(headers=None, **kwargs):
+    """发布任务时写入追踪上下文"""
+    if headers is not None:
+        inject(headers)
+
+
+def _start_task_span(task_id=None, task=None, **kwargs):
+    """任务开始时创建排队span和任务span，并设为当前span"""
+    if task is None:
+        return
+    request = task.request
+    parent = extract(request)
+    attributes = {"celery.task_id": task_id, "celery.task": task.name}
+    queue = (request.delivery_info or {}).get("routing_key")
+    if queue:
+        attributes["celery.queue"] = queue
+
+    now = time.time_ns()
+    enqueued_at = request.get(ENQUEUED_AT_HEADER)
+    if enqueued_at:
+        wait = start_span("celery.queue_wait", parent, attributes, start_ns=int(enqueued_at))
+        wait.end(now)
+        attributes["celery.queue_wait_ms"] = round((now - int(enqueued_at)) / 1e6, 1)
+
+    task_span = start_span(f"celery.task {task.name}", parent, attributes, start_ns=now)
+    _task_spans[task_id] = (task_span, activate(task_span))
+
+
+def _end_task_span(task_id=None, state=None, **kwargs):
+    """任务结束时结束任务span"""
+    entry = _task_spans.pop(task_id, None)
+    if entry is None:
+        return
+    task_span, token = entry
+    task_span.set_attribute("celery.state", state)
+    if state == "FAILURE":
+        task_span.status = "ERROR"
+    try:
+        deactivate(token)
+    except ValueError:
+        _current_span.set(None)
+    task_span.end()
+
+
+def setup_celery_tracing():
+    """连接Celery信号：发布时注入上下文，执行时创建任务span"""
+    from celery.signals import before_task_publish, task_postrun, task_prerun
+
+    before_task_publish.connect(_inject_task_headers, weak=False)
+    task_prerun.connect(_start_task_span, weak=False)
+    task_postrun.connect(_end_task_span, weak=False)
+
+
+def load_spans(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """读取导出文件（含轮转出的旧文件）中的全部span"""
+    path = path or settings.trace_export_path
+    backups = [f"{path}.{index}" for index in range(settings.trace_backup_count, 0, -1)]
+    spans = []
+    for file_path in backups + [path]:
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        spans.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+    return spans
+
+
+def task_trace(spans: List[Dict[str, Any]], task_id: str) -> List[Dict[str, Any]]:
+    """找出与任务同一trace的全部span"""
+    trace_ids = {
+        s["traceId"] for s in spans
+        if s.get("attributes", {}).get("celery.task_id") == task_id
+    }
+    return [s for s in spans if s["traceId"] in trace_ids]
+
+
+def format_timeline(spans: List[Dict[str, Any]], width: int = 50) -> str:
+    """
+    把一个trace的span格式化为火焰图式时间线
+
+    Args:
+        spans: 同一trace的span列表
+        width: 时间条宽度（字符）
+
+    Returns:
+        每行一个span：层级缩进的名称、耗时和时间条
+    """
+    if not spans:
+        return "未找到追踪数据"
+
+    start = min(s["startTimeUnixNano"] for s in spans)
+    end = max(s["endTimeUnixNano"] or s["startTimeUnixNano"] for s in spans)
+    total = max(end - start, 1)
+
+    ids = {s["spanId"] for s in spans}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for s in spans:
+        parent = s.get("parentSpanId") if s.get("parentSpanId") in ids else None
+        children.setdefault(parent, []).append(s)
+
+    lines = [f"总耗时 {total / 1e9:.2f}s"]
+
+    def walk(parent: Optional[str], depth: int):
+        for s in sorted(children.get(parent, []), key=lambda item: item["startTimeUnixNano"]):
+            span_end = s["endTimeUnixNano"] or s["startTimeUnixNano"]
+            offset = int((s["startTimeUnixNano"] - start) / total * width)
+            length = max(int((span_end - s["startTimeUnixNano"]) / total * width), 1)
+            bar = " " * offset + "█" * min(length, width - offset)
+            label = ("  " * depth + s["name"])[:40]
+            marker = " !" if s.get("status") == "ERROR" else ""
+            lines.append(
+                f"{label:<40} {(span_end - s['startTimeUnixNano']) / 1e9:>9.2f}s |{bar:<{width}}|{marker}"
+            )
+            walk(s["spanId"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("用法: python -m app.core.tracing <task_id>")
+        sys.exit(1)
+    print(format_timeline(task_trace(load_spans(), sys.argv[1])))
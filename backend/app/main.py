@@ -6,15 +6,18 @@
 
 import logging
 import sys
+import time
 from contextlib import asynccontextmanager
 from typing import Dict, Any
 
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import uvicorn
 
+from app.core import tracing
 from app.core.config import settings
+from app.core.metrics import HTTP_REQUEST_DURATION, METRICS_CONTENT_TYPE, render_metrics
 
 
 # 配置结构化日志
@@ -29,6 +32,9 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# 不创建追踪span的路径（抓取和探活请求）
+UNTRACED_PATHS = {"/metrics", "/health"}
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -58,6 +64,43 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    """记录每个路由的请求耗时"""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.labels(
+            request.method,
+            route.path if route else "unmatched",
+            str(status)
+        ).observe(time.perf_counter() - started)
+
+
+@app.middleware("http")
+async def tracing_middleware(request: Request, call_next):
+    """为API请求创建span，沿用调用方传入的traceparent"""
+    if request.url.path in UNTRACED_PATHS:
+        return await call_next(request)
+
+    with tracing.span(
+        f"{request.method} {request.url.path}",
+        parent=tracing.extract(request.headers),
+        **{"http.method": request.method}
+    ) as request_span:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        request_span.set_attribute("http.route", route.path if route else "unmatched")
+        request_span.set_attribute("http.status_code", response.status_code)
+        response.headers["traceparent"] = request_span.context.to_traceparent()
+        return response
+
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
     """HTTP异常处理器"""
@@ -107,6 +150,12 @@ async def health_check() -> Dict[str, str]:
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus指标端点"""
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
 # 包含API路由
 from app.api.v1.weibo import router as weibo_router
 app.include_router(weibo_router, prefix=settings.api_v1_str)
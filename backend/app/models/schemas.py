@@ -19,6 +19,7 @@ class LoginRequest(BaseModel):
     """登录请求模型"""
     username: Optional[str] = Field(None, min_length=1, description="用户名（密码登录时必需）")
     password: Optional[str] = Field(None, min_length=1, description="密码（密码登录时必需）")
+    account_id: str = Field(default="default", min_length=1, max_length=64, description="微博账号ID（每个账号使用独立的浏览器会话）")
 
 
 class UserInfo(BaseModel):
@@ -42,6 +43,7 @@ class AnalysisRequest(BaseModel):
     time_range: Optional[TimeRange] = Field(None, description="时间范围")
     keywords: Optional[List[str]] = Field(default=[], description="关键词列表")
     max_posts: int = Field(default=100, ge=1, le=1000, description="最大分析数量")
+    account_id: str = Field(default="default", min_length=1, max_length=64, description="微博账号ID（每个账号使用独立的浏览器会话）")
 
 
 class AnalysisResult(BaseModel):
@@ -56,10 +58,45 @@ class AnalysisResult(BaseModel):
     url: Optional[str] = Field(None, description="微博链接")
 
 
+class AnalysisResultsPage(BaseModel):
+    """分析结果分页模型"""
+    task_id: str = Field(..., description="任务ID")
+    total: int = Field(..., description="符合条件的结果总数")
+    offset: int = Field(..., description="偏移量")
+    limit: int = Field(..., description="每页数量")
+    categories: List[str] = Field(default=[], description="可用的风险类别")
+    items: List[AnalysisResult] = Field(..., description="按风险分数降序的分析结果")
+
+
 class DeleteRequest(BaseModel):
     """删除请求模型"""
     post_ids: List[str] = Field(..., min_items=1, max_items=100, description="微博ID列表")
     confirm: bool = Field(..., description="确认删除")
+    account_id: str = Field(default="default", min_length=1, max_length=64, description="微博账号ID（每个账号使用独立的浏览器会话）")
+
+
+class RateLimitStatus(BaseModel):
+    """删除额度模型"""
+    account_id: str = Field(..., description="微博账号ID")
+    capacity: int = Field(..., description="每小时删除上限")
+    available: float = Field(..., description="当前可用额度")
+    refill_per_second: float = Field(..., description="平均每秒恢复的额度")
+    seconds_until_next: float = Field(..., description="距离下一条可删除的秒数")
+
+
+class DeletionJobStatus(BaseModel):
+    """删除任务检查点模型"""
+    job_id: str = Field(..., description="删除任务ID")
+    user_id: Optional[str] = Field(None, description="微博账号ID")
+    status: Optional[str] = Field(None, description="任务状态: running/completed/partial/interrupted")
+    task_id: Optional[str] = Field(None, description="最近一次执行的Celery任务ID")
+    created_at: Optional[str] = Field(None, description="创建时间")
+    updated_at: Optional[str] = Field(None, description="最近一次保存检查点的时间")
+    total: int = Field(..., description="要删除的微博总数")
+    deleted_count: int = Field(..., description="已确认删除数量")
+    failed_count: int = Field(..., description="删除失败数量")
+    pending_count: int = Field(..., description="尚未处理数量")
+    running: bool = Field(..., description="是否正在执行")
 
 
 class TaskStatus(BaseModel):
@@ -95,6 +132,7 @@ class DeleteResult(BaseModel):
     success: bool = Field(..., description="是否删除成功")
     error: Optional[str] = Field(None, description="错误信息")
     timestamp: str = Field(..., description="删除时间")
+    verification: Optional[str] = Field(None, description="时间线校验结论: confirmed/still_present/unknown")
 
 
 class DeleteResponse(BaseModel):
@@ -105,6 +143,8 @@ class DeleteResponse(BaseModel):
     failed_count: int = Field(..., description="失败删除数量")
     successful_deletes: List[DeleteResult] = Field(..., description="成功删除列表")
     failed_deletes: List[DeleteResult] = Field(..., description="失败删除列表")
+    throughput: Optional[Dict[str, Any]] = Field(None, description="各标签页和整体的删除吞吐量")
+    verification: Optional[Dict[str, int]] = Field(None, description="各校验结论的数量")
 
 
 class ErrorResponse(BaseModel):
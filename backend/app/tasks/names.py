@@ -0,0 +1,11 @@
+"""
+任务注册名
+
+API进程只按名称投递任务，不导入任务模块（任务模块会加载浏览器代理、browser_use和Playwright）
+"""
+
+LOGIN_TASK = "login_weibo_task"
+ANALYZE_TASK = "analyze_weibo_content"
+ANALYZE_CHUNK_TASK = "analyze_weibo_chunk"
+MERGE_ANALYSIS_TASK = "merge_analysis_results"
+DELETE_TASK = "delete_weibo_posts"
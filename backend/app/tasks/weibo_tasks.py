@@ -6,17 +6,49 @@
 
 import asyncio
 import logging
-from typing import Dict, Any, List
-from celery import current_task
+import os
+import time
+from typing import Dict, Any, List, Optional, Set
+from celery import chord, group
+from celery.signals import (
+    celeryd_after_setup, task_postrun, task_prerun, worker_init, worker_process_init, worker_process_shutdown
+)
 
+from app.core.affinity import SessionDirectory, session_queue_enabled
+from app.core.autoscaler import SESSION_CAPACITY_KEY
 from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.dedup import RequestDeduplicator, analysis_fingerprint
+from app.core.deletion_jobs import JOB_COMPLETED, JOB_INTERRUPTED, JOB_PARTIAL, DeletionJobStore
+from app.core.metrics import (
+    BROWSER_LAUNCH_DURATION, TASK_DURATION, TASK_QUEUE_WAIT, mark_process_dead, start_metrics_server
+)
+from app.core.pacing import AdaptivePacer
+from app.core.priorities import priority_class
+from app.core.progress import ProgressReporter, SharedProgress
+from app.core.qr_cache import QrCodeCache
+from app.core.redis_client import get_redis
+from app.core.result_store import AnalysisResultStore, compact_post, risk_counts
+from app.core.task_stream import TERMINAL_STATES, publish_task_event
+from app.core.tracing import ENQUEUED_AT_HEADER
+from app.agents.qr_watcher import QR_CONFIRMED, QR_EXPIRED
+from app.agents.session_registry import AccountSession, get_session_registry
 from app.agents.weibo_agent import WeiboAgent
+from app.tasks.names import (
+    ANALYZE_CHUNK_TASK, ANALYZE_TASK, DELETE_TASK, LOGIN_TASK, MERGE_ANALYSIS_TASK
+)
 
 
 logger = logging.getLogger(__name__)
 
-# 全局微博代理实例（在实际应用中应该使用会话管理）
-_weibo_agent = None
+# 评分用的代理实例（评分不依赖登录状态，不绑定账号）
+_scoring_agent = None
+
+# worker名称（主进程启动时记录，fork出的子进程继承）
+_worker_hostname: Optional[str] = None
+
+# 正在执行的任务开始时间，用于记录任务耗时
+_task_started_at: Dict[str, float] = {}
 
 
 def run_async_task(coro):
@@ -30,16 +62,221 @@ def run_async_task(coro):
     return loop.run_until_complete(coro)
 
 
-def get_weibo_agent():
-    """获取微博代理实例"""
-    global _weibo_agent
-    if _weibo_agent is None:
-        _weibo_agent = WeiboAgent()
-    return _weibo_agent
+@task_prerun.connect
+def record_task_start(task_id=None, task=None, **kwargs):
+    """记录任务开始时间，以及按优先级类别统计的排队等待时间"""
+    _task_started_at[task_id] = time.perf_counter()
+    
+    enqueued_at = task.request.get(ENQUEUED_AT_HEADER) if task is not None else None
+    if enqueued_at:
+        wait = max(time.time_ns() - int(enqueued_at), 0) / 1e9
+        TASK_QUEUE_WAIT.labels(priority_class(task.name), task.name).observe(wait)
+
+
+@task_postrun.connect
+def record_task_duration(task_id=None, task=None, state=None, **kwargs):
+    """记录任务耗时与结果状态"""
+    started = _task_started_at.pop(task_id, None)
+    if started is not None and task is not None:
+        TASK_DURATION.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - started)
+
+
+@task_prerun.connect
+def apply_session_capacity(**kwargs):
+    """按自动扩缩容控制器的决定调整本进程的浏览器会话上限"""
+    try:
+        capacity = get_redis().get(SESSION_CAPACITY_KEY)
+    except Exception as e:
+        logger.warning(f"读取会话上限失败: {str(e)}")
+        return
+    if capacity:
+        get_session_registry().max_sessions = min(int(capacity), settings.session_max_count)
+
+
+@worker_init.connect
+def serve_worker_metrics(**kwargs):
+    """worker主进程启动时在独立端口暴露本容器的指标"""
+    try:
+        if start_metrics_server(settings.metrics_port):
+            logger.info(f"worker指标已在端口 {settings.metrics_port} 暴露")
+    except OSError as e:
+        logger.warning(f"启动worker指标服务失败: {str(e)}")
+
+
+@worker_process_shutdown.connect
+def cleanup_process_metrics(pid=None, **kwargs):
+    """worker子进程退出时清理多进程指标文件"""
+    mark_process_dead(pid or os.getpid())
+
+
+@task_postrun.connect
+def publish_task_outcome(task_id=None, retval=None, state=None, **kwargs):
+    """任务结束后向事件流推送最终状态（被replace的任务由替换后的任务推送）"""
+    if state not in TERMINAL_STATES:
+        return
+    
+    data = {"status": state}
+    if state == "SUCCESS":
+        data["result"] = retval
+    else:
+        data["error"] = str(retval)
+    
+    try:
+        publish_task_event(task_id, "status", data)
+    except Exception as e:
+        logger.warning(f"推送任务结束事件失败: {str(e)}")
+
+
+def get_scoring_agent():
+    """获取评分用的代理实例"""
+    global _scoring_agent
+    if _scoring_agent is None:
+        _scoring_agent = WeiboAgent()
+    return _scoring_agent
+
+
+async def _persist_session(session: AccountSession, hostname: Optional[str]):
+    """登录成功后保存浏览器cookie，本worker有专属队列时登记为账号会话的归属"""
+    directory = SessionDirectory()
+    try:
+        state = await session.agent.export_storage_state()
+        if state:
+            directory.save_state(session.account_id, state)
+    except Exception as e:
+        logger.warning(f"保存账号 {session.account_id} 的会话状态失败: {str(e)}")
+    if hostname and session_queue_enabled():
+        directory.claim(session.account_id, hostname)
 
 
-@celery_app.task(bind=True, name="login_weibo_task")
-def login_weibo_task(self, username: str = None, password: str = None, use_qr: bool = True) -> Dict[str, Any]:
+async def _restore_session(session: AccountSession, hostname: Optional[str]) -> bool:
+    """
+    确保账号会话已登录
+    
+    会话未登录时（例如归属worker失联后任务由本worker接手），用Redis中保存的cookie恢复，
+    恢复成功后登记本worker为新的归属（本worker有专属队列时）
+    
+    Args:
+        session: 账号会话
+        hostname: 当前worker名称
+        
+    Returns:
+        会话是否已登录
+    """
+    directory = SessionDirectory()
+    agent = session.agent
+    if not agent.is_logged_in:
+        state = directory.load_state(session.account_id)
+        if state and await agent.import_storage_state(state):
+            agent.is_logged_in = True
+            logger.info(f"已从保存的状态恢复账号 {session.account_id} 的会话")
+    
+    if agent.is_logged_in and hostname and session_queue_enabled():
+        directory.claim(session.account_id, hostname)
+    return agent.is_logged_in
+
+
+@celeryd_after_setup.connect
+def remember_worker_hostname(sender=None, **kwargs):
+    """记录worker名称，供子进程预热时恢复本worker归属的账号"""
+    global _worker_hostname
+    _worker_hostname = sender
+
+
+async def _warm_up(hostname: Optional[str], browsers: int) -> Dict[str, Any]:
+    """
+    预热浏览器
+    
+    先恢复归属于本worker的账号会话（worker重启后这些账号的任务仍会发到本worker），
+    再预启动备用浏览器补足到指定数量；每个浏览器都预先打开微博首页
+    
+    Args:
+        hostname: 当前worker名称
+        browsers: 预热的浏览器总数（归属账号的会话不受此限制，但不超过会话上限）
+        
+    Returns:
+        预热统计
+    """
+    registry = get_session_registry()
+    accounts = SessionDirectory().accounts_of(hostname)[:registry.capacity] if hostname else []
+    
+    async def restore(account_id: str) -> bool:
+        started = time.perf_counter()
+        session = await registry.acquire(account_id)
+        await session.agent.preload_page(settings.weibo_api_base_url)
+        restored = await _restore_session(session, hostname)
+        if restored:
+            # 带上cookie重新打开首页，使登录后的页面资源进入缓存
+            await session.agent.preload_page(settings.weibo_api_base_url)
+        BROWSER_LAUNCH_DURATION.labels("warmup_restore").observe(time.perf_counter() - started)
+        return restored
+    
+    async def launch_spare() -> bool:
+        started = time.perf_counter()
+        agent = WeiboAgent(persistent_browser=True)
+        try:
+            await agent.preload_page(settings.weibo_api_base_url)
+        except Exception:
+            await agent.close()
+            raise
+        BROWSER_LAUNCH_DURATION.labels("warmup_spare").observe(time.perf_counter() - started)
+        if not registry.add_spare(agent):
+            await agent.close()
+            return False
+        return True
+    
+    spare_count = min(max(browsers - len(accounts), 0), registry.capacity - len(accounts))
+    outcomes = await asyncio.gather(
+        *(restore(account_id) for account_id in accounts),
+        *(launch_spare() for _ in range(spare_count)),
+        return_exceptions=True
+    )
+    for outcome in outcomes:
+        if isinstance(outcome, Exception):
+            logger.warning(f"预热浏览器失败: {str(outcome)}")
+    
+    return {
+        "restored": sum(outcome is True for outcome in outcomes[:len(accounts)]),
+        "accounts": len(accounts),
+        "spares": registry.spare_count
+    }
+
+
+@worker_process_init.connect
+def warm_up_worker(**kwargs):
+    """
+    worker子进程启动时预热浏览器
+    
+    子进程在本信号处理完成后才开始接收任务，预热超时或失败时直接开始接收任务（首个任务按需启动浏览器）
+    """
+    if not settings.warmup_enabled:
+        return
+    
+    started = time.perf_counter()
+    try:
+        stats = run_async_task(asyncio.wait_for(
+            _warm_up(_worker_hostname, settings.warmup_browsers),
+            settings.warmup_timeout
+        ))
+    except Exception as e:
+        logger.warning(f"worker预热未完成，首个任务将按需启动浏览器: {str(e) or type(e).__name__}")
+        return
+    finally:
+        BROWSER_LAUNCH_DURATION.labels("warmup").observe(time.perf_counter() - started)
+    
+    logger.info(
+        f"worker预热完成，用时 {time.perf_counter() - started:.1f} 秒: "
+        f"恢复账号会话 {stats['restored']}/{stats['accounts']}，备用浏览器 {stats['spares']} 个"
+    )
+
+
+@celery_app.task(bind=True, name=LOGIN_TASK)
+def login_weibo_task(
+    self,
+    username: str = None,
+    password: str = None,
+    use_qr: bool = True,
+    account_id: str = "default"
+) -> Dict[str, Any]:
     """
     登录微博任务
     
@@ -47,143 +284,158 @@ def login_weibo_task(self, username: str = None, password: str = None, use_qr: b
         username: 用户名（密码登录时使用）
         password: 密码（密码登录时使用）
         use_qr: 是否使用扫码登录
+        account_id: 账号ID，登录状态保存在该账号的会话中
         
     Returns:
         登录结果
     """
     login_method = "扫码登录" if use_qr else f"密码登录: {username}"
-    logger.info(f"开始微博登录: {login_method}")
+    logger.info(f"开始微博登录: {login_method}（账号 {account_id}）")
     
-    def progress_callback(message: str):
-        """进度回调函数"""
-        meta = {"message": message, "login_method": login_method}
-        if username:
-            meta["username"] = username
-        current_task.update_state(state="PROGRESS", meta=meta)
+    base_meta = {"login_method": login_method, "account_id": account_id}
+    if username:
+        base_meta["username"] = username
+    progress_callback = ProgressReporter(self.request.id, base_meta)
     
     async def qr_login_task():
         """异步扫码登录任务"""
-        agent = get_weibo_agent()
-        try:
-            # 更新任务状态
-            progress_callback("初始化浏览器...")
-            
-            # 生成二维码
-            result = await agent.login_weibo_qr(progress_callback)
-            
-            if result.get("qr_code"):
-                # 更新任务状态，包含二维码信息
-                current_task.update_state(
-                    state="PROGRESS",
-                    meta={
-                        "message": "请使用微博APP扫描二维码",
-                        "qr_code": result["qr_code"],
-                        "qr_status": result.get("qr_status", "waiting"),
-                        "login_method": login_method
-                    }
-                )
+        async with get_session_registry().session(account_id) as session:
+            agent = session.agent
+            try:
+                # 更新任务状态
+                progress_callback("初始化浏览器...")
                 
-                # 轮询检查登录状态
-                max_attempts = 60  # 最多等待5分钟
-                for attempt in range(max_attempts):
-                    await asyncio.sleep(5)  # 每5秒检查一次
-                    
-                    status_result = await agent.check_qr_status(progress_callback)
-                    qr_status = status_result.get("qr_status", "waiting")
-                    
-                    # 更新任务状态
-                    current_task.update_state(
-                        state="PROGRESS",
-                        meta={
-                            "message": f"扫码状态: {qr_status}",
-                            "qr_code": result["qr_code"],
-                            "qr_status": qr_status,
-                            "login_method": login_method,
-                            "attempt": attempt + 1,
-                            "max_attempts": max_attempts
-                        }
-                    )
+                # 生成二维码
+                result = await agent.login_weibo_qr(progress_callback)
+                
+                if result.get("qr_code"):
+                    # 二维码按任务缓存供状态接口直接读取，同时随后续每次进度写入携带，状态切换时立即写入
+                    qr_status = result.get("qr_status", "waiting")
+                    qr_cache = QrCodeCache()
+                    qr_cache.save(self.request.id, result["qr_code"], qr_status)
+                    progress_callback.set_meta(qr_code=result["qr_code"], qr_status=qr_status)
+                    progress_callback.update("请使用微博APP扫描二维码", force=True)
                     
-                    if qr_status == "confirmed":
-                        # 登录成功
-                        return {
-                            "success": True,
-                            "user_info": status_result.get("user_info", {}),
-                            "message": "扫码登录成功",
-                            "login_method": login_method
-                        }
-                    elif qr_status == "expired":
-                        # 二维码过期
-                        return {
-                            "success": False,
-                            "error": "二维码已过期，请重新登录",
-                            "login_method": login_method
-                        }
-                    elif qr_status == "error":
-                        # 登录错误
+                    # 监听二维码页面的状态事件，状态变化时立即推送（不再轮询LLM）
+                    watcher = await agent.watch_qr_login()
+                    if watcher is None:
                         return {
                             "success": False,
-                            "error": status_result.get("error", "扫码登录失败"),
+                            "error": "扫码登录需要持久浏览器会话",
                             "login_method": login_method
                         }
-                
-                # 超时
-                return {
-                    "success": False,
-                    "error": "扫码登录超时，请重新尝试",
-                    "login_method": login_method
-                }
-            else:
+                    
+                    deadline = time.monotonic() + settings.qr_login_timeout
+                    refreshes = 0
+                    try:
+                        while True:
+                            async for qr_status in watcher.changes(timeout=deadline - time.monotonic()):
+                                qr_cache.set_status(self.request.id, qr_status)
+                                progress_callback.set_meta(qr_status=qr_status)
+                                progress_callback.update(f"扫码状态: {qr_status}", force=True)
+                                
+                                if qr_status == QR_CONFIRMED:
+                                    # 等待跳转回微博写入登录cookie并读取用户信息，再保存会话供后续任务复用
+                                    progress_callback.update("扫码已确认，正在获取用户信息...", force=True)
+                                    finished = await agent.finish_qr_login(watcher, settings.qr_redirect_timeout)
+                                    if not finished["success"]:
+                                        qr_cache.set_status(self.request.id, finished["qr_status"])
+                                        return {
+                                            **finished,
+                                            "login_method": login_method
+                                        }
+                                    await _persist_session(session, self.request.hostname)
+                                    return {
+                                        "success": True,
+                                        "user_info": finished["user_info"],
+                                        "message": "扫码登录成功",
+                                        "login_method": login_method
+                                    }
+                            
+                            if watcher.status != QR_EXPIRED:
+                                break
+                            
+                            # 二维码过期：刷新并缓存新二维码后继续监听
+                            if refreshes >= settings.qr_max_refreshes:
+                                return {
+                                    "success": False,
+                                    "error": "二维码已过期，请重新登录",
+                                    "login_method": login_method
+                                }
+                            refreshed = await agent.refresh_qr_code()
+                            if not refreshed["success"]:
+                                return {
+                                    "success": False,
+                                    "error": refreshed.get("error", "刷新二维码失败"),
+                                    "login_method": login_method
+                                }
+                            refreshes += 1
+                            watcher.reset()
+                            qr_cache.save(self.request.id, refreshed["qr_code"])
+                            progress_callback.set_meta(qr_code=refreshed["qr_code"], qr_status=watcher.status)
+                            progress_callback.update("二维码已过期，已自动刷新，请重新扫描", force=True)
+                    finally:
+                        watcher.stop()
+                    
+                    # 超时
+                    return {
+                        "success": False,
+                        "error": "扫码登录超时，请重新尝试",
+                        "login_method": login_method
+                    }
+                else:
+                    return {
+                        "success": False,
+                        "error": result.get("error", "生成二维码失败"),
+                        "login_method": login_method
+                    }
+                    
+            except Exception as e:
+                logger.error(f"扫码登录任务异常: {str(e)}")
                 return {
                     "success": False,
-                    "error": result.get("error", "生成二维码失败"),
+                    "error": f"扫码登录过程中出现异常: {str(e)}",
                     "login_method": login_method
                 }
-                
-        except Exception as e:
-            logger.error(f"扫码登录任务异常: {str(e)}")
-            return {
-                "success": False,
-                "error": f"扫码登录过程中出现异常: {str(e)}",
-                "login_method": login_method
-            }
     
     async def password_login_task():
         """异步密码登录任务"""
-        agent = get_weibo_agent()
-        try:
-            # 更新任务状态
-            progress_callback("初始化浏览器...")
-            
-            # 执行密码登录
-            result = await agent.login_weibo(username, password, False, progress_callback)
-            
-            if result["success"]:
-                progress_callback("登录成功，获取用户信息...")
+        async with get_session_registry().session(account_id) as session:
+            agent = session.agent
+            try:
+                # 更新任务状态
+                progress_callback("初始化浏览器...")
                 
-                return {
-                    "success": True,
-                    "user_info": result.get("user_info", {}),
-                    "message": "密码登录成功",
-                    "username": username,
-                    "login_method": login_method
-                }
-            else:
+                # 执行密码登录
+                result = await agent.login_weibo(username, password, False, progress_callback)
+                
+                if result["success"]:
+                    progress_callback("登录成功，获取用户信息...")
+                    await _persist_session(session, self.request.hostname)
+                    
+                    return {
+                        "success": True,
+                        "user_info": result.get("user_info", {}),
+                        "message": "密码登录成功",
+                        "username": username,
+                        "login_method": login_method
+                    }
+                else:
+                    return {
+                        "success": False,
+                        "error": result.get("error", "密码登录失败"),
+                        "username": username,
+                        "login_method": login_method
+                    }
+                    
+            except Exception as e:
+                logger.error(f"密码登录任务异常: {str(e)}")
                 return {
                     "success": False,
-                    "error": result.get("error", "密码登录失败"),
+                    "error": f"密码登录过程中出现异常: {str(e)}",
                     "username": username,
                     "login_method": login_method
                 }
-                
-        except Exception as e:
-            logger.error(f"密码登录任务异常: {str(e)}")
-            return {
-                "success": False,
-                "error": f"密码登录过程中出现异常: {str(e)}",
-                "username": username,
-                "login_method": login_method
-            }
     
     try:
         if use_qr:
@@ -211,15 +463,59 @@ def login_weibo_task(self, username: str = None, password: str = None, use_qr: b
             "error": f"任务执行异常: {str(e)}",
             "login_method": login_method
         }
+    finally:
+        progress_callback.close()
+
 
+def _chunk_posts(posts: List[Dict[str, Any]], chunk_size: int) -> List[List[Dict[str, Any]]]:
+    """将微博列表按固定大小切分为多个分片"""
+    chunk_size = max(chunk_size, 1)
+    return [posts[i:i + chunk_size] for i in range(0, len(posts), chunk_size)]
 
-@celery_app.task(bind=True, name="analyze_weibo_content")
+
+def _summarize_analysis(
+    chunk_counts: List[Dict[str, int]],
+    criteria: Dict[str, Any],
+    user_id: str
+) -> Dict[str, Any]:
+    """汇总各分片的风险等级计数（逐条结果保存在结果存储中）"""
+    fields = ["total_analyzed", "high_risk_count", "medium_risk_count", "low_risk_count"]
+    
+    return {
+        "success": True,
+        **{field: sum(counts[field] for counts in chunk_counts) for field in fields},
+        "criteria": criteria,
+        "user_id": user_id
+    }
+
+
+def _settle_analysis_dedup(task_id: str, user_id: str, criteria: Dict[str, Any], success: bool):
+    """分析任务结束后更新去重登记：成功后在去重窗口内继续复用，失败立即取消"""
+    try:
+        dedup = RequestDeduplicator()
+        if not dedup.enabled:
+            return
+        fingerprint = analysis_fingerprint(user_id, criteria)
+        if success:
+            dedup.finish(fingerprint, task_id)
+        else:
+            dedup.release(fingerprint, task_id)
+    except Exception as e:
+        logger.warning(f"更新分析去重登记失败: {str(e)}")
+
+
+@celery_app.task(bind=True, name=ANALYZE_TASK)
 def analyze_weibo_content(self, user_id: str, criteria: Dict[str, Any]) -> Dict[str, Any]:
     """
     分析微博内容任务
     
+    在已登录的worker上获取微博列表；微博数量超过一个分片时，
+    将评分工作拆分为多个分片子任务，通过chord在整个集群上并行执行，
+    并由 merge_analysis_results 汇总计数（结果写回本任务ID）。
+    逐条分析结果保存在结果存储中，任务结果只包含汇总计数。
+    
     Args:
-        user_id: 用户ID
+        user_id: 账号ID
         criteria: 分析条件
         
     Returns:
@@ -227,165 +523,367 @@ def analyze_weibo_content(self, user_id: str, criteria: Dict[str, Any]) -> Dict[
     """
     logger.info(f"开始分析用户 {user_id} 的微博内容")
     
-    def progress_callback(message: str):
-        """进度回调函数"""
-        current_task.update_state(
-            state="PROGRESS",
-            meta={"message": message, "user_id": user_id}
-        )
+    progress_callback = ProgressReporter(self.request.id, {"user_id": user_id})
     
-    async def analyze_task():
-        """异步分析任务"""
-        agent = get_weibo_agent()
-        try:
-            # 检查是否已登录
-            if not agent.is_logged_in:
-                return {
-                    "success": False,
-                    "error": "请先登录微博账号",
-                    "user_id": user_id
-                }
-            
-            # 更新任务状态
-            progress_callback("开始分析微博内容...")
-            
-            # 执行分析
-            result = await agent.analyze_posts(criteria, progress_callback)
-            
-            if result["success"]:
-                progress_callback("分析完成，正在整理结果...")
+    async def fetch_task():
+        """异步获取待分析微博"""
+        async with get_session_registry().session(user_id) as session:
+            agent = session.agent
+            try:
+                # 检查是否已登录
+                if not await _restore_session(session, self.request.hostname):
+                    return {
+                        "success": False,
+                        "error": "请先登录微博账号",
+                        "user_id": user_id
+                    }
+                
+                # 更新任务状态
+                progress_callback("开始分析微博内容...")
+                
+                result = await agent.fetch_posts(criteria, progress_callback)
                 
-                # 按风险分数排序
-                analyzed_posts = result["data"]
-                analyzed_posts.sort(key=lambda x: x["risk_score"], reverse=True)
+                if not result["success"]:
+                    return {
+                        "success": False,
+                        "error": result.get("error", "分析失败"),
+                        "user_id": user_id
+                    }
+                
+                return {"success": True, "weibos": result["weibos"]}
                 
+            except Exception as e:
+                logger.error(f"分析任务异常: {str(e)}")
                 return {
-                    "success": True,
-                    "total_analyzed": result["total_analyzed"],
-                    "high_risk_count": len([p for p in analyzed_posts if p["risk_score"] >= 7]),
-                    "medium_risk_count": len([p for p in analyzed_posts if 4 <= p["risk_score"] < 7]),
-                    "low_risk_count": len([p for p in analyzed_posts if p["risk_score"] < 4]),
-                    "analyzed_posts": analyzed_posts,
-                    "criteria": criteria,
+                    "success": False,
+                    "error": f"分析过程中出现异常: {str(e)}",
                     "user_id": user_id
                 }
-            else:
+    
+    async def score_inline_task(weibos: List[Dict[str, Any]]):
+        """在当前worker上直接评分（单分片时避免调度开销）"""
+        async with get_session_registry().session(user_id) as session:
+            agent = session.agent
+            try:
+                progress_callback(f"开始分析 {len(weibos)} 条微博...")
+                analyzed_posts = await agent.score_posts(weibos, progress_callback)
+                progress_callback("分析完成，正在整理结果...", len(weibos), len(weibos))
+                AnalysisResultStore().save_posts(self.request.id, analyzed_posts)
+                return _summarize_analysis([risk_counts(analyzed_posts)], criteria, user_id)
+            except Exception as e:
+                logger.error(f"分析任务异常: {str(e)}")
                 return {
                     "success": False,
-                    "error": result.get("error", "分析失败"),
+                    "error": f"分析过程中出现异常: {str(e)}",
                     "user_id": user_id
                 }
-                
-        except Exception as e:
-            logger.error(f"分析任务异常: {str(e)}")
-            return {
-                "success": False,
-                "error": f"分析过程中出现异常: {str(e)}",
-                "user_id": user_id
-            }
     
     try:
-        result = run_async_task(analyze_task())
+        fetched = run_async_task(fetch_task())
         
-        if result["success"]:
-            logger.info(f"用户 {user_id} 的微博分析完成，共分析 {result['total_analyzed']} 条")
-        else:
-            logger.error(f"用户 {user_id} 的微博分析失败: {result.get('error')}")
+        if not fetched["success"]:
+            logger.error(f"用户 {user_id} 的微博分析失败: {fetched.get('error')}")
+            _settle_analysis_dedup(self.request.id, user_id, criteria, False)
+            return fetched
         
-        return result
+        weibos = fetched["weibos"]
+        chunks = _chunk_posts(weibos, settings.analysis_chunk_size)
+        
+        if len(chunks) <= 1:
+            result = run_async_task(score_inline_task(weibos))
+            
+            if result["success"]:
+                logger.info(f"用户 {user_id} 的微博分析完成，共分析 {result['total_analyzed']} 条")
+            else:
+                logger.error(f"用户 {user_id} 的微博分析失败: {result.get('error')}")
+            
+            _settle_analysis_dedup(self.request.id, user_id, criteria, result["success"])
+            return result
+        
+        # 清空跨分片的进度计数（同一任务重新投递时从头计数）
+        SharedProgress(self.request.id).reset()
+        
+        progress_callback.update(
+            f"开始分析 {len(weibos)} 条微博，拆分为 {len(chunks)} 个分片并行处理...",
+            0,
+            len(weibos),
+            force=True
+        )
+        workflow = chord(
+            group(
+                analyze_weibo_chunk.s(self.request.id, user_id, chunk, len(weibos))
+                for chunk in chunks
+            ),
+            merge_analysis_results.s(self.request.id, user_id, criteria)
+        )
+        logger.info(f"用户 {user_id} 的分析任务已拆分为 {len(chunks)} 个分片")
         
     except Exception as e:
         logger.error(f"分析任务执行异常: {str(e)}")
+        _settle_analysis_dedup(self.request.id, user_id, criteria, False)
         return {
             "success": False,
             "error": f"任务执行异常: {str(e)}",
             "user_id": user_id
         }
+    finally:
+        progress_callback.close()
+    
+    # 用chord替换当前任务，汇总结果将写回本任务ID
+    return self.replace(workflow)
 
 
-@celery_app.task(bind=True, name="delete_weibo_posts")
-def delete_weibo_posts(self, user_id: str, post_ids: List[str]) -> Dict[str, Any]:
+@celery_app.task(bind=True, name=ANALYZE_CHUNK_TASK)
+def analyze_weibo_chunk(
+    self,
+    parent_task_id: str,
+    user_id: str,
+    weibos: List[Dict[str, Any]],
+    total: int
+) -> Dict[str, int]:
+    """
+    分析微博分片任务
+    
+    Args:
+        parent_task_id: 父分析任务ID，用于汇总进度和保存结果
+        user_id: 账号ID
+        weibos: 本分片的微博列表
+        total: 全部分片的微博总数
+        
+    Returns:
+        本分片的风险等级计数
+    """
+    # 所有分片共享父任务的完成计数，按微博ID登记，分片重新投递时不会重复计数
+    progress = SharedProgress(parent_task_id, total, "分析进度: {current}/{total}", {"user_id": user_id})
+    
+    def on_scored(post: Dict[str, Any]):
+        """单条评分完成后汇总到父任务进度"""
+        try:
+            progress.add([post.get("post_id", "")])
+        except Exception as e:
+            logger.warning(f"更新分片分析进度失败: {str(e)}")
+    
+    agent = get_scoring_agent()
+    try:
+        analyzed_posts = run_async_task(agent.score_posts(weibos, on_scored=on_scored))
+    except Exception as e:
+        logger.error(f"分片分析异常，使用关键词检测兜底: {str(e)}")
+        analyzed_posts = [agent._simple_risk_analysis(weibo) for weibo in weibos]
+        try:
+            progress.add([post.get("post_id", "") for post in analyzed_posts])
+        except Exception as e:
+            logger.warning(f"更新分片分析进度失败: {str(e)}")
+    
+    AnalysisResultStore().save_posts(parent_task_id, analyzed_posts)
+    
+    # 向父任务的事件流推送本分片的部分结果
+    try:
+        publish_task_event(parent_task_id, "partial", {
+            "posts": [compact_post(post) for post in analyzed_posts]
+        })
+    except Exception as e:
+        logger.warning(f"推送分片部分结果失败: {str(e)}")
+    
+    return risk_counts(analyzed_posts)
+
+
+@celery_app.task(bind=True, name=MERGE_ANALYSIS_TASK)
+def merge_analysis_results(
+    self,
+    chunk_results: List[Dict[str, int]],
+    parent_task_id: str,
+    user_id: str,
+    criteria: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    汇总分片分析结果（chord回调）
+    
+    Args:
+        chunk_results: 各分片的风险等级计数
+        parent_task_id: 父分析任务ID
+        user_id: 账号ID
+        criteria: 分析条件
+        
+    Returns:
+        分析结果
+    """
+    result = _summarize_analysis(chunk_results, criteria, user_id)
+    
+    try:
+        SharedProgress(parent_task_id).reset()
+    except Exception as e:
+        logger.warning(f"清理分片分析进度失败: {str(e)}")
+    
+    _settle_analysis_dedup(parent_task_id, user_id, criteria, True)
+    logger.info(f"用户 {user_id} 的微博分析完成，共分析 {result['total_analyzed']} 条")
+    return result
+
+
+async def _hold_job_lock(jobs: DeletionJobStore, job_id: str, task_id: str, coro):
+    """
+    执行删除期间定期续期执行锁（每1/3过期时间一次），执行结束后停止续期
+    
+    Args:
+        jobs: 检查点存储
+        job_id: 删除任务ID
+        task_id: 持有锁的Celery任务ID
+        coro: 删除协程
+        
+    Returns:
+        删除协程的结果
+    """
+    ttl = settings.deletion_lock_ttl
+    
+    async def renew():
+        while True:
+            await asyncio.sleep(ttl / 3)
+            try:
+                if not jobs.refresh_lock(job_id, task_id, ttl):
+                    logger.warning(f"删除任务 {job_id} 的执行锁已不由本任务持有")
+            except Exception as e:
+                logger.warning(f"续期删除任务锁失败: {str(e)}")
+    
+    renewer = asyncio.create_task(renew())
+    try:
+        return await coro
+    finally:
+        renewer.cancel()
+
+
+@celery_app.task(bind=True, name=DELETE_TASK)
+def delete_weibo_posts(
+    self,
+    user_id: str,
+    post_ids: List[str],
+    job_id: Optional[str] = None
+) -> Dict[str, Any]:
     """
     批量删除微博任务
     
+    每条微博删除后立即保存检查点，同一删除任务重试或恢复时跳过已确认删除的微博
+    
     Args:
-        user_id: 用户ID
+        user_id: 账号ID
         post_ids: 要删除的微博ID列表
+        job_id: 删除任务ID，默认为本次Celery任务ID（恢复中断的任务时传入原任务ID）
         
     Returns:
         删除结果
     """
-    logger.info(f"开始为用户 {user_id} 批量删除 {len(post_ids)} 条微博")
-    
-    def progress_callback(message: str, current: int, total: int):
-        """进度回调函数"""
-        progress = int((current / total) * 100)
-        current_task.update_state(
-            state="PROGRESS",
-            meta={
-                "message": message,
-                "current": current,
-                "total": total,
-                "progress": progress,
-                "user_id": user_id
-            }
-        )
+    job_id = job_id or self.request.id
+    jobs = DeletionJobStore()
     
-    async def delete_task():
+    progress_callback = ProgressReporter(self.request.id, {"user_id": user_id, "job_id": job_id})
+    
+    async def delete_task(pending: List[str], deleted: Set[str]):
         """异步删除任务"""
-        agent = get_weibo_agent()
-        try:
-            # 检查是否已登录
-            if not agent.is_logged_in:
+        async with get_session_registry().session(user_id) as session:
+            agent = session.agent
+            try:
+                # 检查是否已登录
+                if not await _restore_session(session, self.request.hostname):
+                    return {
+                        "success": False,
+                        "error": "请先登录微博账号",
+                        "user_id": user_id,
+                        "job_id": job_id
+                    }
+                
+                # 更新任务状态
+                progress_callback("初始化删除代理...", 0, len(pending))
+                
+                # 执行批量删除：多个标签页并行，每条删除前从账号的令牌桶获取额度，间隔按账号学到的节奏调整，
+                # 每条删除完成后保存检查点，整批删除后获取一次时间线统一校验
+                result = await agent.batch_delete_posts(
+                    pending,
+                    progress_callback,
+                    rate_limiter=session.delete_budget,
+                    pacer=AdaptivePacer.for_account(user_id, "delete"),
+                    concurrency=settings.deletion_concurrency,
+                    strategy=settings.deletion_strategy,
+                    result_callback=lambda record: jobs.record(job_id, record),
+                    verify=settings.deletion_verify_enabled
+                )
+                
+                # 之前执行中已确认删除的微博计入成功列表
+                records = jobs.records(job_id)
+                skipped = [records[post_id] for post_id in post_ids if post_id in deleted]
+                successful_deletes = skipped + result["successful_deletes"]
+                
                 return {
-                    "success": False,
-                    "error": "请先登录微博账号",
+                    "success": True,
+                    "job_id": job_id,
+                    "total_requested": len(post_ids),
+                    "successful_count": len(successful_deletes),
+                    "failed_count": result["failed_count"],
+                    "skipped_count": len(skipped),
+                    "successful_deletes": successful_deletes,
+                    "failed_deletes": result["failed_deletes"],
+                    "throughput": result["throughput"],
+                    "verification": result.get("verification"),
+                    "completion_time": result["completion_time"],
                     "user_id": user_id
                 }
-            
-            # 更新任务状态
-            progress_callback("初始化删除代理...", 0, len(post_ids))
-            
-            # 执行批量删除
-            result = await agent.batch_delete_posts(post_ids, progress_callback)
-            
-            return {
-                "success": True,
-                "total_requested": result["total_requested"],
-                "successful_count": result["successful_count"],
-                "failed_count": result["failed_count"],
-                "successful_deletes": result["successful_deletes"],
-                "failed_deletes": result["failed_deletes"],
-                "completion_time": result["completion_time"],
-                "user_id": user_id
-            }
-            
-        except Exception as e:
-            logger.error(f"删除任务异常: {str(e)}")
+                
+            except Exception as e:
+                logger.error(f"删除任务异常: {str(e)}")
+                return {
+                    "success": False,
+                    "error": f"删除过程中出现异常: {str(e)}",
+                    "user_id": user_id,
+                    "job_id": job_id
+                }
+    
+    try:
+        # 同一删除任务只允许一个执行者（worker崩溃后重新投递的同一任务可以重入）
+        if not jobs.lock(job_id, self.request.id, settings.deletion_lock_ttl):
+            logger.warning(f"删除任务 {job_id} 正在执行，忽略重复提交")
             return {
                 "success": False,
-                "error": f"删除过程中出现异常: {str(e)}",
-                "user_id": user_id
+                "error": "该删除任务正在执行中",
+                "user_id": user_id,
+                "job_id": job_id
             }
-    
-    try:
-        result = run_async_task(delete_task())
+        
+        jobs.start(job_id, user_id, post_ids, self.request.id)
+        deleted = jobs.deleted_ids(job_id)
+        pending = [post_id for post_id in post_ids if post_id not in deleted]
+        
+        logger.info(
+            f"开始为用户 {user_id} 批量删除 {len(pending)} 条微博"
+            f"（删除任务 {job_id}，跳过已确认删除的 {len(post_ids) - len(pending)} 条）"
+        )
+        
+        result = run_async_task(_hold_job_lock(jobs, job_id, self.request.id, delete_task(pending, deleted)))
         
         if result["success"]:
+            jobs.finish(job_id, JOB_COMPLETED if result["successful_count"] == len(post_ids) else JOB_PARTIAL)
             logger.info(
                 f"用户 {user_id} 的微博删除完成，"
                 f"成功: {result['successful_count']}, "
                 f"失败: {result['failed_count']}"
             )
         else:
+            jobs.finish(job_id, JOB_INTERRUPTED)
             logger.error(f"用户 {user_id} 的微博删除失败: {result.get('error')}")
         
         return result
-        
+    
     except Exception as e:
         logger.error(f"删除任务执行异常: {str(e)}")
+        try:
+            jobs.finish(job_id, JOB_INTERRUPTED)
+        except Exception:
+            pass
         return {
             "success": False,
             "error": f"任务执行异常: {str(e)}",
-            "user_id": user_id
-        } 
\ No newline at end of file
+            "user_id": user_id,
+            "job_id": job_id
+        }
+    finally:
+        progress_callback.close()
+        try:
+            jobs.unlock(job_id, self.request.id)
+        except Exception as e:
+            logger.warning(f"释放删除任务锁失败: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+自动扩缩容合成负载演练
+
+连接本地Redis（请使用空闲的库，如 redis://localhost:6379/15），向共享队列写入一波突发的
+删除和分析任务消息，用模拟的worker池按固定速度消费，逐轮运行扩缩容控制器，
+输出每一轮的排队数、最老任务等待时间、worker数和会话上限。时钟为模拟时钟，一轮代表10秒
+
+运行方式（在backend目录下）:
+    REDIS_URL=redis://localhost:6379/15 python -m benchmarks.autoscale_synthetic
+"""
+
+import os
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "sk-benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+import json
+
+from app.core.autoscaler import SHARED_QUEUES, Autoscaler
+from app.core.priorities import queue_keys
+from app.core.redis_client import get_redis
+from app.core.tracing import ENQUEUED_AT_HEADER
+
+TICK_SECONDS = 10
+TASKS_PER_WORKER_TICK = 2  # 每个worker每轮完成的任务数
+
+
+class SimulatedPool:
+    """按固定速度从共享队列取出任务的模拟worker池"""
+
+    def __init__(self, redis_client, workers: int = 1):
+        self.redis = redis_client
+        self.workers = [f"sim{i + 1}@local" for i in range(workers)]
+        self.draining_workers = []
+        self._next_index = workers + 1
+
+    def active(self):
+        return [hostname for hostname in self.workers if hostname not in self.draining_workers]
+
+    def draining(self):
+        return list(self.draining_workers)
+
+    def start(self):
+        self.workers.append(f"sim{self._next_index}@local")
+        self._next_index += 1
+
+    def drain(self, hostname):
+        self.draining_workers.append(hostname)
+
+    def poll(self):
+        # 排空中的worker本轮即退出（模拟专属队列已空）
+        exited, self.draining_workers = self.draining_workers, []
+        self.workers = [hostname for hostname in self.workers if hostname not in exited]
+        return exited
+
+    def consume(self):
+        """每个worker按优先级取出任务"""
+        budget = len(self.active()) * TASKS_PER_WORKER_TICK
+        for key in (key for step in range(4) for key in (queue_keys(q)[step] for q in SHARED_QUEUES)):
+            while budget and self.redis.rpop(key) is not None:
+                budget -= 1
+
+
+def enqueue(redis_client, task: str, key: str, count: int, now: float):
+    for _ in range(count):
+        redis_client.lpush(key, json.dumps({"headers": {"task": task, ENQUEUED_AT_HEADER: int(now * 1e9)}}))
+
+
+def main():
+    redis_client = get_redis()
+    for queue in SHARED_QUEUES:
+        redis_client.delete(*queue_keys(queue))
+
+    clock = [0.0]
+    pool = SimulatedPool(redis_client)
+    scaler = Autoscaler(pool, redis_client, clock=lambda: clock[0])
+
+    print(f"{'t(s)':<8}{'depth':>8}{'oldest(s)':>12}{'workers':>10}{'target':>8}{'sessions':>10}  draining")
+    for tick in range(60):
+        if tick == 1:
+            # 清理活动：突发的删除与分析任务
+            enqueue(redis_client, "delete_weibo_posts", "deletion:3", 20, clock[0])
+            enqueue(redis_client, "analyze_weibo_content", "analysis:6", 40, clock[0])
+        if tick == 30:
+            enqueue(redis_client, "login_weibo_task", "login", 3, clock[0])
+
+        result = scaler.tick()
+        oldest = "-" if result["oldest_age"] is None else f"{result['oldest_age']:.0f}"
+        print(
+            f"{clock[0]:<8.0f}{result['depth']:>8}{oldest:>12}{result['current_workers']:>10}"
+            f"{result['workers']:>8}{result['session_capacity']:>10}  {','.join(result['draining'])}"
+        )
+
+        pool.consume()
+        clock[0] += TICK_SECONDS
+
+
+if __name__ == "__main__":
+    main()
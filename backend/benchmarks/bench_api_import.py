@@ -0,0 +1,62 @@
+"""
+API冷启动基准测试
+
+分别在全新的解释器中导入API应用（app.main）和worker任务模块（app.tasks.weibo_tasks），
+记录导入耗时、进程常驻内存峰值，以及是否加载了浏览器相关依赖。
+API进程按名称投递任务，不应加载browser_use、langchain_openai和Playwright
+
+运行方式（在backend目录下）:
+    python -m benchmarks.bench_api_import
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ["browser_use", "langchain_openai", "playwright", "app.agents.weibo_agent"]
+
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules": len(sys.modules),
+    "heavy": [name for name in {heavy!r} if name in sys.modules]
+}}))
+"""
+
+
+def measure(module: str) -> dict:
+    """在新的解释器中导入模块并返回测量结果"""
+    env = {
+        **os.environ,
+        "DEEPSEEK_API_KEY": os.environ.get("DEEPSEEK_API_KEY", "sk-benchmark"),
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark-secret-key"),
+    }
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(runs: int = 3):
+    print(f"{'process':<10}{'module':<26}{'import s':>10}{'rss MB':>10}{'modules':>9}  heavy imports")
+    for label, module in (("api", "app.main"), ("worker", "app.tasks.weibo_tasks")):
+        results = [measure(module) for _ in range(runs)]
+        best = min(results, key=lambda item: item["seconds"])
+        print(
+            f"{label:<10}{module:<26}{best['seconds']:>10.2f}{best['max_rss_mb']:>10.0f}"
+            f"{best['modules']:>9}  {', '.join(best['heavy']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
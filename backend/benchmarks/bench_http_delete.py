@@ -0,0 +1,57 @@
+"""
+HTTP删除吞吐量基准测试
+
+在本地桩服务上（进程内ASGI传输，每个请求模拟50ms网络延迟）用HTTP删除后端
+删除500条微博，对比不同并发标签页数下的吞吐量，不经过令牌桶和节奏控制
+
+运行方式（在backend目录下）:
+    python -m benchmarks.bench_http_delete
+"""
+
+import asyncio
+import os
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "sk-benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+import httpx
+
+from app.agents.deletion_executor import DeletionExecutor
+from app.agents.http_deleter import HttpDeleter
+from benchmarks.weibo_stub_server import create_app
+
+COOKIES = [
+    {"name": "SUB", "value": "benchmark", "domain": "weibo.test"},
+    {"name": "XSRF-TOKEN", "value": "benchmark", "domain": "weibo.test"}
+]
+
+
+async def run(post_count: int, concurrency: int, latency: float):
+    stub = create_app(latency=latency)
+    deleter = HttpDeleter(
+        COOKIES,
+        base_url="http://weibo.test",
+        max_connections=concurrency,
+        transport=httpx.ASGITransport(app=stub)
+    )
+    try:
+        executor = DeletionExecutor([deleter] * concurrency)
+        return await executor.run([str(i) for i in range(post_count)])
+    finally:
+        await deleter.close()
+
+
+def main():
+    post_count, latency = 500, 0.05
+    print(f"{'tabs':<8}{'deleted':>10}{'seconds':>10}{'per minute':>14}")
+    for concurrency in (1, 2, 4, 8):
+        result = asyncio.run(run(post_count, concurrency, latency))
+        throughput = result["throughput"]
+        print(
+            f"{concurrency:<8}{result['successful_count']:>10}"
+            f"{throughput['elapsed_seconds']:>10.2f}{throughput['deletions_per_minute']:>14,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+微博列表提取token基准测试
+
+对比获取100条微博时LLM需要处理的token数：
+- 抄写：LLM读取页面上的微博文字，再按提示词的JSON格式逐条写出（原 get_user_weibos 的做法）
+- 动作：LLM调用 scroll_and_collect，页面脚本直接保存记录，LLM只读写条数摘要
+
+抄写一栏只计入每条微博被读取一次和写出一次的token，不含每一步重复发送的页面状态和历史消息，
+是节省量的下限。token数按DeepSeek公布的换算估算（1个中文字符约0.6个token，1个英文字符约0.3个token），
+可以加载tiktoken的cl100k_base编码时同时输出其计数作为参照
+
+运行方式（在backend目录下）:
+    python -m benchmarks.bench_post_extraction
+"""
+
+import os
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "sk-benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+import json
+import random
+import re
+from datetime import datetime, timedelta
+
+from app.agents.weibo_actions import PostCollector, normalize_card
+
+POST_COUNT = 100
+SENTENCES = [
+    "今天终于把拖了很久的项目上线了，感谢一起熬夜的同事们",
+    "周末去爬山，山顶的风景真的太美了，下次还要再来",
+    "这家新开的火锅店味道一般，排队一个小时有点不值",
+    "转发一下朋友的招聘信息，有兴趣的可以私信我",
+    "读完了这本书，作者对城市变迁的描写很打动人",
+    "地铁又晚点了，早高峰的通勤真是越来越难熬",
+    "记录一下今天的跑步：10公里，配速五分半",
+    "新买的相机到了，晚上出去拍几张夜景试试",
+]
+
+
+def estimate_tokens(text: str) -> float:
+    """按DeepSeek公布的字符换算估算token数"""
+    cjk = len(re.findall(r"[　-〿一-鿿＀-￯]", text))
+    return cjk * 0.6 + (len(text) - cjk) * 0.3
+
+
+def cl100k_counter():
+    """tiktoken的cl100k_base计数器，编码无法加载（如离线）时返回None"""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+    return lambda text: len(encoding.encode(text))
+
+
+def synthetic_cards(count: int):
+    """生成页面脚本返回格式的微博卡片"""
+    rng = random.Random(42)
+    now = datetime(2024, 6, 30, 20, 0)
+    cards = []
+    for index in range(count):
+        published = now - timedelta(hours=index * 7 + rng.randint(0, 6))
+        cards.append({
+            "id": str(5017000000000000 + rng.randint(0, 10 ** 12)),
+            "url": f"https://weibo.com/1234567890/O{rng.getrandbits(40):x}",
+            "time": published.strftime("%m-%d %H:%M"),
+            "content": "，".join(rng.sample(SENTENCES, rng.randint(1, 3))) + "。",
+            "repost": rng.choice(["转发", str(rng.randint(1, 99))]),
+            "comment": rng.choice(["评论", str(rng.randint(1, 300))]),
+            "like": rng.choice(["赞", str(rng.randint(1, 999)), "1.2万"]),
+            "media": rng.random() < 0.4
+        })
+    return cards
+
+
+def transcription_texts(posts):
+    """抄写：读取的页面文字和写出的JSON"""
+    read = "\n".join(
+        f"{post['publish_time']} {post['content']} 转发 {post['repost_count']} "
+        f"评论 {post['comment_count']} 赞 {post['like_count']} {post['url']}"
+        for post in posts
+    )
+    written = json.dumps(
+        {"success": True, "weibos": posts, "total_count": len(posts)},
+        ensure_ascii=False,
+        indent=4
+    )
+    return read, written
+
+
+def action_texts(cards):
+    """动作：读取的动作摘要和写出的动作调用"""
+    collector = PostCollector()
+    summary = collector.summary(len(collector.add(cards)))
+    written = json.dumps(
+        [{"scroll_and_collect": {"max_count": len(cards)}}, {"done": {"text": f"已收集 {len(cards)} 条微博"}}],
+        ensure_ascii=False
+    )
+    return summary, written
+
+
+def main():
+    cards = synthetic_cards(POST_COUNT)
+    posts = [normalize_card(card) for card in cards]
+    rows = [
+        ("transcribe", *transcription_texts(posts)),
+        ("actions", *action_texts(cards)),
+    ]
+
+    counters = [("est", estimate_tokens)]
+    cl100k = cl100k_counter()
+    if cl100k:
+        counters.append(("cl100k", cl100k))
+
+    print(f"{POST_COUNT} posts")
+    header = f"{'mode':<12}" + "".join(f"{f'{name} in':>12}{f'{name} out':>12}" for name, _ in counters)
+    print(header)
+    totals = {}
+    for mode, read, written in rows:
+        line = f"{mode:<12}"
+        for name, count in counters:
+            tokens_in, tokens_out = count(read), count(written)
+            totals[(mode, name)] = tokens_in + tokens_out
+            line += f"{tokens_in:>12,.0f}{tokens_out:>12,.0f}"
+        print(line)
+
+    for name, _ in counters:
+        before, after = totals[("transcribe", name)], totals[("actions", name)]
+        print(f"{name}: {before:,.0f} -> {after:,.0f} tokens per {POST_COUNT} posts ({1 - after / before:.1%} fewer)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Celery载荷序列化基准测试
+
+对比json与msgpack（含gzip/zstd压缩）在1000条分析结果上的载荷大小与编解码耗时
+
+运行方式（在backend目录下）:
+    python -m benchmarks.bench_serialization
+"""
+
+import gzip
+import os
+import random
+import timeit
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "sk-benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+from kombu.serialization import dumps as kombu_dumps, loads as kombu_loads
+
+from app.core import serialization
+
+
+def build_posts(count: int = 1000):
+    """生成与分析任务输出结构一致的模拟结果"""
+    random.seed(42)
+    categories = ["政治敏感", "负面情绪", "商业推广", "关键词检测", "个人隐私"]
+    posts = []
+    for i in range(count):
+        content = "这是一条用于基准测试的微博内容，包含若干中文字符和话题#测试# " * random.randint(1, 6)
+        original = {
+            "id": str(4900000000000000 + i),
+            "content": content,
+            "publish_time": "2024-05-01 12:00:00",
+            "repost_count": random.randint(0, 500),
+            "comment_count": random.randint(0, 500),
+            "like_count": random.randint(0, 5000),
+            "has_media": bool(i % 3),
+            "url": f"https://weibo.com/1234567890/{4900000000000000 + i}"
+        }
+        posts.append({
+            "post_id": original["id"],
+            "content": content[:200] + "..." if len(content) > 200 else content,
+            "date": original["publish_time"],
+            "risk_score": round(random.uniform(0, 10), 1),
+            "risk_reason": "包含高风险关键词: 敏感; 可能引起争议",
+            "risk_category": random.choice(categories),
+            "suggestion": "建议人工审核",
+            "url": original["url"],
+            "original_weibo": original
+        })
+    return posts
+
+
+def measure(name, encode, decode, payload, number=20):
+    """测量编码/解码耗时和载荷大小"""
+    encoded = encode(payload)
+    encode_ms = timeit.timeit(lambda: encode(payload), number=number) / number * 1000
+    decode_ms = timeit.timeit(lambda: decode(encoded), number=number) / number * 1000
+    assert decode(encoded) == payload
+    print(f"{name:<24}{len(encoded):>12,}{encode_ms:>12.2f}{decode_ms:>12.2f}")
+
+
+def main():
+    payload = {"success": True, "analyzed_posts": build_posts(1000)}
+
+    def json_encode(obj):
+        return kombu_dumps(obj, serializer="json")[2].encode("utf-8")
+
+    def json_decode(data):
+        return kombu_loads(data.decode("utf-8"), "application/json", "utf-8")
+
+    def json_gzip_encode(obj):
+        return gzip.compress(json_encode(obj), compresslevel=6)
+
+    def json_gzip_decode(data):
+        return json_decode(gzip.decompress(data))
+
+    zstd_backend = serialization.zstandard
+
+    def msgpack_gzip_encode(obj):
+        serialization.zstandard = None
+        try:
+            return serialization.dumps(obj)
+        finally:
+            serialization.zstandard = zstd_backend
+
+    print(f"{'serializer':<24}{'bytes':>12}{'encode ms':>12}{'decode ms':>12}")
+    measure("json", json_encode, json_decode, payload)
+    measure("json + gzip", json_gzip_encode, json_gzip_decode, payload)
+    measure("msgpack", lambda obj: serialization.dumps(obj, threshold=1 << 62), serialization.loads, payload)
+    measure("msgpack + gzip", msgpack_gzip_encode, serialization.loads, payload)
+    if zstd_backend is not None:
+        measure("msgpack + zstd", serialization.dumps, serialization.loads, payload)
+
+
+if __name__ == "__main__":
+    main()
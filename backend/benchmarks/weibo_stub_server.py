@@ -0,0 +1,75 @@
+"""
+微博删除接口桩服务
+
+模拟 /ajax/statuses/destroy 的三种响应：删除成功、微博不存在、请求过于频繁，
+供HTTP删除后端的测试和基准测试使用，不会访问真实微博
+
+运行方式（在backend目录下）:
+    python -m benchmarks.weibo_stub_server --port 8765
+    然后设置 WEIBO_API_BASE_URL=http://127.0.0.1:8765
+"""
+
+import argparse
+import asyncio
+from typing import Iterable, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_app(
+    post_ids: Optional[Iterable[str]] = None,
+    throttled_ids: Iterable[str] = (),
+    throttle_after: Optional[int] = None,
+    latency: float = 0.0
+) -> FastAPI:
+    """
+    创建桩服务
+
+    Args:
+        post_ids: 存在的微博ID，None表示任意ID都存在（每个ID只能删除一次）
+        throttled_ids: 固定返回限流响应的微博ID
+        throttle_after: 成功删除这么多条后，后续请求都返回限流响应
+        latency: 每个请求的模拟延迟（秒）
+
+    Returns:
+        FastAPI应用，state.deleted 记录已删除的ID
+    """
+    app = FastAPI(title="Weibo stub")
+    app.state.posts = set(post_ids) if post_ids is not None else None
+    app.state.deleted = []
+    throttled = set(throttled_ids)
+
+    @app.post("/ajax/statuses/destroy")
+    async def destroy(request: Request):
+        if latency:
+            await asyncio.sleep(latency)
+
+        if not request.headers.get("x-xsrf-token") or "XSRF-TOKEN" not in request.cookies:
+            return JSONResponse({"ok": 0, "msg": "XSRF校验失败"}, status_code=403)
+
+        post_id = str((await request.json()).get("id", ""))
+        if post_id in throttled or (throttle_after is not None and len(app.state.deleted) >= throttle_after):
+            return JSONResponse({"ok": 0, "msg": "操作过于频繁，请稍后再试"}, status_code=418)
+
+        exists = post_id not in app.state.deleted and (app.state.posts is None or post_id in app.state.posts)
+        if not exists:
+            return JSONResponse({"ok": 0, "errno": "20101", "msg": "该微博不存在"})
+
+        app.state.deleted.append(post_id)
+        return JSONResponse({"ok": 1})
+
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="微博删除接口桩服务")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="每个请求的模拟延迟（秒）")
+    args = parser.parse_args()
+    uvicorn.run(create_app(latency=args.latency), host="127.0.0.1", port=args.port)
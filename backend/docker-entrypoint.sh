@@ -0,0 +1,8 @@
+#!/bin/sh
+# 多进程指标文件按PID命名，只属于本容器：启动时清空上一次运行残留的文件（容器重启后PID会复用）
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
+exec "$@"
@@ -0,0 +1,20 @@
+"""
+测试公共配置
+
+测试中默认关闭链路追踪导出，span不写入工作目录下的追踪文件
+"""
+
+import pytest
+
+from app.core import tracing
+from app.core.config import settings
+
+
+@pytest.fixture(autouse=True)
+def disable_span_export(monkeypatch):
+    """关闭追踪并使用内存导出器（需要追踪的测试自行开启）"""
+    monkeypatch.setattr(settings, "tracing_enabled", False)
+    previous = tracing.get_exporter()
+    tracing.set_exporter(tracing.InMemorySpanExporter())
+    yield
+    tracing.set_exporter(previous)
@@ -0,0 +1,298 @@
+"""
+会话亲和路由测试模块
+
+测试账号归属目录、按归属路由、专属队列只加在消费分析队列的worker上，以及故障转移时的会话恢复
+"""
+
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+
+from app.core import affinity
+from app.core.affinity import SessionDirectory, route_options, worker_queue
+from app.core.config import settings
+from app.tasks.names import ANALYZE_TASK, DELETE_TASK
+from app.tasks import weibo_tasks
+
+
+class FakeRedis:
+    """只实现归属目录用到的命令的内存Redis"""
+
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+        self.zsets = {}
+        self.lists = {}
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = str(value)
+        return True
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def exists(self, key):
+        return int(key in self.values or key in self.hashes)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.hashes.pop(key, None)
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hdel(self, key, field):
+        self.hashes.get(key, {}).pop(field, None)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zrangebyscore(self, key, low, high):
+        zset = self.zsets.get(key, {})
+        return sorted(
+            (member for member, score in zset.items() if float(low) <= score <= float(high)),
+            key=zset.get
+        )
+
+    def zremrangebyscore(self, key, low, high):
+        for member in self.zrangebyscore(key, low, high):
+            del self.zsets[key][member]
+
+    def lpop(self, key):
+        items = self.lists.get(key)
+        return items.pop(0) if items else None
+
+    def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+
+
+class FakeAgent:
+    """模拟持有浏览器的代理"""
+
+    def __init__(self, logged_in=False, state=None):
+        self.is_logged_in = logged_in
+        self.state = state
+        self.imported = None
+
+    async def export_storage_state(self):
+        return self.state
+
+    async def import_storage_state(self, state):
+        self.imported = state
+        return bool(state.get("cookies"))
+
+
+class FakeSession:
+    """模拟账号会话"""
+
+    def __init__(self, account_id, agent):
+        self.account_id = account_id
+        self.agent = agent
+
+
+class TestSessionDirectory:
+    """归属目录测试类"""
+
+    def test_route_to_live_owner(self):
+        """测试账号任务发往在线归属worker的专属队列"""
+        directory = SessionDirectory(FakeRedis())
+        directory.heartbeat("celery@worker-1")
+        directory.claim("alice", "celery@worker-1")
+
+        assert directory.route("alice") == worker_queue("celery@worker-1")
+        assert directory.route("bob") is None
+        assert directory.accounts_of("celery@worker-1") == ["alice"]
+        print("✅ 按归属路由正常")
+
+    def test_dead_owner_falls_back(self):
+        """测试归属worker失联时回落到默认路由"""
+        directory = SessionDirectory(FakeRedis())
+        directory.heartbeat("celery@worker-1")
+        directory.claim("alice", "celery@worker-1")
+
+        directory.mark_offline("celery@worker-1")
+
+        assert directory.owner("alice") is None
+        assert directory.route("alice") is None
+        print("✅ 失联回落正常")
+
+    def test_draining_owner_falls_back(self):
+        """测试归属worker排空时后续任务回落到默认路由，下线后清除排空标记"""
+        directory = SessionDirectory(FakeRedis())
+        directory.heartbeat("celery@worker-1")
+        directory.claim("alice", "celery@worker-1")
+
+        directory.mark_draining("celery@worker-1")
+        assert directory.route("alice") is None
+
+        directory.mark_offline("celery@worker-1")
+        assert directory.is_draining("celery@worker-1") is False
+        print("✅ 排空回落正常")
+
+    def test_release_only_by_current_owner(self):
+        """测试只有当前归属worker能取消归属"""
+        directory = SessionDirectory(FakeRedis())
+        directory.claim("alice", "celery@worker-2")
+
+        directory.release("alice", "celery@worker-1")
+        assert directory.redis.hget("weibo:sessions:owners", "alice") == "celery@worker-2"
+
+        directory.release("alice", "celery@worker-2")
+        assert directory.redis.hget("weibo:sessions:owners", "alice") is None
+        print("✅ 归属取消正常")
+
+    def test_route_options_fallback_on_error(self):
+        """测试Redis不可用时使用默认路由"""
+        with patch("app.core.affinity.SessionDirectory", side_effect=ConnectionError("down")):
+            assert route_options("alice") == {}
+        print("✅ 路由降级正常")
+
+
+class FakeQueues:
+    """模拟Celery的队列选择"""
+
+    def __init__(self, names):
+        self.consume_from = dict.fromkeys(names)
+
+    def select_add(self, name):
+        self.consume_from[name] = None
+
+
+class TestWorkerQueue:
+    """专属队列测试类"""
+
+    def add_queue(self, hostname, queues):
+        instance = MagicMock()
+        instance.app.amqp.queues = FakeQueues(queues)
+        affinity._add_worker_queue(sender=hostname, instance=instance)
+        return list(instance.app.amqp.queues.consume_from)
+
+    def test_analysis_worker_gets_session_queue(self):
+        """测试消费分析队列的worker增加专属队列并登记归属"""
+        with patch("app.core.affinity._session_queue_enabled", False):
+            consumed = self.add_queue("celery@worker-1", ["login", "deletion", "analysis", "background"])
+            assert affinity.session_queue_enabled() is True
+        assert worker_queue("celery@worker-1") in consumed
+        print("✅ 分析worker增加专属队列")
+
+    def test_interactive_worker_skips_session_queue(self):
+        """测试只处理登录和删除的交互worker没有专属队列，登录后也不登记归属"""
+        redis_client = FakeRedis()
+        state = {"cookies": [{"name": "SUB", "value": "token", "domain": ".weibo.com", "path": "/"}]}
+
+        with patch("app.core.affinity._session_queue_enabled", False):
+            consumed = self.add_queue("interactive@worker-1", ["login", "deletion"])
+            assert affinity.session_queue_enabled() is False
+            with patch("app.tasks.weibo_tasks.SessionDirectory", lambda: SessionDirectory(redis_client)):
+                asyncio.run(weibo_tasks._persist_session(
+                    FakeSession("alice", FakeAgent(logged_in=True, state=state)),
+                    "interactive@worker-1"
+                ))
+
+        assert consumed == ["login", "deletion"]
+        assert redis_client.hget("weibo:sessions:owners", "alice") is None
+        assert SessionDirectory(redis_client).load_state("alice") == state
+        print("✅ 交互worker不增加专属队列")
+
+
+def message(task_name):
+    return json.dumps({"headers": {"task": task_name}})
+
+
+class TestSessionQueueRecovery:
+    """失联worker专属队列恢复测试类"""
+
+    def test_requeue_on_owner_change(self):
+        """测试账号迁移到新worker时，失联原归属专属队列中的任务转回共享队列"""
+        redis_client = FakeRedis()
+        directory = SessionDirectory(redis_client)
+        directory.claim("alice", "celery@worker-1")
+        redis_client.rpush(worker_queue("celery@worker-1"), message(ANALYZE_TASK))
+        redis_client.rpush(worker_queue("celery@worker-1"), message(DELETE_TASK))
+
+        directory.heartbeat("celery@worker-2")
+        directory.claim("alice", "celery@worker-2")
+
+        assert redis_client.lists[worker_queue("celery@worker-1")] == []
+        assert len(redis_client.lists["analysis"]) == 1
+        assert len(redis_client.lists["deletion"]) == 1
+        print("✅ 归属迁移时转移滞留任务正常")
+
+    def test_recover_dead_workers_on_heartbeat(self):
+        """测试心跳超时的worker由在线worker接管，检查互斥且超过状态保存时间后不再检查"""
+        redis_client = FakeRedis()
+        directory = SessionDirectory(redis_client)
+        directory.heartbeat("celery@worker-1")
+        directory.heartbeat("celery@worker-2")
+        directory.claim("bob", "celery@worker-1")
+        redis_client.rpush(worker_queue("celery@worker-1"), message(ANALYZE_TASK))
+
+        # worker-1 心跳过期
+        redis_client.delete("weibo:workers:celery@worker-1:alive")
+        later = redis_client.zsets["weibo:workers:seen"]["celery@worker-1"] + settings.session_heartbeat_ttl + 1
+        redis_client.zadd("weibo:workers:seen", {"celery@worker-2": later})
+
+        assert directory.recover_dead_workers(now=later) == {"celery@worker-1": 1}
+        assert redis_client.lists["analysis"] == [message(ANALYZE_TASK)]
+        assert directory.owner("bob") is None
+        assert redis_client.hget("weibo:sessions:owners", "bob") is None
+
+        # 锁未过期时其他worker不重复检查
+        assert directory.recover_dead_workers(now=later) == {}
+
+        redis_client.delete("weibo:workers:recovery_lock")
+        directory.recover_dead_workers(now=later + settings.session_state_ttl)
+        assert "celery@worker-1" not in redis_client.zsets["weibo:workers:seen"]
+        print("✅ 心跳时接管失联worker正常")
+
+
+class TestSessionFailover:
+    """会话故障转移测试类"""
+
+    def test_persist_and_restore_session(self):
+        """测试登录后保存cookie，新worker接手时恢复会话并成为归属"""
+        redis_client = FakeRedis()
+        state = {"cookies": [{"name": "SUB", "value": "token", "domain": ".weibo.com", "path": "/"}]}
+
+        with patch("app.tasks.weibo_tasks.SessionDirectory", lambda: SessionDirectory(redis_client)), \
+             patch("app.core.affinity._session_queue_enabled", True):
+            asyncio.run(weibo_tasks._persist_session(
+                FakeSession("alice", FakeAgent(logged_in=True, state=state)),
+                "celery@worker-1"
+            ))
+
+            new_agent = FakeAgent()
+            restored = asyncio.run(weibo_tasks._restore_session(
+                FakeSession("alice", new_agent),
+                "celery@worker-2"
+            ))
+
+        assert restored is True
+        assert new_agent.is_logged_in
+        assert new_agent.imported == state
+        assert redis_client.hget("weibo:sessions:owners", "alice") == "celery@worker-2"
+        print("✅ 会话故障转移正常")
+
+    def test_restore_without_saved_state(self):
+        """测试没有保存的状态时会话保持未登录"""
+        redis_client = FakeRedis()
+
+        with patch("app.tasks.weibo_tasks.SessionDirectory", lambda: SessionDirectory(redis_client)), \
+             patch("app.core.affinity._session_queue_enabled", True):
+            restored = asyncio.run(weibo_tasks._restore_session(
+                FakeSession("alice", FakeAgent()),
+                "celery@worker-1"
+            ))
+
+        assert restored is False
+        assert redis_client.hget("weibo:sessions:owners", "alice") is None
+        print("✅ 无状态时不恢复正常")
@@ -0,0 +1,44 @@
+"""
+API轻量导入测试模块
+
+测试API进程不加载浏览器相关依赖，以及API投递使用的任务名称与worker注册的任务一致
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from app.core.celery_app import celery_app
+from app.tasks import names
+
+
+class TestApiImports:
+    """API导入测试类"""
+
+    def test_api_does_not_import_browser_stack(self):
+        """测试在全新的解释器中导入API应用不会加载代理和浏览器依赖"""
+        probe = (
+            "import json, sys\n"
+            "import app.main\n"
+            "print(json.dumps([m for m in ('browser_use', 'langchain_openai', 'playwright', "
+            "'app.agents.weibo_agent', 'app.tasks.weibo_tasks') if m in sys.modules]))\n"
+        )
+        env = {**os.environ, "DEEPSEEK_API_KEY": "sk-test1234567890", "SECRET_KEY": "testsecretkey12345"}
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run(
+            [sys.executable, "-c", probe], cwd=backend_dir, env=env,
+            capture_output=True, text=True, check=True
+        ).stdout
+
+        assert json.loads(output.strip().splitlines()[-1]) == []
+        print("✅ API未加载浏览器依赖")
+
+    def test_task_names_registered_by_worker(self):
+        """测试按名称投递的任务都已在worker的任务模块中注册"""
+        import app.tasks.weibo_tasks  # noqa: F401  worker进程导入任务模块
+
+        task_names = [value for key, value in vars(names).items() if key.endswith("_TASK")]
+        assert task_names
+        assert all(name in celery_app.tasks for name in task_names)
+        print("✅ 任务名称与注册一致")
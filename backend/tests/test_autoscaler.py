@@ -0,0 +1,187 @@
+"""
+自动扩缩容测试模块
+
+测试扩缩容决定、从Redis读取队列指标、排空worker时残留任务的转移，以及控制器的一轮执行
+"""
+
+import json
+
+from app.core.affinity import OWNERS_KEY
+from app.core.autoscaler import (
+    SESSION_CAPACITY_KEY, Autoscaler, decide, read_queue_metrics, requeue_session_queue
+)
+from app.core.tracing import ENQUEUED_AT_HEADER
+
+
+class FakePipeline:
+    """模拟Redis管道：依次执行命令"""
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+    def execute(self):
+        return [getattr(self.redis, name)(*args) for name, args in self.calls]
+
+
+class FakeRedis:
+    """模拟队列列表、字符串和哈希"""
+
+    def __init__(self):
+        self.lists = {}
+        self.values = {}
+        self.hashes = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    def lindex(self, key, index):
+        items = self.lists.get(key, [])
+        return items[index] if items else None
+
+    def lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value)
+
+    def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+
+    def lpop(self, key):
+        items = self.lists.get(key, [])
+        return items.pop(0) if items else None
+
+    def set(self, key, value, ex=None):
+        self.values[key] = str(value)
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def exists(self, key):
+        return int(key in self.values)
+
+    def hkeys(self, key):
+        return list(self.hashes.get(key, {}))
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+
+class FakePool:
+    """模拟worker进程池"""
+
+    def __init__(self, workers):
+        self.workers = list(workers)
+        self.drained = []
+        self.started = 0
+
+    def active(self):
+        return [hostname for hostname in self.workers if hostname not in self.drained]
+
+    def draining(self):
+        return list(self.drained)
+
+    def start(self):
+        self.started += 1
+        self.workers.append(f"auto{len(self.workers) + 1}@test")
+
+    def drain(self, hostname):
+        self.drained.append(hostname)
+
+    def poll(self):
+        return []
+
+
+def message(task, enqueued_at):
+    """kombu在Redis中保存的消息信封"""
+    return json.dumps({"headers": {"task": task, ENQUEUED_AT_HEADER: int(enqueued_at * 1e9)}})
+
+
+class TestDecide:
+    """扩缩容决定测试类"""
+
+    bounds = {"min_workers": 1, "max_workers": 4, "tasks_per_worker": 5, "max_task_age": 60,
+              "min_sessions": 1, "max_sessions": 5}
+
+    def test_scale_up_by_depth_and_age(self):
+        """测试按排队数扩容并受上限约束，排队少但等待过久时增加一个worker"""
+        assert decide(12, 5, 1, 0, **self.bounds)["workers"] == 3
+        assert decide(100, 5, 1, 0, **self.bounds)["workers"] == 4
+        assert decide(2, 90, 1, 0, **self.bounds)["workers"] == 2
+        print("✅ 扩容决定正常")
+
+    def test_scale_down_one_at_a_time(self):
+        """测试空闲时每次只缩减一个worker，且不低于下限"""
+        assert decide(0, None, 4, 0, **self.bounds)["workers"] == 3
+        assert decide(0, None, 1, 0, **self.bounds)["workers"] == 1
+        print("✅ 缩容决定正常")
+
+    def test_session_capacity_follows_accounts(self):
+        """测试会话上限按账号数平摊到worker并受范围约束"""
+        assert decide(10, None, 2, 7, **self.bounds)["session_capacity"] == 4
+        assert decide(0, None, 1, 0, **self.bounds)["session_capacity"] == 1
+        assert decide(0, None, 1, 40, **self.bounds)["session_capacity"] == 5
+        print("✅ 会话上限决定正常")
+
+
+class TestQueueMetrics:
+    """队列指标测试类"""
+
+    def test_depth_and_oldest_age_across_priorities(self):
+        """测试排队数合计全部优先级子队列，最老任务取最右侧消息"""
+        redis_client = FakeRedis()
+        redis_client.lpush("analysis", message("analyze_weibo_content", 900))
+        redis_client.lpush("analysis:6", message("analyze_weibo_content", 950))
+        redis_client.lpush("analysis:6", message("analyze_weibo_content", 990))
+
+        metrics = read_queue_metrics(redis_client, ["analysis", "login"], now=1000)
+
+        assert metrics["analysis"] == {"depth": 3, "oldest_age": 100}
+        assert metrics["login"] == {"depth": 0, "oldest_age": None}
+        print("✅ 队列指标读取正常")
+
+    def test_requeue_keeps_order_and_priority(self):
+        """测试专属队列残留任务按原顺序转回类别共享队列，保持优先级"""
+        redis_client = FakeRedis()
+        first, second = message("analyze_weibo_content", 1), message("analyze_weibo_content", 2)
+        redis_client.lpush("session.auto1@test:6", first)
+        redis_client.lpush("session.auto1@test:6", second)
+        redis_client.lpush("session.auto1@test", message("login_weibo_task", 3))
+
+        assert requeue_session_queue(redis_client, "auto1@test") == 3
+        assert redis_client.lists["analysis:6"] == [second, first]
+        assert redis_client.llen("login") == 1
+        assert redis_client.llen("session.auto1@test:6") == 0
+        print("✅ 残留任务转移正常")
+
+
+class TestAutoscaler:
+    """控制器测试类"""
+
+    def test_tick_scales_up_then_drains_after_cooldown(self):
+        """测试积压时扩容；队列清空后冷却期内不缩容，之后排空归属账号最少的worker"""
+        redis_client = FakeRedis()
+        now = [1000.0]
+        pool = FakePool(["auto1@test"])
+        scaler = Autoscaler(pool, redis_client, clock=lambda: now[0])
+        for index in range(12):
+            redis_client.lpush("deletion:3", message("delete_weibo_posts", 990))
+
+        result = scaler.tick()
+        assert result["workers"] == 3 and pool.started == 2
+        assert redis_client.get(SESSION_CAPACITY_KEY) == "1"
+
+        redis_client.lists.clear()
+        redis_client.hashes[OWNERS_KEY] = {"alice": "auto1@test", "bob": "auto2@test", "carol": "auto2@test"}
+        now[0] += 10
+        scaler.tick()
+        assert pool.drained == []
+
+        now[0] += 600
+        scaler.tick()
+        assert pool.drained == ["auto3@test"]
+        print("✅ 控制器扩缩容正常")
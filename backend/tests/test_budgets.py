@@ -0,0 +1,175 @@
+"""
+代理预算测试模块
+
+测试按任务类型读取预算、token计数的上下文隔离，以及超出步数、token和运行时间预算时返回部分结果且不重试
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.agents import budgets
+from app.agents.base_agent import BaseAgent
+from app.agents.budgets import BudgetExceeded
+from app.core.config import settings
+from app.core.metrics import AGENT_BUDGET_EXCEEDED
+
+
+class FakeHistory:
+    """模拟browser_use的AgentHistoryList"""
+
+    def __init__(self):
+        self.history = []
+        self.done = False
+
+    def is_done(self):
+        return self.done
+
+
+class FakeAgent:
+    """模拟browser_use的Agent：逐步执行，完成或达到步数上限时停止"""
+
+    def __init__(self, steps_to_done=None, tokens_per_step=0, step_delay=0):
+        self.history = FakeHistory()
+        self.steps_to_done = steps_to_done
+        self.tokens_per_step = tokens_per_step
+        self.step_delay = step_delay
+
+    async def step(self):
+        if self.step_delay:
+            await asyncio.sleep(self.step_delay)
+        budgets.record_tokens(self.tokens_per_step)
+        self.history.history.append(object())
+        if self.steps_to_done and len(self.history.history) >= self.steps_to_done:
+            self.history.done = True
+
+    async def run(self, max_steps=100):
+        for _ in range(max_steps):
+            await self.step()
+            if self.history.is_done():
+                break
+        return self.history
+
+
+def _base_agent():
+    return BaseAgent(max_retries=3)
+
+
+class TestBudgetSettings:
+    """预算配置测试"""
+
+    def test_budget_for_task_type(self):
+        """测试按任务类型读取配置"""
+        budget = budgets.budget_for(budgets.TASK_DELETE)
+        assert budget.max_steps == settings.agent_delete_max_steps
+        assert budget.max_tokens == settings.agent_delete_max_tokens
+        assert budget.max_seconds == settings.agent_delete_max_seconds
+        print("✅ 按任务类型读取预算测试通过")
+
+    def test_budget_without_task_type(self):
+        """测试未指定任务类型时只限制默认步数"""
+        budget = budgets.budget_for(None)
+        assert budget.max_steps == budgets.DEFAULT_MAX_STEPS
+        assert budget.max_tokens == 0
+        assert budget.max_seconds == 0
+        print("✅ 默认预算测试通过")
+
+    def test_record_tokens_isolated_per_run(self):
+        """测试token只记入当前运行的计数器"""
+        async def run(usage, count):
+            token = budgets.activate(usage)
+            try:
+                await asyncio.sleep(0)
+                budgets.record_tokens(count)
+            finally:
+                budgets.deactivate(token)
+
+        first, second = budgets.BudgetUsage(), budgets.BudgetUsage()
+
+        async def main():
+            await asyncio.gather(
+                asyncio.create_task(run(first, 10)),
+                asyncio.create_task(run(second, 20))
+            )
+
+        asyncio.run(main())
+        budgets.record_tokens(99)  # 不在运行中，忽略
+        assert first.tokens == 10
+        assert second.tokens == 20
+        print("✅ token计数隔离测试通过")
+
+
+class TestRunWithBudget:
+    """预算执行测试"""
+
+    def test_within_budget(self):
+        """测试预算内完成时返回历史"""
+        agent = FakeAgent(steps_to_done=3, tokens_per_step=100)
+        usage = budgets.BudgetUsage()
+        history = asyncio.run(_base_agent()._run_with_budget(agent, budgets.AgentBudget(5, 1000, 10), usage))
+        assert history.is_done()
+        assert usage.steps == 3
+        assert usage.tokens == 300
+        print("✅ 预算内完成测试通过")
+
+    def test_steps_exceeded(self):
+        """测试达到步数上限仍未完成"""
+        agent = FakeAgent()
+        usage = budgets.BudgetUsage()
+        try:
+            asyncio.run(_base_agent()._run_with_budget(agent, budgets.AgentBudget(4), usage))
+            assert False, "应超出步数预算"
+        except BudgetExceeded as e:
+            assert e.budget == budgets.BUDGET_STEPS
+        assert usage.steps == 4
+        print("✅ 步数预算测试通过")
+
+    def test_tokens_exceeded(self):
+        """测试token用量达到上限后停止，不再执行后续步骤"""
+        agent = FakeAgent(tokens_per_step=400)
+        usage = budgets.BudgetUsage()
+        try:
+            asyncio.run(_base_agent()._run_with_budget(agent, budgets.AgentBudget(10, 1000), usage))
+            assert False, "应超出token预算"
+        except BudgetExceeded as e:
+            assert e.budget == budgets.BUDGET_TOKENS
+        assert usage.steps == 3
+        assert len(agent.history.history) == 3
+        print("✅ token预算测试通过")
+
+    def test_time_exceeded(self):
+        """测试运行超时后中止"""
+        agent = FakeAgent(step_delay=0.05)
+        usage = budgets.BudgetUsage()
+        try:
+            asyncio.run(_base_agent()._run_with_budget(agent, budgets.AgentBudget(100, 0, 0.2), usage))
+            assert False, "应超出运行时间预算"
+        except BudgetExceeded as e:
+            assert e.budget == budgets.BUDGET_TIME
+        assert 0 < usage.steps < 100
+        print("✅ 运行时间预算测试通过")
+
+
+class TestExecuteTaskBudget:
+    """execute_task超出预算测试"""
+
+    def test_partial_result_without_retry(self):
+        """测试超出预算时返回部分结果、不重试并记录指标"""
+        base = _base_agent()
+        agent = FakeAgent()
+        before = AGENT_BUDGET_EXCEEDED.labels(budgets.TASK_DELETE, budgets.BUDGET_STEPS)._value.get()
+
+        with patch("subprocess.Popen", return_value=MagicMock()), \
+             patch("asyncio.sleep", new=AsyncMock()), \
+             patch.object(base, "_create_agent", return_value=agent) as create_agent:
+            result = asyncio.run(base.execute_task("删除微博", task_type=budgets.TASK_DELETE))
+
+        assert result["success"] is False
+        assert result["partial"] is True
+        assert result["budget_exceeded"] == budgets.BUDGET_STEPS
+        assert result["result"] is agent.history
+        assert result["attempt"] == 1
+        assert result["usage"]["steps"] == settings.agent_delete_max_steps
+        assert create_agent.call_count == 1
+        after = AGENT_BUDGET_EXCEEDED.labels(budgets.TASK_DELETE, budgets.BUDGET_STEPS)._value.get()
+        assert after == before + 1
+        print("✅ 超出预算返回部分结果测试通过")
@@ -0,0 +1,112 @@
+"""
+分析请求去重测试模块
+
+测试分析条件的规范化指纹、任务登记，以及API合并相同请求的判断
+"""
+
+from unittest.mock import patch
+
+from app.api.v1.weibo import _coalesce_analysis
+from app.core.dedup import RequestDeduplicator, analysis_fingerprint
+
+
+class FakeRedis:
+    """模拟Redis字符串读写与过期时间"""
+
+    def __init__(self):
+        self.store = {}
+        self.ttls = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        self.ttls[key] = ex
+        return True
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+
+class FakeResult:
+    """模拟Celery任务结果"""
+
+    def __init__(self, task_id, status, result=None):
+        self.id = task_id
+        self.status = status
+        self.result = result
+
+
+class TestFingerprint:
+    """请求指纹测试类"""
+
+    def test_normalized_criteria_match(self):
+        """测试关键词顺序、大小写、空白和空时间范围不影响指纹，账号和数量影响指纹"""
+        base = {"time_range": {"start_date": "2024-01-01", "end_date": None}, "keywords": ["政治", "News"], "max_posts": 50}
+        same = {"time_range": {"start_date": "2024-01-01"}, "keywords": [" news ", "政治", "政治"], "max_posts": 50}
+
+        assert analysis_fingerprint("a", base) == analysis_fingerprint("a", same)
+        assert analysis_fingerprint("a", base) != analysis_fingerprint("b", base)
+        assert analysis_fingerprint("a", base) != analysis_fingerprint("a", {**base, "max_posts": 51})
+        print("✅ 请求指纹规范化正常")
+
+
+class TestRequestDeduplicator:
+    """任务登记测试类"""
+
+    def test_claim_finish_release(self):
+        """测试先到者登记、后到者拿到已有任务，完成后缩短为去重窗口，失败后取消"""
+        redis_client = FakeRedis()
+        dedup = RequestDeduplicator(redis_client, window=300)
+        key = "weibo:dedup:analyze:fp"
+
+        assert dedup.claim("fp", "task-1", ttl=2100) is None
+        assert dedup.claim("fp", "task-2", ttl=2100) == "task-1"
+        assert redis_client.ttls[key] == 2100
+
+        dedup.finish("fp", "task-2")
+        assert redis_client.ttls[key] == 2100
+        dedup.finish("fp", "task-1")
+        assert redis_client.ttls[key] == 300
+
+        dedup.release("fp", "task-1")
+        assert dedup.claim("fp", "task-3", ttl=2100) is None
+        print("✅ 任务登记正常")
+
+
+class TestCoalesceAnalysis:
+    """请求合并测试类"""
+
+    def _coalesce(self, redis_client, existing_status, existing_result=None):
+        dedup = RequestDeduplicator(redis_client, window=300)
+        with patch("app.api.v1.weibo.RequestDeduplicator", return_value=dedup), \
+                patch("app.api.v1.weibo.AsyncResult", side_effect=lambda task_id, app: FakeResult(
+                    task_id, existing_status, existing_result
+                )):
+            criteria = {"time_range": {}, "keywords": ["a"], "max_posts": 10}
+            first = _coalesce_analysis("acct", criteria, "task-1")
+            second = _coalesce_analysis("acct", criteria, "task-2")
+        return first, second
+
+    def test_running_or_finished_task_is_reused(self):
+        """测试相同请求在任务运行中或成功完成后返回已有任务"""
+        for status, result in (("PROGRESS", None), ("SUCCESS", {"success": True})):
+            first, second = self._coalesce(FakeRedis(), status, result)
+            assert first is None
+            assert second.id == "task-1"
+        print("✅ 相同请求复用已有任务")
+
+    def test_failed_task_is_replaced(self):
+        """测试已有任务失败时改为登记新任务"""
+        redis_client = FakeRedis()
+        first, second = self._coalesce(redis_client, "SUCCESS", {"success": False})
+
+        assert first is None and second is None
+        assert list(redis_client.store.values()) == ["task-2"]
+        print("✅ 失败任务不再复用")
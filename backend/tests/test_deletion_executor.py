@@ -0,0 +1,94 @@
+"""
+并行删除执行器测试模块
+
+测试多标签页共享工作队列、共用删除额度和吞吐量统计
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+from app.agents.deletion_executor import DeletionExecutor
+
+
+class FakeTab:
+    """模拟标签页代理，删除耗时固定"""
+
+    instances = []
+
+    def __init__(self, persistent_browser=False, delay=0.01):
+        self.persistent_browser = persistent_browser
+        self.delay = delay
+        self.is_logged_in = False
+        self.imported = None
+        self.closed = False
+        self.deleted = []
+        FakeTab.instances.append(self)
+
+    async def export_storage_state(self):
+        return {"cookies": [{"name": "SUB", "value": "token"}]}
+
+    async def import_storage_state(self, state):
+        self.imported = state
+        return True
+
+    async def delete_post(self, post_id, progress_callback=None):
+        await asyncio.sleep(self.delay)
+        self.deleted.append(post_id)
+        return {"post_id": post_id, "success": True, "timestamp": "now"}
+
+    async def close(self):
+        self.closed = True
+
+
+class TestDeletionExecutor:
+    """并行删除执行器测试类"""
+
+    def test_tabs_share_queue_and_login(self):
+        """测试额外标签页导入会话登录状态，并从共享队列分摊删除"""
+        FakeTab.instances = []
+        session_agent = FakeTab()
+        session_agent.is_logged_in = True
+
+        async def scenario():
+            executor = await DeletionExecutor.open(session_agent, 3)
+            try:
+                return executor, await executor.run([str(i) for i in range(9)])
+            finally:
+                await executor.close()
+
+        executor, result = asyncio.run(scenario())
+
+        extra_tabs = FakeTab.instances[1:]
+        assert len(executor.tabs) == 3
+        assert all(tab.is_logged_in and tab.imported and tab.closed for tab in extra_tabs)
+        assert not session_agent.closed
+        assert result["successful_count"] == 9
+        assert sorted(sum((tab.deleted for tab in FakeTab.instances), [])) == [str(i) for i in range(9)]
+        assert all(tab["succeeded"] == 3 for tab in result["throughput"]["tabs"])
+        assert result["throughput"]["deletions_per_minute"] > 0
+        print("✅ 多标签页共享队列正常")
+
+    def test_budget_shared_across_tabs(self):
+        """测试所有标签页共用额度，额度耗尽后剩余微博全部延后"""
+        limiter = Mock()
+        limiter.acquire = AsyncMock(side_effect=[True, True, False, False])
+        limiter.status.return_value = {"seconds_until_next": 36.0}
+        executor = DeletionExecutor([FakeTab(), FakeTab()], rate_limiter=limiter)
+
+        result = asyncio.run(executor.run(["1", "2", "3", "4", "5"]))
+
+        assert result["successful_count"] == 2
+        assert sorted(item["post_id"] for item in result["failed_deletes"]) == ["3", "4", "5"]
+        assert all("36" in item["error"] for item in result["failed_deletes"])
+        assert sum(tab["attempted"] for tab in result["throughput"]["tabs"]) == 2
+        print("✅ 标签页共用额度正常")
+
+    def test_single_tab_without_browser_state(self):
+        """测试会话无法导出浏览器状态时退回单标签页"""
+        session_agent = FakeTab()
+        session_agent.export_storage_state = AsyncMock(return_value=None)
+
+        executor = asyncio.run(DeletionExecutor.open(session_agent, 4))
+
+        assert executor.tabs == [session_agent]
+        print("✅ 单标签页回退正常")
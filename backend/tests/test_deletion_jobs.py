@@ -0,0 +1,175 @@
+"""
+删除任务检查点测试模块
+
+测试逐条保存删除结果、执行锁的续期与释放，以及任务恢复时跳过已确认删除的微博
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, Mock, patch
+
+import fakeredis
+
+from app.agents.weibo_agent import WeiboAgent
+from app.core.deletion_jobs import JOB_COMPLETED, DeletionJobStore
+from app.tasks import weibo_tasks
+
+
+def make_store():
+    return DeletionJobStore(fakeredis.FakeRedis(decode_responses=True), ttl=60)
+
+
+def deleted(post_id):
+    """删除成功的结果"""
+    return {"post_id": post_id, "success": True, "timestamp": "now"}
+
+
+class TestDeletionJobStore:
+    """检查点存储测试类"""
+
+    def test_records_and_summary(self):
+        """测试逐条保存结果，重新登记时保留原微博列表"""
+        store = make_store()
+        store.start("job-1", "alice", ["1", "2", "3"], "task-1")
+        store.record("job-1", deleted("1"))
+        store.record("job-1", {"post_id": "2", "success": False, "error": "找不到", "timestamp": "now"})
+        store.start("job-1", "alice", ["9"], "task-2")
+
+        summary = store.summary("job-1")
+
+        assert store.deleted_ids("job-1") == {"1"}
+        assert store.get("job-1")["post_ids"] == ["1", "2", "3"]
+        assert summary["task_id"] == "task-2"
+        assert (summary["deleted_count"], summary["failed_count"], summary["pending_count"]) == (1, 1, 1)
+        assert store.summary("missing") is None
+        print("✅ 检查点保存正常")
+
+    def test_lock_reentrant_for_same_task(self):
+        """测试同一Celery任务重新投递可以重入，其他执行者被拒绝"""
+        store = make_store()
+
+        assert store.lock("job-1", "task-1", 1800)
+        assert store.lock("job-1", "task-1", 1800)
+        assert not store.lock("job-1", "task-2", 1800)
+        store.unlock("job-1", "task-2")
+        assert store.is_locked("job-1")
+        store.unlock("job-1", "task-1")
+        assert not store.is_locked("job-1")
+        print("✅ 执行锁正常")
+
+    def test_lock_refresh_and_expiry(self):
+        """测试只有持有者能续期；锁过期后其他执行者（恢复的新任务）可以接手"""
+        store = make_store()
+        lock_key = store._key("job-1", "lock")
+
+        assert store.lock("job-1", "task-1", 60)
+        assert 0 < store.redis.ttl(lock_key) <= 60
+        store.redis.expire(lock_key, 5)
+        assert store.refresh_lock("job-1", "task-1", 60)
+        assert store.redis.ttl(lock_key) > 5
+        assert not store.refresh_lock("job-1", "task-2", 60)
+
+        # 执行者崩溃，锁过期
+        store.redis.delete(lock_key)
+        assert store.lock("job-1", "task-2", 60)
+        assert not store.refresh_lock("job-1", "task-1", 60)
+        store.unlock("job-1", "task-1")
+        assert store.redis.get(lock_key) == "task-2"
+        print("✅ 执行锁续期与过期正常")
+
+    def test_hold_job_lock_renews_while_running(self):
+        """测试删除执行期间定期续期执行锁，结束后停止续期"""
+        store = make_store()
+        store.lock("job-1", "task-1", 60)
+        store.refresh_lock = Mock(return_value=True)
+
+        async def slow_delete():
+            await asyncio.sleep(0.1)
+            return "done"
+
+        with patch.object(weibo_tasks.settings, "deletion_lock_ttl", 0.06):
+            result = asyncio.run(weibo_tasks._hold_job_lock(store, "job-1", "task-1", slow_delete()))
+
+        assert result == "done"
+        assert store.refresh_lock.call_count >= 2
+        assert store.refresh_lock.call_args.args == ("job-1", "task-1", 0.06)
+        print("✅ 执行期间续期正常")
+
+
+class TestResumableDeletion:
+    """可恢复删除任务测试类"""
+
+    def test_batch_delete_reports_each_result(self):
+        """测试批量删除把每条结果交给检查点回调"""
+        agent = WeiboAgent()
+        agent.is_logged_in = True
+        agent.delete_post = AsyncMock(side_effect=lambda post_id, _: deleted(post_id))
+        saved = []
+
+        asyncio.run(agent.batch_delete_posts(["1", "2"], result_callback=saved.append))
+
+        assert [record["post_id"] for record in saved] == ["1", "2"]
+        print("✅ 逐条回调检查点正常")
+
+    def run_task(self, store, agent, post_ids, job_id):
+        """在模拟会话上执行删除任务"""
+        session = Mock(agent=agent)
+
+        @asynccontextmanager
+        async def fake_session(account_id):
+            yield session
+
+        registry = Mock(session=fake_session)
+        task = weibo_tasks.delete_weibo_posts
+        task.push_request(id="task-2", hostname="worker-1")
+        try:
+            with patch("app.tasks.weibo_tasks.DeletionJobStore", return_value=store), \
+                    patch("app.tasks.weibo_tasks.get_session_registry", return_value=registry), \
+                    patch("app.tasks.weibo_tasks._restore_session", AsyncMock(return_value=True)), \
+                    patch("app.tasks.weibo_tasks.ProgressReporter"), \
+                    patch("app.tasks.weibo_tasks.AdaptivePacer"):
+                return task.run("alice", post_ids, job_id=job_id)
+        finally:
+            task.pop_request()
+
+    def test_resume_skips_confirmed_posts(self):
+        """测试恢复任务时只删除未确认的微博，并逐条保存检查点"""
+        store = make_store()
+        store.start("job-1", "alice", ["1", "2", "3"], "task-1")
+        store.record("job-1", deleted("1"))
+
+        async def batch_delete(post_ids, progress_callback, **kwargs):
+            results = [deleted(post_id) for post_id in post_ids]
+            for result in results:
+                kwargs["result_callback"](result)
+            return {
+                "successful_deletes": results, "failed_deletes": [], "failed_count": 0,
+                "throughput": {}, "completion_time": "now"
+            }
+
+        agent = Mock()
+        agent.batch_delete_posts = AsyncMock(side_effect=batch_delete)
+
+        result = self.run_task(store, agent, ["1", "2", "3"], "job-1")
+
+        assert agent.batch_delete_posts.await_args.args[0] == ["2", "3"]
+        assert result["successful_count"] == 3
+        assert result["skipped_count"] == 1
+        assert store.deleted_ids("job-1") == {"1", "2", "3"}
+        assert store.get("job-1")["status"] == JOB_COMPLETED
+        assert not store.is_locked("job-1")
+        print("✅ 跳过已删除微博正常")
+
+    def test_running_job_not_executed_twice(self):
+        """测试删除任务正在执行时，重复提交不会再次删除"""
+        store = make_store()
+        store.lock("job-1", "task-1", 1800)
+        agent = Mock()
+        agent.batch_delete_posts = AsyncMock()
+
+        result = self.run_task(store, agent, ["1"], "job-1")
+
+        assert result["success"] is False
+        agent.batch_delete_posts.assert_not_awaited()
+        assert store.is_locked("job-1")
+        print("✅ 重复执行保护正常")
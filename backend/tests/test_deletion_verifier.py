@@ -0,0 +1,128 @@
+"""
+删除校验测试模块
+
+测试时间线对比的三种结论、时间线是否完整的判断，以及批量删除后只获取一次时间线的统一校验
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from app.agents.deletion_verifier import (
+    VERIFY_CONFIRMED, VERIFY_STILL_PRESENT, VERIFY_UNKNOWN, diff_timeline
+)
+from app.agents.weibo_actions import EXTRACT_CARDS_JS
+from app.agents.weibo_agent import CURRENT_UID_JS, WeiboAgent
+from app.core.config import settings
+
+
+class FakeTimelinePage:
+    """按批次返回微博卡片的页面，模拟滚动加载个人主页时间线"""
+
+    def __init__(self, batches, uid="42"):
+        self.batches = list(batches)
+        self.uid = uid
+        self.goto = AsyncMock()
+        self.wait_for_timeout = AsyncMock()
+        self.loaded = []
+
+    async def evaluate(self, script):
+        if script == CURRENT_UID_JS:
+            return self.uid
+        if script == EXTRACT_CARDS_JS:
+            if self.batches:
+                self.loaded += [{"id": post_id} for post_id in self.batches.pop(0)]
+            return list(self.loaded)
+        return None
+
+
+def timeline_agent(page):
+    agent = WeiboAgent()
+    agent.current_page = AsyncMock(return_value=page)
+    agent.get_user_weibos = AsyncMock()
+    return agent
+
+
+class TestDiffTimeline:
+    """时间线对比测试类"""
+
+    def test_partial_timeline(self):
+        """测试只取到最近一段时间线时，更早的微博无法判断"""
+        verdicts = diff_timeline(["500", "300", "100"], ["600", "500", "200"], complete=False)
+
+        assert verdicts[VERIFY_STILL_PRESENT] == ["500"]
+        assert verdicts[VERIFY_CONFIRMED] == ["300"]
+        assert verdicts[VERIFY_UNKNOWN] == ["100"]
+        print("✅ 部分时间线对比正常")
+
+    def test_complete_or_missing_timeline(self):
+        """测试完整时间线可确认全部缺失微博，获取失败时全部未知"""
+        assert diff_timeline(["1", "2"], ["2"], complete=True)[VERIFY_CONFIRMED] == ["1"]
+        assert diff_timeline(["1", "2"], [], complete=False)[VERIFY_UNKNOWN] == ["1", "2"]
+        print("✅ 完整时间线对比正常")
+
+
+class TestVerifyDeletions:
+    """时间线完整性测试类"""
+
+    def verify(self, page, max_count=10):
+        agent = timeline_agent(page)
+        with patch.object(settings, "deletion_verify_timeline_size", max_count):
+            verdicts = asyncio.run(agent.verify_deletions(["300", "100"]))
+        agent.get_user_weibos.assert_not_awaited()
+        return verdicts
+
+    def test_reads_own_timeline_without_agent(self):
+        """测试直接在已打开的页面上读取当前用户的主页时间线，不运行LLM代理"""
+        page = FakeTimelinePage([["500", "200"]])
+        self.verify(page)
+
+        page.goto.assert_awaited_once_with("https://weibo.com/u/42", wait_until="domcontentloaded")
+        print("✅ 直接读取时间线正常")
+
+    def test_timeline_cut_at_limit_not_at_end(self):
+        """测试时间线达到条数上限而未滚动到末尾时，更早的微博仍无法判断"""
+        verdicts = self.verify(FakeTimelinePage([["500", "200"], ["50"]]), max_count=2)
+
+        assert verdicts[VERIFY_CONFIRMED] == ["300"]
+        assert verdicts[VERIFY_UNKNOWN] == ["100"]
+        print("✅ 未到末尾的时间线不视为完整")
+
+    def test_no_page_not_complete(self):
+        """测试没有持久浏览器或页面中没有登录用户时，全部无法判断"""
+        assert self.verify(None)[VERIFY_UNKNOWN] == ["300", "100"]
+        assert self.verify(FakeTimelinePage([["500"]], uid=""))[VERIFY_UNKNOWN] == ["300", "100"]
+        print("✅ 无法读取时间线时不做判断")
+
+    def test_timeline_at_end(self):
+        """测试滚动到时间线末尾时，未出现的微博全部确认已删除"""
+        verdicts = self.verify(FakeTimelinePage([["500"], ["200"]]))
+
+        assert verdicts[VERIFY_CONFIRMED] == ["300", "100"]
+        print("✅ 完整时间线确认删除")
+
+
+class TestBatchVerification:
+    """批量删除校验测试类"""
+
+    def test_single_timeline_fetch_after_batch(self):
+        """测试整批删除后只获取一次时间线，仍然存在的微博改为失败并更新检查点"""
+        page = FakeTimelinePage([["900", "700", "500"]])
+        agent = timeline_agent(page)
+        agent.is_logged_in = True
+        agent.delete_post = AsyncMock(side_effect=lambda post_id, _: {
+            "post_id": post_id, "success": True, "timestamp": "now"
+        })
+        saved = []
+
+        with patch.object(settings, "deletion_verify_timeline_size", 3):
+            result = asyncio.run(agent.batch_delete_posts(
+                ["800", "700", "100"], result_callback=saved.append, verify=True
+            ))
+
+        page.goto.assert_awaited_once()
+        agent.get_user_weibos.assert_not_awaited()
+        assert result["successful_count"] == 2
+        assert [item["post_id"] for item in result["failed_deletes"]] == ["700"]
+        assert result["verification"] == {VERIFY_CONFIRMED: 1, VERIFY_STILL_PRESENT: 1, VERIFY_UNKNOWN: 1}
+        assert [(r["post_id"], r["success"]) for r in saved[3:]] == [("800", True), ("700", False), ("100", True)]
+        print("✅ 批量统一校验正常")
@@ -0,0 +1,94 @@
+"""
+事件监控测试模块
+
+测试由Celery事件维护的任务统计快照，下线worker上的任务不计入活跃任务
+"""
+
+from unittest.mock import Mock
+from app.core.config import settings
+from app.core.event_monitor import TaskEventMonitor, percentile
+
+
+def task_event(event_type: str, uuid: str, timestamp: float, **fields):
+    """构造Celery任务事件"""
+    return {
+        "type": event_type,
+        "uuid": uuid,
+        "hostname": "worker@test",
+        "timestamp": timestamp,
+        "local_received": timestamp,
+        "clock": int(timestamp * 10),
+        **fields
+    }
+
+
+class TestTaskEventMonitor:
+    """事件监控测试类"""
+    
+    def test_percentile(self):
+        """测试分位数计算"""
+        values = [float(i) for i in range(1, 101)]
+        
+        assert percentile(values, 50) == 51.0
+        assert percentile(values, 95) == 95.0
+        assert percentile([], 50) is None
+        print("✅ 分位数计算正常")
+    
+    def test_snapshot_from_events(self):
+        """测试根据事件统计活跃/等待任务、吞吐量和耗时"""
+        now = 1_700_000_000.0
+        monitor = TaskEventMonitor(redis_client=Mock(), clock=lambda: now)
+        
+        monitor.handle_event(task_event("task-received", "t1", now, name="analyze_weibo_chunk"))
+        monitor.handle_event(task_event("task-received", "t2", now, name="analyze_weibo_chunk"))
+        monitor.handle_event(task_event("task-received", "t3", now, name="delete_weibo_posts"))
+        monitor.handle_event(task_event("task-started", "t1", now + 1))
+        monitor.handle_event(task_event("task-started", "t2", now + 1))
+        monitor.handle_event(task_event("task-succeeded", "t2", now + 5, runtime=4.0))
+        
+        snapshot = monitor.snapshot()
+        
+        assert snapshot["active_tasks"] == 1
+        assert snapshot["reserved_tasks"] == 1
+        assert snapshot["succeeded_total"] == 1
+        assert snapshot["throughput_per_minute"] == 1
+        assert snapshot["task_durations"]["analyze_weibo_chunk"]["p50"] == 4.0
+        print(f"✅ 任务统计快照正常: {snapshot}")
+    
+    def test_offline_worker_tasks_not_active(self):
+        """测试worker下线或心跳超时后，其未结束的任务不再计入活跃任务"""
+        now = 1_700_000_000.0
+        clock = [now + 2]
+        monitor = TaskEventMonitor(redis_client=Mock(), clock=lambda: clock[0])
+        
+        monitor.handle_event(task_event("task-received", "t1", now, name="analyze_weibo_chunk"))
+        monitor.handle_event(task_event("task-started", "t1", now + 1))
+        monitor.handle_event(dict(
+            task_event("task-received", "t2", now, name="analyze_weibo_chunk"), hostname="worker@other"
+        ))
+        monitor.handle_event(dict(task_event("task-started", "t2", now + 1), hostname="worker@other"))
+        assert monitor.snapshot()["active_tasks"] == 2
+        
+        monitor.handle_event({"type": "worker-offline", "hostname": "worker@other",
+                              "timestamp": now + 2, "local_received": now + 2, "clock": 1})
+        snapshot = monitor.snapshot()
+        assert snapshot["active_tasks"] == 1
+        assert snapshot["workers_online"] == 1
+        
+        # 心跳超时（崩溃的worker不会发出下线事件）
+        clock[0] = now + 600
+        assert monitor.snapshot()["active_tasks"] == 0
+        assert monitor.state.max_tasks_in_memory == settings.stats_max_tasks
+        print("✅ 下线worker的任务不计入活跃任务")
+    
+    def test_flush_writes_snapshot(self):
+        """测试快照写入Redis"""
+        redis_client = Mock()
+        monitor = TaskEventMonitor(redis_client=redis_client)
+        
+        monitor.flush()
+        
+        key, payload = redis_client.set.call_args[0]
+        assert key == "weibo:stats:snapshot"
+        assert '"active_tasks": 0' in payload
+        print("✅ 快照写入正常")
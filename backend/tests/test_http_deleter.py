@@ -0,0 +1,97 @@
+"""
+HTTP删除后端测试模块
+
+在本地桩服务上测试删除成功、微博不存在和限流响应的解析，以及http删除策略
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+
+from app.agents.deletion_executor import STRATEGY_HTTP, DeletionExecutor
+from app.agents.http_deleter import HttpDeleter
+from app.core.pacing import OUTCOME_FAILURE, OUTCOME_THROTTLED, classify_outcome
+from benchmarks.weibo_stub_server import create_app
+
+
+COOKIES = [
+    {"name": "SUB", "value": "session", "domain": ".weibo.com", "path": "/"},
+    {"name": "XSRF-TOKEN", "value": "csrf", "domain": "weibo.com", "path": "/"}
+]
+
+
+def make_deleter(stub, cookies=COOKIES):
+    """创建接入桩服务的删除客户端"""
+    return HttpDeleter(cookies, base_url="https://weibo.com", transport=httpx.ASGITransport(app=stub))
+
+
+def delete_all(deleter, post_ids):
+    """依次删除并关闭客户端"""
+    async def scenario():
+        try:
+            return [await deleter.delete_post(post_id) for post_id in post_ids]
+        finally:
+            await deleter.close()
+
+    return asyncio.run(scenario())
+
+
+class TestHttpDeleter:
+    """HTTP删除后端测试类"""
+
+    def test_success_and_not_found(self):
+        """测试删除成功，以及重复删除时返回微博不存在"""
+        stub = create_app(post_ids=["1"])
+
+        first, again, missing = delete_all(make_deleter(stub), ["1", "1", "2"])
+
+        assert first["success"] is True
+        assert again["success"] is False and "不存在" in again["error"]
+        assert classify_outcome(False, missing["error"]) == OUTCOME_FAILURE
+        assert stub.state.deleted == ["1"]
+        print("✅ 删除成功和不存在响应正常")
+
+    def test_throttled_response(self):
+        """测试限流响应被识别为限流信号"""
+        stub = create_app(throttled_ids=["9"])
+
+        result, = delete_all(make_deleter(stub), ["9"])
+
+        assert result["success"] is False
+        assert classify_outcome(False, result["error"]) == OUTCOME_THROTTLED
+        print("✅ 限流响应正常")
+
+    def test_requires_csrf_token(self):
+        """测试缺少XSRF-TOKEN时请求被拒绝"""
+        stub = create_app()
+
+        result, = delete_all(make_deleter(stub, cookies=COOKIES[:1]), ["1"])
+
+        assert result["success"] is False
+        assert stub.state.deleted == []
+        print("✅ CSRF校验正常")
+
+
+class TestHttpStrategy:
+    """http删除策略测试类"""
+
+    def test_tabs_share_one_client_pool(self):
+        """测试http策略下所有标签页共用一个带会话cookie的连接池"""
+        agent = Mock()
+        agent.export_storage_state = AsyncMock(return_value={"cookies": COOKIES})
+        deleter = Mock()
+        deleter.close = AsyncMock()
+
+        async def scenario():
+            with patch("app.agents.deletion_executor.HttpDeleter.from_storage_state", return_value=deleter) as factory:
+                executor = await DeletionExecutor.open(agent, 3, strategy=STRATEGY_HTTP)
+            await executor.close()
+            return executor, factory
+
+        executor, factory = asyncio.run(scenario())
+
+        assert executor.tabs == [deleter] * 3
+        assert factory.call_args.kwargs["max_connections"] == 3
+        deleter.close.assert_awaited_once()
+        print("✅ http策略连接池共享正常")
@@ -0,0 +1,122 @@
+"""
+指标测试模块
+
+测试Prometheus指标导出与LLM回调的耗时、token统计
+"""
+
+import socket
+import uuid
+
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from prometheus_client import REGISTRY
+
+from app.agents.llm_callbacks import LLMMetricsCallback, extract_token_usage
+from app.core.metrics import render_metrics, start_metrics_server
+from app.main import app
+
+
+def _sample(name, labels):
+    """读取指标当前值"""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestLLMMetricsCallback:
+    """LLM指标回调测试类"""
+
+    def test_extract_token_usage_from_llm_output(self):
+        """测试从llm_output中提取token用量"""
+        response = LLMResult(
+            generations=[[]],
+            llm_output={"token_usage": {"prompt_tokens": 120, "completion_tokens": 30}}
+        )
+
+        assert extract_token_usage(response) == (120, 30)
+        print("✅ llm_output token提取正常")
+
+    def test_extract_token_usage_from_message_metadata(self):
+        """测试从消息usage_metadata中提取token用量"""
+        message = AIMessage(
+            content="ok",
+            usage_metadata={"input_tokens": 50, "output_tokens": 7, "total_tokens": 57}
+        )
+        response = LLMResult(generations=[[ChatGeneration(message=message)]])
+
+        assert extract_token_usage(response) == (50, 7)
+        print("✅ usage_metadata token提取正常")
+
+    def test_callback_records_latency_and_tokens(self):
+        """测试回调记录请求耗时与token"""
+        callback = LLMMetricsCallback("test-model")
+        run_id = uuid.uuid4()
+        labels = {"model": "test-model", "outcome": "success"}
+        before_count = _sample("weibo_llm_request_duration_seconds_count", labels)
+        before_prompt = _sample("weibo_llm_tokens_total", {"model": "test-model", "kind": "prompt"})
+
+        callback.on_chat_model_start({}, [], run_id=run_id)
+        callback.on_llm_end(
+            LLMResult(
+                generations=[[]],
+                llm_output={"token_usage": {"prompt_tokens": 100, "completion_tokens": 20}}
+            ),
+            run_id=run_id
+        )
+
+        assert _sample("weibo_llm_request_duration_seconds_count", labels) == before_count + 1
+        assert _sample("weibo_llm_tokens_total", {"model": "test-model", "kind": "prompt"}) == before_prompt + 100
+        print("✅ LLM耗时与token记录正常")
+
+    def test_callback_records_errors(self):
+        """测试LLM请求失败时记录错误耗时"""
+        callback = LLMMetricsCallback("test-model")
+        run_id = uuid.uuid4()
+        labels = {"model": "test-model", "outcome": "error"}
+        before = _sample("weibo_llm_request_duration_seconds_count", labels)
+
+        callback.on_llm_start({}, ["prompt"], run_id=run_id)
+        callback.on_llm_error(RuntimeError("timeout"), run_id=run_id)
+
+        assert _sample("weibo_llm_request_duration_seconds_count", labels) == before + 1
+        print("✅ LLM错误记录正常")
+
+
+class TestMetricsEndpoint:
+    """指标端点测试类"""
+
+    def test_render_metrics(self):
+        """测试指标文本包含已定义的指标"""
+        text = render_metrics().decode("utf-8")
+
+        assert "weibo_task_duration_seconds" in text
+        assert "weibo_agent_attempts_total" in text
+        print("✅ 指标导出正常")
+
+    def test_metrics_endpoint_records_route(self):
+        """测试/metrics端点与按路由的请求耗时"""
+        client = TestClient(app)
+        labels = {"method": "GET", "route": "/health", "status": "200"}
+        before = _sample("weibo_http_request_duration_seconds_count", labels)
+
+        client.get("/health")
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert _sample("weibo_http_request_duration_seconds_count", labels) == before + 1
+        print("✅ /metrics端点正常")
+
+    def test_metrics_server_per_container(self):
+        """测试worker在独立端口暴露指标，端口为0时不启动"""
+        from urllib.request import urlopen
+
+        assert start_metrics_server(0) is False
+
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        assert start_metrics_server(port) is True
+
+        text = urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode("utf-8")
+        assert "weibo_task_duration_seconds" in text
+        print("✅ 独立端口指标正常")
@@ -0,0 +1,96 @@
+"""
+操作节奏测试模块
+
+测试风控信号识别、AIMD间隔调整和批量删除中的节奏控制
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+from app.agents.weibo_agent import WeiboAgent
+from app.core.pacing import (
+    OUTCOME_CAPTCHA, OUTCOME_FAILURE, OUTCOME_SUCCESS, OUTCOME_THROTTLED,
+    AdaptivePacer, classify_outcome
+)
+
+
+def make_pacer(stored=None, min_delay=2, max_delay=10):
+    """创建使用模拟Redis的节奏控制器"""
+    redis_client = Mock()
+    redis_client.get.return_value = stored
+    return AdaptivePacer("weibo:pacing:delete:alice", min_delay, max_delay, redis_client)
+
+
+class TestClassifyOutcome:
+    """风控信号识别测试类"""
+
+    def test_classify(self):
+        """测试按错误信息识别验证码、限流和普通失败"""
+        assert classify_outcome(True) == OUTCOME_SUCCESS
+        assert classify_outcome(False, "页面要求输入验证码") == OUTCOME_CAPTCHA
+        assert classify_outcome(False, "操作过于频繁，请稍后再试") == OUTCOME_THROTTLED
+        assert classify_outcome(False, "HTTP 429 Too Many Requests") == OUTCOME_THROTTLED
+        assert classify_outcome(False, "找不到该微博") == OUTCOME_FAILURE
+        print("✅ 风控信号识别正常")
+
+
+class TestAdaptivePacer:
+    """节奏控制器测试类"""
+
+    def test_starts_conservative_and_speeds_up(self):
+        """测试没有历史时从最长间隔开始，成功后线性缩短到下限"""
+        pacer = make_pacer()
+
+        assert pacer.delay == 10
+        for _ in range(100):
+            pacer.record(OUTCOME_SUCCESS)
+
+        assert pacer.delay == 2
+        print("✅ 成功时缩短间隔正常")
+
+    def test_backs_off_on_signals(self):
+        """测试限流成倍退避、验证码直接退到上限"""
+        pacer = make_pacer(stored="3")
+
+        assert pacer.delay == 3
+        assert pacer.record(OUTCOME_THROTTLED) == 6
+        assert pacer.record(OUTCOME_SUCCESS) == 5.5
+        assert pacer.record(OUTCOME_CAPTCHA) == 10
+        assert pacer.record(OUTCOME_THROTTLED) == 10
+        print("✅ 风控退避正常")
+
+    def test_learned_delay_persisted_and_clamped(self):
+        """测试学到的间隔按账号保存，读取时限制在上下限内"""
+        pacer = make_pacer(stored="0.1")
+
+        assert pacer.delay == 2
+        pacer.record(OUTCOME_FAILURE)
+
+        key, value = pacer.redis.set.call_args[0]
+        assert key == "weibo:pacing:delete:alice"
+        assert value == 3
+        print("✅ 间隔保存正常")
+
+
+class TestPacedDeletion:
+    """节奏控制删除测试类"""
+
+    def test_waits_between_deletions_and_records_outcomes(self):
+        """测试只在相邻删除之间等待，并把每次结果反馈给节奏控制器"""
+        agent = WeiboAgent()
+        agent.is_logged_in = True
+        agent.delete_post = AsyncMock(side_effect=[
+            {"post_id": "1", "success": True, "timestamp": "now"},
+            {"post_id": "2", "success": False, "error": "操作过于频繁", "timestamp": "now"},
+            {"post_id": "3", "success": True, "timestamp": "now"},
+        ])
+        pacer = Mock(delay=2.0)
+        pacer.wait = AsyncMock(return_value=2.0)
+
+        asyncio.run(agent.batch_delete_posts(["1", "2", "3"], pacer=pacer))
+
+        assert pacer.wait.await_count == 2
+        assert [c.args[0] for c in pacer.record.call_args_list] == [
+            OUTCOME_SUCCESS, OUTCOME_THROTTLED, OUTCOME_SUCCESS
+        ]
+        print("✅ 删除节奏控制正常")
@@ -0,0 +1,73 @@
+"""
+任务优先级测试模块
+
+测试各类任务的队列与broker优先级、会话专属队列上的优先级保留，以及按类别的排队等待指标
+"""
+
+import time
+
+from app.core.celery_app import celery_app
+from app.core.metrics import TASK_QUEUE_WAIT
+from app.core.priorities import (
+    PRIORITY_ANALYSIS, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, priority_class, queue_keys
+)
+from app.core.tracing import ENQUEUED_AT_HEADER
+from app.tasks.weibo_tasks import record_task_start
+
+
+class FakeRequest(dict):
+    """模拟Celery任务请求（消息头可通过get读取）"""
+
+
+class FakeTask:
+    """模拟Celery任务"""
+
+    def __init__(self, name, enqueued_at):
+        self.name = name
+        self.request = FakeRequest({ENQUEUED_AT_HEADER: enqueued_at})
+
+
+def route(task_name, **options):
+    options.setdefault("priority", None)
+    routed = celery_app.amqp.router.route(options, task_name)
+    return routed["queue"].name, routed["priority"]
+
+
+class TestTaskPriorities:
+    """任务优先级测试类"""
+
+    def test_classes_have_own_queues_and_ordered_priorities(self):
+        """测试登录不再与分析共用队列，且优先级依次为登录 > 删除 > 分析"""
+        login = route("login_weibo_task")
+        delete = route("delete_weibo_posts")
+        analyze = route("analyze_weibo_content")
+
+        assert login == ("login", 0)
+        assert delete[0] == "deletion"
+        assert analyze[0] == "analysis"
+        assert login[1] < delete[1] < analyze[1]
+        assert priority_class("analyze_weibo_chunk") == PRIORITY_ANALYSIS
+        assert priority_class("unknown_task") == PRIORITY_BACKGROUND
+        print("✅ 优先级类别路由正常")
+
+    def test_session_queue_keeps_priority(self):
+        """测试发往会话专属队列的任务仍携带类别优先级"""
+        assert route("login_weibo_task", queue="session.celery@w1") == ("session.celery@w1", 0)
+        assert route("analyze_weibo_content", queue="session.celery@w1")[1] == route("analyze_weibo_content")[1]
+        assert queue_keys("analysis") == ["analysis", "analysis:3", "analysis:6", "analysis:9"]
+        print("✅ 专属队列优先级正常")
+
+
+class TestQueueWaitMetric:
+    """排队等待指标测试类"""
+
+    def test_wait_observed_per_class(self):
+        """测试任务开始时按优先级类别记录排队等待时间"""
+        labels = {"priority_class": PRIORITY_INTERACTIVE, "task": "login_weibo_task"}
+        before = TASK_QUEUE_WAIT.labels(**labels)._sum.get()
+
+        record_task_start("wait-1", FakeTask("login_weibo_task", time.time_ns() - 2 * 10**9))
+
+        waited = TASK_QUEUE_WAIT.labels(**labels)._sum.get() - before
+        assert 2 <= waited < 3
+        print("✅ 排队等待指标正常")
@@ -0,0 +1,245 @@
+"""
+任务进度上报测试模块
+
+测试进度合并、限速和ETA估算，以及多个分片共同推进的父任务进度
+"""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+
+from app.core.config import settings
+from app.core.progress import ProgressReporter, SharedProgress
+from app.tasks import weibo_tasks
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_reporter(clock, writes, **kwargs):
+    """创建写入到列表的进度上报器"""
+    return ProgressReporter(
+        "task_id",
+        {"user_id": "test_user"},
+        min_interval_ms=1000,
+        min_progress_step=10,
+        writer=lambda task_id, meta: writes.append(meta),
+        clock=clock,
+        **kwargs
+    )
+
+
+class TestProgressReporter:
+    """进度上报器测试类"""
+    
+    def test_coalesces_updates_within_interval(self):
+        """测试间隔内的多次更新被合并"""
+        clock, writes = FakeClock(), []
+        reporter = make_reporter(clock, writes)
+        
+        reporter("开始", 0, 100)
+        for i in range(1, 6):
+            reporter(f"删除进度 {i}", i, 100)
+        
+        assert len(writes) == 1
+        
+        clock.now = 1.5
+        reporter("删除进度 6", 6, 100)
+        assert len(writes) == 2
+        assert writes[-1]["progress"] == 6
+        assert writes[-1]["user_id"] == "test_user"
+        print("✅ 进度合并限速正常")
+    
+    def test_percentage_step_writes_immediately(self):
+        """测试百分比变化达到阈值时立即写入"""
+        clock, writes = FakeClock(), []
+        reporter = make_reporter(clock, writes)
+        
+        reporter("开始", 0, 100)
+        reporter("进度", 9, 100)
+        reporter("进度", 10, 100)
+        
+        assert [w["progress"] for w in writes] == [0, 10]
+        print("✅ 百分比阈值写入正常")
+    
+    def test_force_and_flush(self):
+        """测试强制写入和尾部刷新"""
+        clock, writes = FakeClock(), []
+        reporter = make_reporter(clock, writes)
+        
+        reporter("开始")
+        reporter.set_meta(qr_status="scanned")
+        assert reporter.update("已扫码", force=True) is True
+        assert writes[-1]["qr_status"] == "scanned"
+        
+        reporter("检查中...")
+        assert len(writes) == 2
+        reporter.flush()
+        assert writes[-1]["message"] == "检查中..."
+        assert writes[-1]["qr_status"] == "scanned"
+        print("✅ 强制写入和刷新正常")
+    
+    def test_progress_and_eta_always_present(self):
+        """测试每次写入都包含数值进度和ETA"""
+        clock, writes = FakeClock(), []
+        reporter = make_reporter(clock, writes)
+        
+        reporter("准备中...")
+        assert writes[-1]["progress"] == 0
+        assert writes[-1]["eta_seconds"] is None
+        
+        clock.now = 10.0
+        reporter("分析进度", 25, 100)
+        assert writes[-1]["progress"] == 25
+        assert writes[-1]["eta_seconds"] == 30.0
+        print("✅ 进度与ETA字段正常")
+    
+    def test_close_cancels_trailing_flush(self):
+        """测试关闭后尾部写入不会在复用同一事件循环的下一个任务中触发"""
+        clock, writes = FakeClock(), []
+        reporter = ProgressReporter(
+            "task_id",
+            min_interval_ms=50,
+            writer=lambda task_id, meta: writes.append(meta),
+            clock=clock
+        )
+        loop = asyncio.new_event_loop()
+        
+        async def first_task():
+            reporter("开始")
+            reporter("处理中...")
+        
+        try:
+            loop.run_until_complete(first_task())
+            assert reporter._flush_handle is not None
+            reporter.close()
+            
+            # 下一个任务在同一事件循环中运行
+            loop.run_until_complete(asyncio.sleep(0.1))
+        finally:
+            loop.close()
+        
+        assert [w["message"] for w in writes] == ["开始"]
+        assert reporter.update("结束后", force=True) is False
+        assert len(writes) == 1
+        print("✅ 关闭后不再写入")
+    
+    def test_store_writes_without_reading_state(self):
+        """测试每次写入只写结果后端和事件流，不额外读取任务状态"""
+        backend = MagicMock()
+        with patch("app.core.progress.celery_app") as celery_app, \
+             patch("app.core.progress.publish_task_event") as publish:
+            celery_app.backend = backend
+            ProgressReporter._store("task_id", {"progress": 60})
+        
+        backend.store_result.assert_called_once_with("task_id", {"progress": 60}, "PROGRESS")
+        backend.get_state.assert_not_called()
+        publish.assert_called_once()
+        print("✅ 进度写入不读取任务状态")
+
+
+class TestSharedProgress:
+    """共享进度测试类"""
+
+    def make_progress(self, redis_client, writes, total=100):
+        return SharedProgress(
+            "parent", total, "分析进度: {current}/{total}", {"user_id": "test_user"},
+            redis_client=redis_client,
+            writer=lambda task_id, meta: writes.append(meta)
+        )
+
+    def test_counts_ids_once(self):
+        """测试按ID计数，分片重新投递时不重复计数，达到总数时写入"""
+        writes = []
+        progress = self.make_progress(fakeredis.FakeRedis(decode_responses=True), writes, total=4)
+
+        assert progress.add(["1", "2"]) == 2
+        assert progress.add(["1", "2"]) == 2
+        assert progress.add(["3", "4"]) == 4
+        assert writes[-1]["current"] == 4
+        assert writes[-1]["progress"] == 100
+        assert writes[-1]["message"] == "分析进度: 4/4"
+        assert writes[-1]["user_id"] == "test_user"
+        print("✅ 共享进度按ID计数正常")
+
+    def test_never_goes_backwards(self):
+        """测试两个分片的写入交错时，较旧的计数不会覆盖较新的"""
+        redis_client = fakeredis.FakeRedis(decode_responses=True)
+        writes = []
+        first, second = self.make_progress(redis_client, writes), self.make_progress(redis_client, writes)
+
+        with patch.object(settings, "progress_min_step", 1):
+            # 第一个分片登记后、写入前，第二个分片登记了更新的计数
+            with patch.object(SharedProgress, "_write"):
+                stale = first.add([str(i) for i in range(40)])
+            second.add([str(i) for i in range(40, 55)])
+            first._write(stale)
+
+        assert [meta["current"] for meta in writes] == [55]
+        print("✅ 共享进度只增不减")
+
+    def test_throttled_between_steps(self):
+        """测试间隔内且百分比变化不足时不写入"""
+        writes = []
+        progress = self.make_progress(fakeredis.FakeRedis(decode_responses=True), writes)
+
+        with patch.object(settings, "progress_min_interval_ms", 60_000), \
+                patch.object(settings, "progress_min_step", 10):
+            for i in range(25):
+                progress.add([str(i)])
+
+        assert [meta["current"] for meta in writes] == [1, 11, 21]
+        print("✅ 共享进度限速正常")
+
+    def test_chunk_fallback_counts_all_posts(self):
+        """测试分片评分异常改用关键词检测时，本分片的微博仍计入父任务进度"""
+        redis_client = fakeredis.FakeRedis(decode_responses=True)
+        agent = MagicMock()
+        agent.score_posts.side_effect = RuntimeError("LLM不可用")
+        agent._simple_risk_analysis.side_effect = lambda weibo: {"post_id": weibo["id"], "risk_score": 1}
+        weibos = [{"id": "1"}, {"id": "2"}]
+
+        with patch("app.core.progress.get_redis", return_value=redis_client), \
+                patch("app.tasks.weibo_tasks.get_scoring_agent", return_value=agent), \
+                patch("app.tasks.weibo_tasks.run_async_task", side_effect=lambda coro: coro()), \
+                patch("app.tasks.weibo_tasks.AnalysisResultStore"), \
+                patch("app.tasks.weibo_tasks.publish_task_event"), \
+                patch("app.core.progress.ProgressReporter._store") as store:
+            weibo_tasks.analyze_weibo_chunk("parent", "test_user", weibos, 2)
+
+        assert redis_client.scard("weibo:progress:parent:done") == 2
+        assert store.call_args.args[1]["current"] == 2
+        print("✅ 兜底分片计入进度")
+
+
+class TestTaskStream:
+    """任务事件流测试类"""
+    
+    def test_format_sse(self):
+        """测试SSE消息格式"""
+        from app.core.task_stream import format_sse
+        
+        message = format_sse("progress", {"progress": 50, "message": "分析中"})
+        
+        assert message.startswith("event: progress\n")
+        assert '"message": "分析中"' in message
+        assert message.endswith("\n\n")
+        print("✅ SSE消息格式正常")
+    
+    def test_terminal_event_detection(self):
+        """测试任务结束事件识别"""
+        from app.core.task_stream import is_terminal
+        
+        assert is_terminal({"event": "status", "status": "SUCCESS"}) is True
+        assert is_terminal({"event": "status", "status": "FAILURE"}) is True
+        assert is_terminal({"event": "progress", "status": "PROGRESS"}) is False
+        assert is_terminal({"event": "partial", "posts": []}) is False
+        print("✅ 任务结束事件识别正常")
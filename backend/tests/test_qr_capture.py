@@ -0,0 +1,133 @@
+"""
+二维码截取测试模块
+
+测试二维码图片响应的识别与截取、截取失败时的元素截图回退，以及按任务的二维码缓存
+"""
+
+import asyncio
+import base64
+
+from app.agents.qr_capture import capture_qr_code, is_qr_image, to_data_uri
+from app.core.qr_cache import QrCodeCache
+
+
+class FakeRedis:
+    """模拟Redis字符串读写"""
+
+    def __init__(self):
+        self.store = {}
+        self.ttls = {}
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+        self.ttls[key] = ex
+
+    def get(self, key):
+        return self.store.get(key)
+
+
+class FakeResponse:
+    """模拟Playwright响应"""
+
+    def __init__(self, url, content_type, body):
+        self.url = url
+        self.headers = {"content-type": content_type}
+        self._body = body
+
+    async def body(self):
+        return self._body
+
+
+class FakeLocator:
+    """模拟元素定位"""
+
+    def __init__(self, png):
+        self.first = self
+        self.png = png
+
+    async def screenshot(self, timeout=None):
+        return self.png
+
+
+class FakePage:
+    """模拟Playwright页面，加载时按需发出响应事件"""
+
+    def __init__(self, responses=(), screenshot=b"shot"):
+        self.responses = responses
+        self.screenshot = screenshot
+        self.listeners = {}
+        self.loads = 0
+
+    def on(self, event, handler):
+        self.listeners.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners[event].remove(handler)
+
+    def locator(self, selector):
+        return FakeLocator(self.screenshot)
+
+    async def load(self):
+        self.loads += 1
+        for response in self.responses:
+            for handler in list(self.listeners.get("response", [])):
+                await handler(response)
+
+
+class TestQrCapture:
+    """二维码截取测试类"""
+
+    def test_helpers(self):
+        """测试data URI转换与二维码图片识别"""
+        assert to_data_uri(b"png", "image/png; charset=binary") == f"data:image/png;base64,{base64.b64encode(b'png').decode()}"
+        assert is_qr_image("https://qr.weibo.cn/inf/gen?api_key=x", "image/png")
+        assert not is_qr_image("https://qr.weibo.cn/inf/gen", "text/html")
+        assert not is_qr_image("https://weibo.com/logo.png", "image/png")
+        print("✅ 辅助函数正常")
+
+    def test_captures_image_response(self):
+        """测试从二维码图片响应中直接取得图片，并移除监听"""
+        page = FakePage(responses=[
+            FakeResponse("https://weibo.com/logo.png", "image/png", b"logo"),
+            FakeResponse("https://qr.weibo.cn/inf/gen?api_key=x", "image/png", b"qr"),
+        ])
+
+        qr_code = asyncio.run(capture_qr_code(page, page.load, timeout=1))
+
+        assert qr_code == to_data_uri(b"qr", "image/png")
+        assert page.loads == 1
+        assert page.listeners == {"response": []}
+        print("✅ 图片响应截取正常")
+
+    def test_falls_back_to_screenshot(self):
+        """测试没有拦截到图片响应时截取二维码元素"""
+        page = FakePage(screenshot=b"shot")
+
+        qr_code = asyncio.run(capture_qr_code(page, page.load, timeout=0.05))
+
+        assert qr_code == to_data_uri(b"shot")
+        print("✅ 元素截图回退正常")
+
+
+class TestQrCodeCache:
+    """二维码缓存测试类"""
+
+    def test_save_status_and_refresh(self):
+        """测试保存、更新状态保留图片、刷新后覆盖图片"""
+        redis_client = FakeRedis()
+        cache = QrCodeCache(redis_client, ttl=300)
+
+        assert cache.get("task-1") is None
+        cache.set_status("task-1", "scanned")
+        assert cache.get("task-1") is None
+
+        cache.save("task-1", "data:image/png;base64,AAA")
+        cache.set_status("task-1", "expired")
+        assert cache.get("task-1")["qr_code"] == "data:image/png;base64,AAA"
+        assert cache.get("task-1")["qr_status"] == "expired"
+
+        cache.save("task-1", "data:image/png;base64,BBB")
+        assert cache.get("task-1")["qr_code"] == "data:image/png;base64,BBB"
+        assert cache.get("task-1")["qr_status"] == "waiting"
+        assert redis_client.ttls["weibo:qr:task-1"] == 300
+        print("✅ 二维码缓存正常")
@@ -0,0 +1,169 @@
+"""
+扫码登录监听测试模块
+
+测试二维码状态接口响应的解析、页面事件驱动的状态推送，以及确认后的跳转与用户信息读取
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from app.agents.qr_watcher import (
+    QR_CONFIRMED, QR_EXPIRED, QR_SCANNED, QR_UNCONFIRMED, QR_WAITING, QrLoginWatcher, parse_qr_check
+)
+from app.agents.weibo_agent import PROFILE_JS, WeiboAgent
+
+
+class FakeResponse:
+    """模拟Playwright响应"""
+
+    def __init__(self, url, body):
+        self.url = url
+        self.body = body
+
+    async def text(self):
+        return self.body
+
+
+class FakeFrame:
+    """模拟Playwright框架"""
+
+    def __init__(self, url):
+        self.url = url
+
+
+class FakePage:
+    """模拟Playwright页面，手动触发事件"""
+
+    def __init__(self, profile=None):
+        self.main_frame = FakeFrame("https://passport.weibo.com/sso/signin")
+        self.listeners = {}
+        self.profile = profile
+
+    async def evaluate(self, script):
+        assert script == PROFILE_JS
+        return self.profile
+
+    def on(self, event, handler):
+        self.listeners.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners[event].remove(handler)
+
+    async def emit(self, event, payload):
+        for handler in list(self.listeners.get(event, [])):
+            result = handler(payload)
+            if asyncio.iscoroutine(result):
+                await result
+
+
+def check_response(retcode):
+    """二维码状态接口的JSONP响应"""
+    return FakeResponse(
+        "https://passport.weibo.com/sso/v2/qrcode/check?qrid=abc",
+        f'window.STK_1({{"retcode": {retcode}, "msg": "", "data": {{}}}});'
+    )
+
+
+class TestParseQrCheck:
+    """状态响应解析测试类"""
+
+    def test_parse(self):
+        """测试JSON与JSONP响应的返回码映射"""
+        assert parse_qr_check('{"retcode": 50114001}') == QR_WAITING
+        assert parse_qr_check('cb({"retcode": 50114002})') == QR_SCANNED
+        assert parse_qr_check('{"retcode": 20000000, "data": {"url": "x"}}') == QR_CONFIRMED
+        assert parse_qr_check('{"retcode": 50114004}') == QR_EXPIRED
+        assert parse_qr_check('{"retcode": 1}') is None
+        assert parse_qr_check("<html></html>") is None
+        print("✅ 状态响应解析正常")
+
+
+class TestQrLoginWatcher:
+    """扫码状态监听测试类"""
+
+    def test_pushes_changes_until_confirmed(self):
+        """测试只推送状态变化，确认后等到跳转回微博"""
+        page = FakePage()
+        pushed = []
+
+        async def scenario():
+            watcher = QrLoginWatcher(page, pushed.append).start()
+            for retcode in (50114001, 50114002, 50114002, 20000000):
+                await page.emit("response", check_response(retcode))
+            await page.emit("response", FakeResponse("https://weibo.com/ajax/other", "{}"))
+            statuses = [status async for status in watcher.changes(timeout=1)]
+
+            page.main_frame.url = "https://weibo.com/u/123"
+            await page.emit("framenavigated", page.main_frame)
+            redirected = await watcher.wait_redirected(timeout=1)
+            watcher.stop()
+            return statuses, redirected
+
+        statuses, redirected = asyncio.run(scenario())
+
+        assert statuses == [QR_SCANNED, QR_CONFIRMED]
+        assert pushed == statuses
+        assert redirected is True
+        assert page.listeners == {"response": [], "framenavigated": []}
+        print("✅ 状态变化推送正常")
+
+    def test_navigation_confirms_and_timeout_ends(self):
+        """测试跳转到微博页面即视为确认；没有事件时在超时后结束"""
+        async def scenario():
+            idle = QrLoginWatcher(FakePage()).start()
+            timed_out = [status async for status in idle.changes(timeout=0.05)]
+
+            page = FakePage()
+            watcher = QrLoginWatcher(page).start()
+            await page.emit("framenavigated", FakeFrame("https://weibo.com/u/123"))
+            page.main_frame.url = "https://weibo.com/u/123"
+            await page.emit("framenavigated", page.main_frame)
+            return timed_out, [status async for status in watcher.changes(timeout=1)]
+
+        timed_out, statuses = asyncio.run(scenario())
+
+        assert timed_out == []
+        assert statuses == [QR_CONFIRMED]
+        print("✅ 跳转确认与超时正常")
+
+
+class TestFinishQrLogin:
+    """扫码确认后完成登录测试类"""
+
+    def finish(self, page, redirect):
+        agent = WeiboAgent()
+        agent.is_logged_in = True
+
+        async def scenario():
+            watcher = QrLoginWatcher(page).start()
+            if redirect:
+                page.main_frame.url = "https://weibo.com/u/123"
+                await page.emit("framenavigated", page.main_frame)
+            return await agent.finish_qr_login(watcher, timeout=0.05)
+
+        with patch.object(agent, "current_page", new=AsyncMock(return_value=page)):
+            return agent, asyncio.run(scenario())
+
+    def test_reads_profile_after_redirect(self):
+        """测试跳转回微博后读取用户信息"""
+        profile = {"screen_name": "小明", "followers_count": 1234, "followers_count_str": "1234",
+                   "friends_count": 56, "statuses_count": 789}
+        agent, result = self.finish(FakePage(profile), redirect=True)
+
+        assert result["success"] is True
+        assert result["user_info"] == {
+            "nickname": "小明", "followers_count": "1234", "following_count": "56", "weibo_count": "789"
+        }
+        assert agent.user_info == result["user_info"]
+        assert agent.is_logged_in is True
+        print("✅ 确认后读取用户信息正常")
+
+    def test_unconfirmed_without_redirect(self):
+        """测试确认后未跳转回微博时登录未完成"""
+        agent, result = self.finish(FakePage({"screen_name": "小明"}), redirect=False)
+
+        assert result["success"] is False
+        assert result["qr_status"] == QR_UNCONFIRMED
+        assert agent.is_logged_in is False
+        assert agent.user_info == {}
+        print("✅ 未跳转时登录未完成")
@@ -0,0 +1,150 @@
+"""
+限流测试模块
+
+测试令牌桶的等待时间处理、删除额度的滑动窗口上限和批量删除的额度获取
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import fakeredis
+
+from app.agents.weibo_agent import WeiboAgent
+from app.core.rate_limiter import RateLimiter, SlidingWindowLimiter, TokenBucket, deletion_bucket
+
+
+def make_bucket(responses, capacity=100):
+    """创建脚本按顺序返回给定结果的令牌桶"""
+    redis_client = Mock()
+    script = Mock(side_effect=responses)
+    redis_client.register_script.return_value = script
+    return TokenBucket("test:bucket", capacity, capacity / 3600, redis_client), script
+
+
+class TestTokenBucket:
+    """令牌桶测试类"""
+
+    def test_try_acquire_returns_wait(self):
+        """测试令牌不足时返回精确等待时间"""
+        bucket, script = make_bucket([[1, 0, "99"], [0, 1250, "0.5"]])
+
+        assert bucket.try_acquire() == 0.0
+        assert bucket.try_acquire() == 1.25
+        assert script.call_args.kwargs["keys"] == ["test:bucket"]
+        print("✅ 令牌等待时间正常")
+
+    def test_acquire_sleeps_for_returned_wait(self):
+        """测试获取令牌时按返回的等待时间休眠后重试"""
+        bucket, _ = make_bucket([[0, 800, "0.7"], [1, 0, "0.0"]])
+        sleep = AsyncMock()
+
+        with patch("app.core.rate_limiter.asyncio.sleep", sleep):
+            granted = asyncio.run(bucket.acquire(max_wait=5))
+
+        assert granted is True
+        sleep.assert_awaited_once_with(0.8)
+        print("✅ 令牌等待获取正常")
+
+    def test_acquire_gives_up_beyond_max_wait(self):
+        """测试等待时间超过上限时放弃"""
+        bucket, _ = make_bucket([[0, 30_000, "0.2"]])
+
+        assert asyncio.run(bucket.acquire(max_wait=10)) is False
+        print("✅ 超过等待上限放弃正常")
+
+    def test_status(self):
+        """测试额度状态"""
+        bucket, script = make_bucket([[1, 0, "0.5"]], capacity=3600)
+
+        status = bucket.status()
+
+        assert script.call_args.kwargs["args"][2] == 0
+        assert status["available"] == 0.5
+        assert status["seconds_until_next"] == 0.5
+        print("✅ 额度状态正常")
+
+
+
+class TestSlidingWindowLimiter:
+    """滑动窗口测试类"""
+
+    def make_limiter(self, limit=10, window_seconds=3600):
+        now = [1_000_000.0]
+        limiter = SlidingWindowLimiter(
+            "test:window", limit, window_seconds,
+            redis_client=fakeredis.FakeRedis(decode_responses=True),
+            clock=lambda: now[0]
+        )
+        return limiter, now
+
+    def test_deletion_bucket_uses_hourly_limit(self):
+        """测试删除额度的上限和窗口"""
+        bucket = deletion_bucket("alice", redis_client=Mock())
+
+        assert isinstance(bucket, SlidingWindowLimiter)
+        assert isinstance(bucket, RateLimiter) and not isinstance(bucket, TokenBucket)
+        assert bucket.key == "weibo:ratelimit:delete:alice:window"
+        assert bucket.window_seconds == 3600
+        assert bucket.refill_per_second == bucket.capacity / 3600
+        print("✅ 删除额度配置正常")
+
+    def test_hourly_limit_never_exceeded(self):
+        """测试模拟一小时内每秒都尝试删除，任意一小时内放行数不超过上限"""
+        limiter, now = self.make_limiter(limit=10)
+        start = now[0]
+        granted_at = []
+        for second in range(2 * 3600):
+            now[0] = start + second
+            if limiter.try_acquire() == 0:
+                granted_at.append(second)
+
+        first_hour = [second for second in granted_at if second < 3600]
+        assert len(first_hour) == 10
+        for index in range(len(granted_at) - 10):
+            assert granted_at[index + 10] - granted_at[index] >= 3600
+        print(f"✅ 一小时内放行 {len(first_hour)} 次，未超过上限")
+
+    def test_wait_until_oldest_leaves_window(self):
+        """测试额度用完后等待到最早一次放行移出窗口"""
+        limiter, now = self.make_limiter(limit=2, window_seconds=100)
+        assert limiter.try_acquire() == 0
+        now[0] += 30
+        assert limiter.try_acquire() == 0
+        now[0] += 10
+
+        assert limiter.try_acquire() == 60
+        status = limiter.status()
+        assert status["available"] == 0
+        assert status["seconds_until_next"] == 60
+        assert limiter.try_acquire(2) == 90
+        assert limiter.try_acquire(3) == 100
+
+        now[0] += 60
+        assert limiter.status() == {
+            "capacity": 2, "available": 1, "refill_per_second": 0.02, "seconds_until_next": 0
+        }
+        assert limiter.try_acquire() == 0
+        print("✅ 滑动窗口等待时间正常")
+
+
+class TestRateLimitedDeletion:
+    """限流删除测试类"""
+
+    def test_remaining_posts_deferred_when_budget_exhausted(self):
+        """测试额度耗尽后剩余微博标记为稍后删除"""
+        agent = WeiboAgent()
+        agent.is_logged_in = True
+        agent.delete_post = AsyncMock(side_effect=lambda post_id, _: {
+            "post_id": post_id, "success": True, "timestamp": "now"
+        })
+        limiter = Mock()
+        limiter.acquire = AsyncMock(side_effect=[True, False])
+        limiter.status.return_value = {"seconds_until_next": 36.0}
+
+        result = asyncio.run(agent.batch_delete_posts(["1", "2", "3"], rate_limiter=limiter))
+
+        assert result["successful_count"] == 1
+        assert [item["post_id"] for item in result["failed_deletes"]] == ["2", "3"]
+        assert "36" in result["failed_deletes"][0]["error"]
+        assert agent.delete_post.await_count == 1
+        print("✅ 额度耗尽延后删除正常")
@@ -0,0 +1,147 @@
+"""
+分析结果存储测试模块
+
+测试逐条结果的保存、按风险分数分页、最低分数与类别过滤，以及分页查询接口
+"""
+
+from unittest.mock import patch
+
+import fakeredis
+from fastapi.testclient import TestClient
+
+from app.core.result_store import AnalysisResultStore
+from app.main import app
+
+
+def make_post(post_id, score, category):
+    return {
+        "post_id": post_id,
+        "risk_score": score,
+        "risk_category": category,
+        "content": f"微博{post_id}",
+        "date": "2024-06-01",
+        "risk_reason": "测试",
+        "original_weibo": {"id": post_id}
+    }
+
+
+def make_store():
+    return AnalysisResultStore(fakeredis.FakeRedis(decode_responses=True), ttl=60)
+
+
+def seed(store, task_id="task_1"):
+    # 两个分片分别保存
+    store.save_posts(task_id, [make_post("1", 9, "政治"), make_post("2", 2, "")])
+    store.save_posts(task_id, [make_post("3", 6, "隐私"), make_post("4", 8, "隐私"), make_post("5", 4, "政治")])
+
+
+class TestAnalysisResultStore:
+    """结果存储测试类"""
+
+    def test_save_and_query_sorted(self):
+        """测试多批保存后按风险分数从高到低返回，不保存原始微博副本"""
+        store = make_store()
+        seed(store)
+
+        page = store.query("task_1")
+        assert page["total"] == 5
+        assert [item["post_id"] for item in page["items"]] == ["1", "4", "3", "5", "2"]
+        assert "original_weibo" not in page["items"][0]
+        assert store.exists("task_1") is True
+        assert store.categories("task_1") == ["", "政治", "隐私"]
+        assert store.redis.ttl(store._key("task_1", "rank")) > 0
+        print("✅ 保存与排序查询正常")
+
+    def test_pagination(self):
+        """测试偏移量和每页数量"""
+        store = make_store()
+        seed(store)
+
+        page = store.query("task_1", offset=2, limit=2)
+        assert page["total"] == 5
+        assert [item["post_id"] for item in page["items"]] == ["3", "5"]
+        assert store.query("task_1", offset=10)["items"] == []
+        print("✅ 分页正常")
+
+    def test_min_risk_filter(self):
+        """测试最低风险分数过滤（含边界）"""
+        store = make_store()
+        seed(store)
+
+        page = store.query("task_1", min_risk=6)
+        assert page["total"] == 3
+        assert [item["post_id"] for item in page["items"]] == ["1", "4", "3"]
+        print("✅ 最低分数过滤正常")
+
+    def test_category_filters(self):
+        """测试单类别与多类别合并过滤，合并结果短期缓存"""
+        store = make_store()
+        seed(store)
+
+        single = store.query("task_1", categories=["隐私"])
+        assert [item["post_id"] for item in single["items"]] == ["4", "3"]
+
+        union = store.query("task_1", categories=["隐私", "政治"], min_risk=5)
+        assert union["total"] == 3
+        assert [item["post_id"] for item in union["items"]] == ["1", "4", "3"]
+
+        union_keys = store.redis.keys(store._key("task_1", "union:*"))
+        assert len(union_keys) == 1
+        assert 0 < store.redis.ttl(union_keys[0]) <= 10
+
+        # 类别顺序不同时复用同一缓存
+        store.query("task_1", categories=["政治", "隐私"])
+        assert store.redis.keys(store._key("task_1", "union:*")) == union_keys
+        print("✅ 类别过滤正常")
+
+    def test_empty_and_missing(self):
+        """测试空批次不写入，不存在的任务返回空结果"""
+        store = make_store()
+        store.save_posts("task_1", [])
+
+        assert store.exists("task_1") is False
+        assert store.query("task_1") == {"total": 0, "items": []}
+        assert store.categories("task_1") == []
+        print("✅ 空结果处理正常")
+
+
+class TestAnalysisResultsEndpoint:
+    """分页查询接口测试类"""
+
+    def setup_method(self):
+        self.store = make_store()
+        self.client = TestClient(app)
+
+    def get(self, url, **params):
+        with patch("app.api.v1.weibo.AnalysisResultStore", return_value=self.store):
+            return self.client.get(url, params=params)
+
+    def test_results_page(self):
+        """测试按条件分页返回结果"""
+        seed(self.store)
+
+        response = self.get("/api/v1/weibo/task/task_1/results", offset=0, limit=2, min_risk=5, category=["隐私", "政治"])
+        assert response.status_code == 200
+        data = response.json()
+        assert data["task_id"] == "task_1"
+        assert data["total"] == 3
+        assert data["limit"] == 2
+        assert [item["post_id"] for item in data["items"]] == ["1", "4"]
+        assert data["categories"] == ["", "政治", "隐私"]
+        print("✅ 结果分页接口正常")
+
+    def test_results_not_found(self):
+        """测试结果不存在或已过期时返回404"""
+        response = self.get("/api/v1/weibo/task/missing/results")
+        assert response.status_code == 404
+        print("✅ 结果不存在返回404")
+
+    def test_results_empty_page(self):
+        """测试过滤后没有匹配结果时返回空列表"""
+        seed(self.store)
+
+        response = self.get("/api/v1/weibo/task/task_1/results", min_risk=10)
+        assert response.status_code == 200
+        assert response.json()["total"] == 0
+        assert response.json()["items"] == []
+        print("✅ 空结果页正常")
@@ -0,0 +1,86 @@
+"""
+序列化测试模块
+
+测试Celery载荷的msgpack编码与按阈值压缩
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from kombu.serialization import dumps as kombu_dumps, loads as kombu_loads
+from app.core import serialization
+
+
+class TestCompactSerializer:
+    """紧凑序列化器测试类"""
+    
+    def test_small_payload_not_compressed(self):
+        """测试小于阈值的载荷不压缩"""
+        payload = {"success": True, "user_id": "test_user"}
+        
+        data = serialization.dumps(payload, threshold=1024)
+        
+        assert data[:1] == b"\x00"
+        assert serialization.loads(data) == payload
+        print("✅ 小载荷原样编码正常")
+    
+    def test_large_payload_compressed(self):
+        """测试超过阈值的载荷被压缩且可还原"""
+        payload = {"analyzed_posts": [{"post_id": str(i), "content": "测试内容" * 20} for i in range(200)]}
+        
+        data = serialization.dumps(payload, threshold=1024)
+        
+        assert data[:1] in (b"\x01", b"\x02")
+        assert len(data) < len(serialization.dumps(payload, threshold=1 << 62))
+        assert serialization.loads(data) == payload
+        print("✅ 大载荷压缩正常")
+    
+    def test_gzip_fallback(self):
+        """测试未安装zstandard时回退为gzip"""
+        payload = {"content": "测试内容" * 500}
+        
+        original = serialization.zstandard
+        serialization.zstandard = None
+        try:
+            data = serialization.dumps(payload, threshold=0)
+        finally:
+            serialization.zstandard = original
+        
+        assert data[:1] == b"\x01"
+        assert serialization.loads(data) == payload
+        print("✅ gzip回退正常")
+    
+    def test_datetime_encoded_as_isoformat(self):
+        """测试datetime与json序列化器一样编码为ISO字符串"""
+        now = datetime(2024, 1, 1, 12, 0, 0)
+        
+        assert serialization.loads(serialization.dumps({"at": now})) == {"at": now.isoformat()}
+        print("✅ datetime编码正常")
+    
+    def test_date_encoded_as_isoformat(self):
+        """测试date同样编码为ISO字符串"""
+        day = date(2024, 1, 1)
+        
+        assert serialization.loads(serialization.dumps([day])) == ["2024-01-01"]
+        print("✅ date编码正常")
+    
+    def test_unsupported_type_raises(self):
+        """测试不支持的类型报错而不是静默转为字符串"""
+        with pytest.raises(TypeError):
+            serialization.dumps({"amount": Decimal("1.5")})
+        with pytest.raises(TypeError):
+            serialization.dumps({"obj": object()})
+        print("✅ 不支持的类型报错正常")
+    
+    def test_kombu_registration(self):
+        """测试注册到kombu后可通过序列化器名称编解码"""
+        serialization.register_serializer()
+        payload = {"task": "analyze_weibo_content", "args": ["default_user", {"max_posts": 10}]}
+        
+        content_type, encoding, data = kombu_dumps(payload, serializer=serialization.SERIALIZER_NAME)
+        
+        assert content_type == serialization.CONTENT_TYPE
+        assert encoding == "binary"
+        assert kombu_loads(data, content_type, encoding, accept=[content_type]) == payload
+        print("✅ kombu序列化器注册正常")
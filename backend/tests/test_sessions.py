@@ -0,0 +1,169 @@
+"""
+会话注册表测试模块
+
+测试按账号隔离的会话、LRU淘汰、内存上限和删除额度
+"""
+
+import asyncio
+from unittest.mock import Mock, patch
+
+from app.agents.session_registry import SessionRegistry
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeAgent:
+    """模拟微博代理"""
+
+    def __init__(self, account_id):
+        self.account_id = account_id
+        self.is_logged_in = False
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def make_registry(clock=None, **kwargs):
+    """创建使用模拟代理的注册表"""
+    options = {"max_sessions": 3, "idle_ttl": 600, "memory_limit_mb": 10_000, "session_memory_mb": 100}
+    options.update(kwargs)
+    return SessionRegistry(agent_factory=FakeAgent, clock=clock or FakeClock(), **options)
+
+
+class TestSessionRegistry:
+    """会话注册表测试类"""
+
+    def test_sessions_isolated_per_account(self):
+        """测试不同账号拥有独立的代理和登录状态"""
+        registry = make_registry()
+
+        async def scenario():
+            first = await registry.acquire("alice")
+            second = await registry.acquire("bob")
+            first.agent.is_logged_in = True
+            again = await registry.acquire("alice")
+            return first, second, again
+
+        first, second, again = asyncio.run(scenario())
+
+        assert first is again
+        assert first.agent is not second.agent
+        assert first.is_logged_in and not second.is_logged_in
+        print("✅ 账号会话隔离正常")
+
+    def test_lru_eviction(self):
+        """测试超过数量上限时淘汰最久未使用的会话"""
+        registry = make_registry(max_sessions=2)
+
+        async def scenario():
+            alice = await registry.acquire("alice")
+            await registry.acquire("bob")
+            await registry.acquire("alice")  # alice 变为最近使用
+            await registry.acquire("carol")
+            return alice
+
+        alice = asyncio.run(scenario())
+
+        assert registry.accounts() == ["alice", "carol"]
+        assert not alice.agent.closed
+        print("✅ LRU淘汰正常")
+
+    def test_memory_cap_limits_capacity(self):
+        """测试内存上限决定可同时保留的会话数"""
+        registry = make_registry(max_sessions=10, memory_limit_mb=250, session_memory_mb=100)
+
+        async def scenario():
+            sessions = [await registry.acquire(f"account-{i}") for i in range(4)]
+            return sessions
+
+        sessions = asyncio.run(scenario())
+
+        assert registry.capacity == 2
+        assert len(registry) == 2
+        assert sessions[0].agent.closed and sessions[1].agent.closed
+        print("✅ 内存上限正常")
+
+    def test_in_use_session_not_evicted(self):
+        """测试使用中的会话不会被淘汰"""
+        registry = make_registry(max_sessions=1)
+
+        async def scenario():
+            async with registry.session("alice") as alice:
+                await registry.acquire("bob")
+                assert "alice" in registry
+            return alice
+
+        alice = asyncio.run(scenario())
+
+        assert not alice.agent.closed
+        assert alice.in_use == 0
+        print("✅ 使用中会话保护正常")
+
+    def test_idle_sessions_expire(self):
+        """测试空闲超时的会话被关闭"""
+        clock = FakeClock()
+        registry = make_registry(clock=clock, idle_ttl=600)
+
+        async def scenario():
+            alice = await registry.acquire("alice")
+            clock.now = 300
+            await registry.acquire("bob")
+            clock.now = 700
+            expired = await registry.evict_idle()
+            return alice, expired
+
+        alice, expired = asyncio.run(scenario())
+
+        assert expired == ["alice"]
+        assert alice.agent.closed
+        assert registry.accounts() == ["bob"]
+        print("✅ 空闲会话过期正常")
+
+
+class TestSessionBudget:
+    """账号删除额度测试类"""
+
+    def test_spare_browsers_used_for_new_sessions(self):
+        """测试预热的备用浏览器优先分配给新账号，且与会话合计不超过上限"""
+        registry = make_registry(max_sessions=2)
+        spare = FakeAgent("spare")
+
+        assert registry.add_spare(spare) is True
+        assert registry.add_spare(FakeAgent("spare-2")) is True
+        assert registry.add_spare(FakeAgent("spare-3")) is False
+
+        async def scenario():
+            session = await registry.acquire("alice")
+            await registry.close_all()
+            return session
+
+        session = asyncio.run(scenario())
+
+        assert session.agent.account_id.startswith("spare")
+        assert registry.spare_count == 0
+        assert spare.closed
+        print("✅ 备用浏览器分配正常")
+
+    def test_sessions_have_separate_buckets(self):
+        """测试每个账号使用独立的共享删除额度"""
+        registry = make_registry()
+
+        async def scenario():
+            return await registry.acquire("alice"), await registry.acquire("bob")
+
+        with patch("app.core.rate_limiter.get_redis", return_value=Mock()):
+            alice, bob = asyncio.run(scenario())
+            alice_key, bob_key = alice.delete_budget.key, bob.delete_budget.key
+
+        assert alice_key == "weibo:ratelimit:delete:alice:window"
+        assert bob_key == "weibo:ratelimit:delete:bob:window"
+        print("✅ 账号额度隔离正常")
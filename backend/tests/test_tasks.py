@@ -0,0 +1,77 @@
+"""
+异步任务测试模块
+
+测试Celery任务中不依赖浏览器和Redis的辅助逻辑
+"""
+
+from unittest.mock import patch
+from app.core.result_store import compact_post, risk_counts
+from app.tasks.weibo_tasks import (
+    _chunk_posts, _summarize_analysis, merge_analysis_results
+)
+
+
+class TestAnalysisFanOut:
+    """分片分析测试类"""
+    
+    def test_chunk_posts(self):
+        """测试微博列表按分片大小切分"""
+        posts = [{"id": str(i)} for i in range(25)]
+        chunks = _chunk_posts(posts, 10)
+        
+        assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+        assert chunks[2][0]["id"] == "20"
+        assert _chunk_posts([], 10) == []
+        print("✅ 微博分片切分正常")
+    
+    def test_summarize_analysis(self):
+        """测试各分片风险等级计数的汇总"""
+        chunk_counts = [
+            risk_counts([{"risk_score": 2}, {"risk_score": 8}]),
+            risk_counts([{"risk_score": 5}, {"risk_score": 7}]),
+        ]
+        result = _summarize_analysis(chunk_counts, {"max_posts": 4}, "test_user")
+        
+        assert result["success"] is True
+        assert result["total_analyzed"] == 4
+        assert result["high_risk_count"] == 2
+        assert result["medium_risk_count"] == 1
+        assert result["low_risk_count"] == 1
+        assert "analyzed_posts" not in result
+        print("✅ 分析结果汇总正常")
+    
+    def test_merge_analysis_results(self):
+        """测试chord回调合并各分片计数"""
+        chunk_results = [
+            risk_counts([{"risk_score": 3}, {"risk_score": 9}]),
+            risk_counts([{"risk_score": 6}]),
+        ]
+        
+        with patch("app.core.progress.get_redis"):
+            result = merge_analysis_results(chunk_results, "parent_id", "test_user", {})
+        
+        assert result["total_analyzed"] == 3
+        assert result["high_risk_count"] == 1
+        assert result["medium_risk_count"] == 1
+        assert result["low_risk_count"] == 1
+        print("✅ 分片结果合并正常")
+
+
+class TestResultStore:
+    """分析结果存储测试类"""
+    
+    def test_compact_post_drops_original_weibo(self):
+        """测试结果压缩去掉原始微博副本"""
+        post = {
+            "post_id": "1",
+            "content": "测试内容",
+            "risk_score": 5,
+            "original_weibo": {"id": "1", "content": "测试内容"}
+        }
+        
+        record = compact_post(post)
+        
+        assert "original_weibo" not in record
+        assert record["content"] == "测试内容"
+        assert "original_weibo" in post
+        print("✅ 结果压缩正常")
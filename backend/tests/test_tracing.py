@@ -0,0 +1,220 @@
+"""
+链路追踪测试模块
+
+测试traceparent传递、span父子关系、Celery信号处理和时间线输出
+"""
+
+import asyncio
+import os
+import time
+import uuid
+
+import pytest
+from celery.app.task import Context
+from fastapi.testclient import TestClient
+from langchain_core.outputs import LLMResult
+
+from app.agents.llm_callbacks import LLMTracingCallback
+from app.core import tracing
+from app.core.config import settings
+from app.main import app
+
+
+@pytest.fixture(autouse=True)
+def enable_tracing(monkeypatch):
+    """本模块的测试开启追踪"""
+    monkeypatch.setattr(settings, "tracing_enabled", True)
+
+
+@pytest.fixture
+def exporter():
+    """使用内存导出器收集span"""
+    previous = tracing.get_exporter()
+    memory = tracing.InMemorySpanExporter()
+    tracing.set_exporter(memory)
+    yield memory
+    tracing.set_exporter(previous)
+
+
+class FakeTask:
+    """模拟Celery任务"""
+
+    def __init__(self, name, request):
+        self.name = name
+        self.request = request
+
+
+class TestTraceContext:
+    """追踪上下文测试类"""
+
+    def test_traceparent_roundtrip(self):
+        """测试traceparent编码与解析"""
+        context = tracing.SpanContext("a" * 32, "b" * 16)
+
+        parsed = tracing.SpanContext.from_traceparent(context.to_traceparent())
+
+        assert parsed.trace_id == "a" * 32
+        assert parsed.span_id == "b" * 16
+        assert tracing.SpanContext.from_traceparent("00-xyz-123-01") is None
+        assert tracing.SpanContext.from_traceparent(None) is None
+        print("✅ traceparent编解码正常")
+
+    def test_nested_spans(self, exporter):
+        """测试嵌套span共享trace并指向父span"""
+        with tracing.span("outer") as outer:
+            with tracing.span("inner") as inner:
+                pass
+
+        assert inner.trace_id == outer.trace_id
+        assert inner.parent_id == outer.span_id
+        assert [s.name for s in exporter.spans] == ["inner", "outer"]
+        assert tracing.current_span() is None
+        print("✅ 嵌套span正常")
+
+    def test_span_records_error(self, exporter):
+        """测试异常时span标记失败"""
+        with pytest.raises(ValueError):
+            with tracing.span("failing"):
+                raise ValueError("boom")
+
+        assert exporter.spans[0].status == "ERROR"
+        assert exporter.spans[0].attributes["error.type"] == "ValueError"
+        print("✅ span错误记录正常")
+
+    def test_traced_async_function(self, exporter):
+        """测试异步函数装饰器"""
+        @tracing.traced("async.work")
+        async def work():
+            return tracing.current_span().name
+
+        assert asyncio.run(work()) == "async.work"
+        assert exporter.spans[0].name == "async.work"
+        print("✅ 异步函数追踪正常")
+
+
+class TestCeleryPropagation:
+    """Celery上下文传递测试类"""
+
+    def test_publish_and_execute(self, exporter):
+        """测试发布时注入的上下文在worker端成为任务span的父span"""
+        headers = {}
+        with tracing.span("POST /api/v1/weibo/analyze") as api_span:
+            tracing._inject_task_headers(headers=headers)
+
+        headers[tracing.ENQUEUED_AT_HEADER] -= 2_000_000_000  # 模拟排队2秒
+        request = Context(
+            id="task-1",
+            delivery_info={"routing_key": "analysis"},
+            **headers
+        )
+        task = FakeTask("analyze_weibo_content", request)
+
+        tracing._start_task_span(task_id="task-1", task=task)
+        with tracing.span("weibo.fetch_posts") as child:
+            pass
+        tracing._end_task_span(task_id="task-1", state="SUCCESS")
+
+        spans = {s.name: s for s in exporter.spans}
+        wait = spans["celery.queue_wait"]
+        task_span = spans["celery.task analyze_weibo_content"]
+
+        assert wait.parent_id == api_span.span_id
+        assert task_span.parent_id == api_span.span_id
+        assert child.parent_id == task_span.span_id
+        assert task_span.attributes["celery.queue"] == "analysis"
+        assert task_span.attributes["celery.queue_wait_ms"] >= 2000
+        assert task_span.attributes["celery.state"] == "SUCCESS"
+        assert tracing.current_span() is None
+        print("✅ Celery上下文传递正常")
+
+
+class TestLLMTracing:
+    """LLM请求追踪测试类"""
+
+    def test_llm_span_parent_and_tokens(self, exporter):
+        """测试LLM span挂在当前span下并记录token"""
+        callback = LLMTracingCallback("deepseek-chat")
+        run_id = uuid.uuid4()
+
+        with tracing.span("agent.step") as step:
+            callback.on_chat_model_start({}, [], run_id=run_id)
+        callback.on_llm_end(
+            LLMResult(
+                generations=[[]],
+                llm_output={"token_usage": {"prompt_tokens": 900, "completion_tokens": 60}}
+            ),
+            run_id=run_id
+        )
+
+        llm_span = next(s for s in exporter.spans if s.name == "llm.request")
+        assert llm_span.parent_id == step.span_id
+        assert llm_span.attributes["llm.prompt_tokens"] == 900
+        print("✅ LLM追踪正常")
+
+
+class TestTimeline:
+    """时间线测试类"""
+
+    def test_task_timeline(self, tmp_path):
+        """测试从导出文件生成任务时间线"""
+        path = str(tmp_path / "spans.jsonl")
+        previous = tracing.get_exporter()
+        file_exporter = tracing.FileSpanExporter(path)
+        tracing.set_exporter(file_exporter)
+        try:
+            with tracing.span("celery.task analyze_weibo_content", **{"celery.task_id": "task-9"}):
+                with tracing.span("agent.run"):
+                    time.sleep(0.01)
+            with tracing.span("unrelated"):
+                pass
+            file_exporter.flush()
+        finally:
+            tracing.set_exporter(previous)
+
+        spans = tracing.task_trace(tracing.load_spans(path), "task-9")
+        timeline = tracing.format_timeline(spans)
+
+        assert len(spans) == 2
+        assert "celery.task analyze_weibo_content" in timeline
+        assert "  agent.run" in timeline
+        assert "unrelated" not in timeline
+        print("✅ 任务时间线正常")
+
+    def test_file_exporter_rotates(self, tmp_path):
+        """测试导出文件超过大小上限后轮转，只保留指定个数的旧文件"""
+        path = str(tmp_path / "spans.jsonl")
+        file_exporter = tracing.FileSpanExporter(path, max_bytes=2000, backup_count=2)
+        for index in range(60):
+            item = tracing.start_span(f"span-{index}")
+            item.end_ns = item.start_ns
+            file_exporter.export(item)
+            if index % 10 == 9:
+                file_exporter.flush()
+        file_exporter.flush()
+
+        assert os.path.exists(path + ".1")
+        assert os.path.exists(path + ".2")
+        assert not os.path.exists(path + ".3")
+        # 当前文件在刚轮转后可能尚未创建
+        assert not os.path.exists(path) or os.path.getsize(path) < 2000
+        names = [s["name"] for s in tracing.load_spans(path)]
+        assert names == sorted(names, key=lambda name: int(name.split("-")[1]))
+        assert names[-1] == "span-59"
+        print("✅ 导出文件轮转正常")
+
+
+class TestRequestTracing:
+    """API请求追踪测试类"""
+
+    def test_request_span_continues_incoming_trace(self, exporter):
+        """测试API请求沿用调用方的traceparent"""
+        client = TestClient(app)
+        incoming = tracing.SpanContext("c" * 32, "d" * 16).to_traceparent()
+
+        response = client.get("/", headers={"traceparent": incoming})
+
+        request_span = next(s for s in exporter.spans if s.name == "GET /")
+        assert request_span.trace_id == "c" * 32
+        assert request_span.parent_id == "d" * 16
+        assert response.headers["traceparent"].startswith(f"00-{'c' * 32}-")
+        print("✅ API请求追踪正常")
@@ -0,0 +1,93 @@
+"""
+worker预热测试模块
+
+测试子进程启动时恢复本worker归属账号的会话、预启动备用浏览器，以及预热失败时不阻塞启动
+"""
+
+import asyncio
+from unittest.mock import patch
+
+from app.agents.session_registry import SessionRegistry
+from app.core.config import settings
+from app.tasks import weibo_tasks
+
+
+class FakeAgent:
+    """模拟持久浏览器代理"""
+
+    def __init__(self, *args, **kwargs):
+        self.is_logged_in = False
+        self.pages = []
+        self.cookies = None
+        self.closed = False
+
+    async def preload_page(self, url):
+        self.pages.append(url)
+        return True
+
+    async def import_storage_state(self, state):
+        self.cookies = state["cookies"]
+        return True
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeDirectory:
+    """模拟账号会话归属目录"""
+
+    claimed = []
+
+    def accounts_of(self, hostname):
+        return ["alice", "bob"] if hostname == "celery@w1" else []
+
+    def load_state(self, account_id):
+        return {"cookies": [{"name": "SUB", "value": account_id}]} if account_id == "alice" else None
+
+    def claim(self, account_id, hostname):
+        self.claimed.append((account_id, hostname))
+
+
+class TestWarmUp:
+    """预热测试类"""
+
+    def _warm_up(self, hostname, browsers):
+        registry = SessionRegistry(max_sessions=4, memory_limit_mb=10_000, session_memory_mb=100,
+                                   agent_factory=FakeAgent)
+        FakeDirectory.claimed = []
+        with patch.object(weibo_tasks, "get_session_registry", return_value=registry), \
+                patch.object(weibo_tasks, "SessionDirectory", FakeDirectory), \
+                patch.object(weibo_tasks, "WeiboAgent", FakeAgent), \
+                patch("app.core.affinity._session_queue_enabled", True):
+            stats = asyncio.run(weibo_tasks._warm_up(hostname, browsers))
+        return registry, stats
+
+    def test_restores_owned_accounts_and_fills_spares(self):
+        """测试恢复归属账号的会话并预启动备用浏览器补足数量，均预先打开微博首页"""
+        registry, stats = self._warm_up("celery@w1", browsers=3)
+
+        assert stats == {"restored": 1, "accounts": 2, "spares": 1}
+        alice = registry.peek("alice").agent
+        assert alice.is_logged_in and alice.cookies[0]["value"] == "alice"
+        assert alice.pages == [settings.weibo_api_base_url] * 2
+        assert not registry.peek("bob").is_logged_in
+        assert FakeDirectory.claimed == [("alice", "celery@w1")]
+        print("✅ 会话恢复与备用浏览器预热正常")
+
+    def test_spares_capped_by_capacity(self):
+        """测试没有归属账号时只预启动备用浏览器，且不超过会话上限"""
+        registry, stats = self._warm_up("celery@w2", browsers=10)
+
+        assert stats == {"restored": 0, "accounts": 0, "spares": 4}
+        assert len(registry) == 0
+        print("✅ 备用浏览器数量受上限约束")
+
+    def test_failure_does_not_block_startup(self):
+        """测试预热失败时记录告警并继续启动"""
+        async def broken(hostname, browsers):
+            raise RuntimeError("chromium missing")
+
+        with patch.object(weibo_tasks, "_warm_up", broken), \
+                patch.object(settings, "warmup_enabled", True):
+            weibo_tasks.warm_up_worker()
+        print("✅ 预热失败不阻塞启动")
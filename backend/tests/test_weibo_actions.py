@@ -0,0 +1,228 @@
+"""
+微博列表提取动作测试模块
+
+测试卡片数据的整理、去重收集、日期和关键词筛选、按符合条件的数量滚动收集的停止条件，
+以及动作注册到Controller后 get_user_weibos 直接使用收集到的记录
+"""
+
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+from browser_use import Controller
+
+from app.agents import weibo_actions
+from app.agents.weibo_actions import (
+    PostCollector,
+    collect_posts,
+    filter_posts,
+    normalize_card,
+    parse_count,
+    parse_publish_time,
+    register_weibo_actions,
+)
+from app.agents.weibo_agent import WeiboAgent
+
+NOW = datetime(2024, 6, 30, 20, 0)
+
+
+def card(post_id, time="2024-06-01 10:00", content="今天天气不错"):
+    return {"id": post_id, "url": f"https://weibo.com/1/{post_id}", "time": time, "content": content,
+            "repost": "转发", "comment": "3", "like": "1.2万", "media": True}
+
+
+class FakePage:
+    """按滚动次数依次返回卡片批次的页面"""
+
+    def __init__(self, batches):
+        self.batches = batches
+        self.scrolls = 0
+
+    async def evaluate(self, script):
+        if script == weibo_actions.EXTRACT_CARDS_JS:
+            return self.batches[min(self.scrolls, len(self.batches) - 1)]
+        self.scrolls += 1
+
+    async def wait_for_timeout(self, ms):
+        pass
+
+
+class TestCardParsing:
+    """卡片数据整理测试"""
+
+    def test_parse_count(self):
+        """测试互动数解析"""
+        assert parse_count("转发") == 0
+        assert parse_count("") == 0
+        assert parse_count("128") == 128
+        assert parse_count("1.2万") == 12000
+        assert parse_count(" 3亿 ") == 300000000
+        assert parse_count(42) == 42
+        print("✅ 互动数解析测试通过")
+
+    def test_parse_publish_time(self):
+        """测试发布时间统一格式"""
+        assert parse_publish_time("刚刚", NOW) == "2024-06-30 20:00"
+        assert parse_publish_time("5分钟前", NOW) == "2024-06-30 19:55"
+        assert parse_publish_time("昨天 08:30", NOW) == "2024-06-29 08:30"
+        assert parse_publish_time("06-01 10:00", NOW) == "2024-06-01 10:00"
+        assert parse_publish_time("23-12-31 23:59", NOW) == "2023-12-31 23:59"
+        assert parse_publish_time("Sat Jan 06 12:00:00 +0800 2024", NOW) == "2024-01-06 12:00"
+        assert parse_publish_time("未知", NOW) == "未知"
+        print("✅ 发布时间解析测试通过")
+
+    def test_normalize_card(self):
+        """测试卡片整理为微博记录"""
+        post = normalize_card(card("5017"))
+        assert post == {
+            "id": "5017",
+            "content": "今天天气不错",
+            "publish_time": "2024-06-01 10:00",
+            "repost_count": 0,
+            "comment_count": 3,
+            "like_count": 12000,
+            "has_media": True,
+            "url": "https://weibo.com/1/5017"
+        }
+        print("✅ 卡片整理测试通过")
+
+
+class TestPostCollector:
+    """收集与筛选测试"""
+
+    def test_deduplicates_by_id(self):
+        """测试按ID去重并保持页面顺序"""
+        collector = PostCollector()
+        assert len(collector.add([card("1"), card("2")])) == 2
+        assert [post["id"] for post in collector.add([card("2"), card("3"), {"id": ""}])] == ["3"]
+        assert [post["id"] for post in collector.posts] == ["1", "2", "3"]
+        assert "已收集 3 条微博" in collector.summary(1)
+        assert "今天天气不错" not in collector.summary(1)
+        collector.reset()
+        assert collector.posts == []
+        print("✅ 去重收集测试通过")
+
+    def test_filter_posts(self):
+        """测试按日期和关键词筛选"""
+        collector = PostCollector()
+        collector.add([
+            card("1", "2024-06-20 10:00", "出去旅游"),
+            card("2", "2024-06-10 10:00", "工作日常"),
+            card("3", "2024-05-01 10:00", "旅游照片"),
+            card("4", "某个时间", "旅游计划"),
+        ])
+        selected = filter_posts(collector.posts, "2024-06-01", "2024-06-30", ["旅游"])
+        assert [post["id"] for post in selected] == ["1", "4"]
+        print("✅ 筛选测试通过")
+
+
+class TestCollectPosts:
+    """滚动收集测试"""
+
+    def test_stops_at_max_count(self):
+        """测试收集够数量后停止"""
+        page = FakePage([[card("1"), card("2")], [card("3"), card("4")], [card("5"), card("6")]])
+        collector = PostCollector()
+        added, reached_end = asyncio.run(collect_posts(page, collector, 3))
+        assert added == 4
+        assert reached_end is False
+        assert page.scrolls == 1
+        print("✅ 数量上限测试通过")
+
+    def test_max_count_counts_matching_posts(self):
+        """测试数量上限按符合条件的微博计算，第一页都不符合时继续滚动"""
+        page = FakePage([
+            [card("1", "2024-06-20 10:00", "出去旅游"), card("2", "2024-06-18 10:00", "工作日常")],
+            [card("3", "2024-05-20 10:00", "旅游照片"), card("4", "2024-05-18 10:00", "工作日常")],
+            [card("5", "2024-05-10 10:00", "工作日常"), card("6", "2024-05-05 10:00", "旅游计划")],
+            [card("7", "2024-05-01 10:00", "旅游回忆")],
+        ])
+        collector = PostCollector()
+        collector.reset(end_date="2024-05-31", keywords=["旅游"])
+        asyncio.run(collect_posts(page, collector, 2))
+
+        assert [post["id"] for post in collector.matched] == ["3", "6"]
+        assert page.scrolls == 2
+        assert "其中 2 条符合条件" in collector.summary(2)
+        print("✅ 按符合条件的数量停止测试通过")
+
+    def test_stops_when_no_more_posts(self):
+        """测试连续滚动没有新微博时停止"""
+        page = FakePage([[card("1")]])
+        collector = PostCollector()
+        _, reached_end = asyncio.run(collect_posts(page, collector, 100))
+        assert reached_end is True
+        assert len(collector.posts) == 1
+        assert page.scrolls == weibo_actions.MAX_IDLE_SCROLLS + 1
+        print("✅ 到底停止测试通过")
+
+    def test_stops_before_start_date(self):
+        """测试新加载的微博都早于开始日期时停止，置顶的旧微博不影响"""
+        page = FakePage([
+            [card("pinned", "2023-01-01 10:00"), card("1", "2024-06-20 10:00")],
+            [card("2", "2024-05-20 10:00"), card("3", "2024-05-10 10:00")],
+            [card("4", "2024-04-01 10:00")],
+        ])
+        collector = PostCollector()
+        _, reached_end = asyncio.run(collect_posts(page, collector, 100, stop_before="2024-06-01"))
+        assert reached_end is False
+        assert [post["id"] for post in collector.posts] == ["pinned", "1", "2", "3"]
+        print("✅ 开始日期停止测试通过")
+
+
+class TestRegisteredActions:
+    """动作注册测试"""
+
+    def test_actions_registered(self):
+        """测试动作注册到Controller并可执行"""
+        controller = Controller()
+        collector = PostCollector()
+        register_weibo_actions(controller, collector)
+        actions = controller.registry.registry.actions
+        assert {"extract_weibo_cards", "scroll_and_collect"} <= set(actions)
+
+        class FakeBrowser:
+            async def get_current_page(self):
+                return FakePage([[card("1"), card("2")]])
+
+        result = asyncio.run(controller.registry.execute_action(
+            "scroll_and_collect", {"max_count": 2}, browser=FakeBrowser()
+        ))
+        assert len(collector.posts) == 2
+        assert collector.reached_end is False
+        assert "已收集 2 条微博" in result.extracted_content
+        print("✅ 动作注册测试通过")
+
+    def test_get_user_weibos_uses_collected_posts(self):
+        """测试获取列表直接使用动作收集的记录，LLM的回复不再被解析"""
+        agent = WeiboAgent()
+        agent.is_logged_in = True
+
+        async def fake_execute(prompt, progress_callback=None, task_type=None):
+            assert "scroll_and_collect" in prompt
+            agent.post_collector.add([
+                card("1", "2024-06-20 10:00"), card("2", "2024-05-01 10:00"),
+                card("3", "2024-06-10 10:00"), card("4", "2024-06-05 10:00")
+            ])
+            return {"success": False, "partial": True, "budget_exceeded": "steps", "result": None}
+
+        with patch.object(agent, "execute_task", new=AsyncMock(side_effect=fake_execute)):
+            result = asyncio.run(agent.get_user_weibos(start_date="2024-06-01", max_count=2))
+
+        assert result["success"] is True
+        assert result["partial"] is True
+        assert result["complete"] is False
+        assert [post["id"] for post in result["weibos"]] == ["1", "3"]
+        print("✅ 使用收集记录测试通过")
+
+    def test_create_agent_exposes_actions(self):
+        """测试创建的Agent可以调用提取动作，临时浏览器仍在运行结束后关闭"""
+        agent = WeiboAgent()._create_agent("获取微博列表")
+        assert "scroll_and_collect" in agent.ActionModel.model_fields
+        assert agent.controller_injected is False
+
+        persistent = WeiboAgent(persistent_browser=True)
+        agent = persistent._create_agent("获取微博列表")
+        assert agent.controller is persistent.controller
+        assert agent.controller_injected is True
+        print("✅ 创建Agent注册动作测试通过")
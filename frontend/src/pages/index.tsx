@@ -67,98 +67,77 @@ const WeiboManager: React.FC<WeiboManagerProps> = () => {
   const [userInfo, setUserInfo] = useState<any>(null)
   const [activeTab, setActiveTab] = useState('login')
 
-  // 轮询任务状态
+  // 订阅登录任务事件
   useEffect(() => {
-    let interval: NodeJS.Timeout | null = null
+    if (!loginTask?.task_id || loginTask.status !== 'PROGRESS') return
+
+    return api.subscribeTaskEvents(loginTask.task_id, (event) => {
+      if (event.event === 'progress') {
+        setLoginTask((prev) => prev && {
+          ...prev,
+          message: event.message,
+          progress: event.qr_status === 'confirmed' ? 100 :
+                   event.qr_status === 'scanned' ? 50 : 25
+        })
+      } else if (event.event === 'status') {
+        if (event.status === 'SUCCESS' && event.result?.success) {
+          setIsLoggedIn(true)
+          setUserInfo(event.result.user_info)
+          setActiveTab('analyze')
+          message.success('扫码登录成功！')
+        } else {
+          message.error(`登录失败: ${event.result?.error || event.error || '二维码已过期'}`)
+        }
+        setLoginTask(null)
+      }
+    })
+  }, [loginTask?.task_id])
 
-    // 登录任务轮询
-    if (loginTask?.task_id && loginTask.status === 'PROGRESS') {
-      interval = setInterval(async () => {
-        try {
-          // 检查扫码登录状态
-          const qrStatus = await api.checkQRLoginStatus(loginTask.task_id)
-          setLoginTask({
-            ...loginTask,
-            message: qrStatus.message,
-            progress: qrStatus.qr_status === 'confirmed' ? 100 : 
-                     qrStatus.qr_status === 'scanned' ? 50 : 25
-          })
+  // 订阅分析任务事件
+  useEffect(() => {
+    if (!analysisTask?.task_id || analysisTask.status !== 'PROGRESS') return
+
+    return api.subscribeTaskEvents(analysisTask.task_id, (event) => {
+      if (event.event === 'partial') {
+        // 分片完成后先展示部分结果
+        setAnalysisResults((prev) =>
+          [...prev, ...(event.posts || [])].sort((a, b) => b.risk_score - a.risk_score)
+        )
+        return
+      }
 
-          if (qrStatus.qr_status === 'confirmed') {
-            setIsLoggedIn(true)
-            setUserInfo(qrStatus.user_info)
-            setActiveTab('analyze')
-            message.success('扫码登录成功！')
-            setLoginTask(null)
-          } else if (qrStatus.qr_status === 'expired' || qrStatus.qr_status === 'error') {
-            message.error(`登录失败: ${qrStatus.error || '二维码已过期'}`)
-            setLoginTask(null)
-          }
-        } catch (error) {
-          console.error('获取登录任务状态失败:', error)
-          // 如果扫码状态检查失败，回退到普通任务状态检查
-          try {
-            const status = await api.getTaskStatus(loginTask.task_id)
-            setLoginTask(status)
-
-            if (status.status === 'SUCCESS') {
-              setIsLoggedIn(true)
-              setUserInfo(status.result?.user_info)
-              setActiveTab('analyze')
-              message.success('登录成功！')
-            } else if (status.status === 'FAILURE') {
-              message.error(`登录失败: ${status.error}`)
-            }
-          } catch (fallbackError) {
-            console.error('获取任务状态失败:', fallbackError)
-          }
-        }
-      }, 3000) // 扫码登录检查间隔稍长一些
-    }
+      setAnalysisTask(event)
+
+      if (event.status === 'SUCCESS') {
+        // 任务结果只含汇总计数，逐条结果按风险分数分页加载
+        api.getAnalysisResults(event.task_id, { limit: 100 })
+          .then((page) => setAnalysisResults(page.items))
+          .catch((error) => console.error('获取分析结果失败:', error))
+        setCurrentStep(2)
+        message.success('分析完成！')
+      } else if (event.status === 'FAILURE') {
+        message.error(`分析失败: ${event.error}`)
+      }
+    })
+  }, [analysisTask?.task_id])
 
-    // 分析任务轮询
-    if (analysisTask?.task_id && analysisTask.status === 'PROGRESS') {
-      interval = setInterval(async () => {
-        try {
-          const status = await api.getTaskStatus(analysisTask.task_id)
-          setAnalysisTask(status)
-
-          if (status.status === 'SUCCESS') {
-            setAnalysisResults(status.result?.analyzed_posts || [])
-            setCurrentStep(2)
-            message.success('分析完成！')
-          } else if (status.status === 'FAILURE') {
-            message.error(`分析失败: ${status.error}`)
-          }
-        } catch (error) {
-          console.error('获取分析任务状态失败:', error)
-        }
-      }, 2000)
-    }
+  // 订阅删除任务事件
+  useEffect(() => {
+    if (!deleteTask?.task_id || deleteTask.status !== 'PROGRESS') return
 
-    // 删除任务轮询
-    if (deleteTask?.task_id && deleteTask.status === 'PROGRESS') {
-      interval = setInterval(async () => {
-        try {
-          const status = await api.getTaskStatus(deleteTask.task_id)
-          setDeleteTask(status)
-
-          if (status.status === 'SUCCESS') {
-            setCurrentStep(3)
-            message.success('删除完成！')
-          } else if (status.status === 'FAILURE') {
-            message.error(`删除失败: ${status.error}`)
-          }
-        } catch (error) {
-          console.error('获取删除任务状态失败:', error)
-        }
-      }, 2000)
-    }
+    return api.subscribeTaskEvents(deleteTask.task_id, (event) => {
+      if (event.event !== 'progress' && event.event !== 'status') return
 
-    return () => {
-      if (interval) clearInterval(interval)
-    }
-  }, [loginTask, analysisTask, deleteTask])
+      setDeleteTask(event)
+
+      if (event.status === 'SUCCESS') {
+        setCurrentStep(3)
+        message.success('删除完成！')
+      } else if (event.status === 'FAILURE') {
+        message.error(`删除失败: ${event.error}`)
+      }
+    })
+  }, [deleteTask?.task_id])
 
   // 获取系统统计信息
   useEffect(() => {
@@ -244,6 +223,7 @@ const WeiboManager: React.FC<WeiboManagerProps> = () => {
       }
 
       const response = await api.analyzeContent(request)
+      setAnalysisResults([])
       setAnalysisTask({
         task_id: response.task_id,
         status: 'PROGRESS',
@@ -74,7 +74,7 @@ export interface LoginResponse {
 export interface QRLoginStatus {
   task_id: string
   status: string
-  qr_status: 'waiting' | 'scanned' | 'confirmed' | 'expired' | 'error'
+  qr_status: 'waiting' | 'scanned' | 'confirmed' | 'expired' | 'unconfirmed' | 'error'
   message: string
   qr_code?: string
   user_info?: UserInfo
@@ -98,6 +98,22 @@ export interface AnalysisResult {
   url?: string
 }
 
+export interface AnalysisResultsPage {
+  task_id: string
+  total: number
+  offset: number
+  limit: number
+  categories: string[]
+  items: AnalysisResult[]
+}
+
+export interface AnalysisResultsQuery {
+  offset?: number
+  limit?: number
+  min_risk?: number
+  category?: string[]
+}
+
 export interface DeleteRequest {
   post_ids: string[]
   confirm: boolean
@@ -118,6 +134,13 @@ export interface TaskStatus {
   error?: string
 }
 
+export interface TaskEvent extends TaskStatus {
+  event: 'progress' | 'partial' | 'status'
+  qr_status?: QRLoginStatus['qr_status']
+  qr_code?: string
+  posts?: AnalysisResult[]
+}
+
 export interface DeleteResult {
   post_id: string
   success: boolean
@@ -175,6 +198,70 @@ export const api = {
     return response.data
   },
 
+  /**
+   * 分页查询分析结果（按风险分数降序）
+   */
+  getAnalysisResults: async (taskId: string, query: AnalysisResultsQuery = {}): Promise<AnalysisResultsPage> => {
+    const response = await apiClient.get<AnalysisResultsPage>(`/weibo/task/${taskId}/results`, {
+      params: query,
+      paramsSerializer: { indexes: null }
+    })
+    return response.data
+  },
+
+  /**
+   * 订阅任务实时事件
+   *
+   * 优先使用SSE推送；浏览器不支持或连接中断时回退为轮询任务状态。
+   * 返回取消订阅函数。
+   */
+  subscribeTaskEvents: (taskId: string, onEvent: (event: TaskEvent) => void): (() => void) => {
+    let closed = false
+    let source: EventSource | null = null
+    let timer: ReturnType<typeof setInterval> | null = null
+
+    function close() {
+      closed = true
+      if (source) source.close()
+      if (timer) clearInterval(timer)
+    }
+
+    function startPolling() {
+      timer = setInterval(async () => {
+        try {
+          const status = await api.getTaskStatus(taskId)
+          const finished = status.status === 'SUCCESS' || status.status === 'FAILURE'
+          onEvent({ ...status, event: finished ? 'status' : 'progress' })
+          if (finished) close()
+        } catch (error) {
+          console.error('获取任务状态失败:', error)
+        }
+      }, 3000)
+    }
+
+    if (typeof EventSource === 'undefined') {
+      startPolling()
+      return close
+    }
+
+    source = new EventSource(`${API_BASE_URL}/weibo/task/${taskId}/events`)
+    const handleEvent = (e: MessageEvent) => {
+      const event = JSON.parse(e.data) as TaskEvent
+      onEvent(event)
+      if (event.event === 'status') close()
+    }
+    ;['progress', 'partial', 'status'].forEach((name) => {
+      source!.addEventListener(name, handleEvent as EventListener)
+    })
+    source.onerror = () => {
+      if (closed) return
+      source!.close()
+      if (!timer) startPolling()
+    }
+
+    return close
+  },
+
   /**
    * 取消任务
    */